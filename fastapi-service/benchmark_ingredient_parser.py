@@ -0,0 +1,104 @@
+# benchmark_ingredient_parser.py
+# Throughput of the ingredient-line parser against the old /nutrition heuristic:
+#   python benchmark_ingredient_parser.py --lines 100000
+import argparse
+import random
+import re
+import time
+
+import pandas as pd
+
+from ingredient_parser import parse_line, parse_many
+from meal_scheduler import VEG_MEALS_DB
+
+QUANTITIES = ["1", "2", "3", "1/2", "1 1/2", "2.5", "½", "1½", "¾", "2-3", "100", "250"]
+UNITS = ["", "g", "grams", "kg", "ml", "tsp", "tbsp", "tbsp.", "cup", "cups", "oz", "lb",
+         "tablespoons", "fl oz", "pinch"]
+
+
+def legacy_parse(ing_text):
+    """The regex heuristic main.py used before ingredient_parser.py, kept for comparison."""
+    s = re.sub(r'\s+', ' ', ing_text.strip().lower())
+    m = re.match(
+        r'^(\d+(?:\.\d+)?|\d+/\d+)\s*(g|gram|grams|kg|kilogram|ml|tbsp|tbsp\.|tsp|cup|cups)?\s*(.*)$', s)
+    if m:
+        qty, unit, name = m.group(1), m.group(2), m.group(3).strip() or s
+        try:
+            if '/' in qty:
+                a, b = qty.split('/')
+                qty_val = float(a) / float(b)
+            else:
+                qty_val = float(qty)
+        except ValueError:
+            qty_val = None
+        if unit:
+            factor = {"g": 1, "gram": 1, "grams": 1, "kg": 1000, "kilogram": 1000, "ml": 1,
+                      "tbsp": 15, "tsp": 5, "cup": 240, "cups": 240}[unit.replace('.', '')]
+            return qty_val * factor, name
+        if qty_val is not None:
+            return qty_val, name
+    m2 = re.match(r'^(\d+(?:\.\d+)?)\s+(.*)$', s)
+    if m2:
+        return float(m2.group(1)), m2.group(2).strip()
+    return None, s
+
+
+def build_corpus(n, seed):
+    rng = random.Random(seed)
+    names = sorted({ing for meals in VEG_MEALS_DB.values() for meal in meals for ing in meal["ingredients"]})
+    lines = []
+    for _ in range(n):
+        name = rng.choice(names)
+        if rng.random() < 0.1:
+            lines.append(name)  # no quantity at all
+        else:
+            lines.append(" ".join(p for p in (rng.choice(QUANTITIES), rng.choice(UNITS), name) if p))
+    return lines
+
+
+def _timed(fn, lines):
+    start = time.perf_counter()
+    out = fn(lines)
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lines = build_corpus(args.lines, args.seed)
+    unique = list(dict.fromkeys(lines))
+
+    legacy_s, legacy = _timed(lambda ls: [legacy_parse(l) for l in ls], lines)
+    parse_line.cache_clear()
+    cold_s, _ = _timed(lambda ls: [parse_line.__wrapped__(l) for l in ls], lines)
+    parse_line.cache_clear()
+    batch_s, parsed = _timed(parse_many, lines)
+
+    rows = [
+        {"parser": "legacy regex", "seconds": legacy_s,
+         "resolved_grams": sum(g is not None for g, _ in legacy)},
+        {"parser": "parse_line, no cache", "seconds": cold_s, "resolved_grams": None},
+        {"parser": "parse_many", "seconds": batch_s,
+         "resolved_grams": sum(p.grams is not None for p in parsed)},
+    ]
+    for row in rows:
+        row["lines_per_sec"] = round(len(lines) / row["seconds"])
+        row["seconds"] = round(row["seconds"], 3)
+        if row["resolved_grams"] is not None:
+            row["resolved_grams"] = f"{row['resolved_grams'] / len(lines):.1%}"
+
+    print(f"{len(lines)} lines, {len(unique)} distinct")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+    # lines the old heuristic got wrong, e.g. "2 cups spinach" -> "s spinach"
+    diffs = [(l, legacy_parse(l), parse_line(l)) for l in unique if legacy_parse(l)[1] != parse_line(l).name]
+    print(f"\n{len(diffs)} distinct lines now parse to a different name; first few:")
+    for line, old, new in diffs[:5]:
+        print(f"  {line!r}: {old[1]!r} -> {new.name!r}")
+
+
+if __name__ == "__main__":
+    main()
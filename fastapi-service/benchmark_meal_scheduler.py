@@ -0,0 +1,69 @@
+# benchmark_meal_scheduler.py
+# Plan generation throughput across plan lengths and catalog sizes:
+#   python benchmark_meal_scheduler.py --days 7 30 90 --catalog-sizes 40 400 4000
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from meal_scheduler import VEG_MEALS_DB, CompiledCatalog, generate_plans
+
+TARGETS = {"calories": 1800, "protein_g": 90, "carbs_g": 200, "fat_g": 60}
+
+
+def synthetic_catalog(n_meals, seed):
+    """Real meals first, then made-up ones drawing on a pantry that grows with the catalog."""
+    rng = random.Random(seed)
+    real = [m for meals in VEG_MEALS_DB.values() for m in meals]
+    pantry = sorted({ing for m in real for ing in m["ingredients"]})
+    pantry += [f"ingredient {i}" for i in range(max(0, n_meals // 4 - len(pantry)))]
+    meals = real[:n_meals]
+    while len(meals) < n_meals:
+        meals.append({
+            "name": f"Meal {len(meals)}",
+            "ingredients": rng.sample(pantry, rng.randint(3, 6)),
+            "macros": {"calories": rng.uniform(150, 650), "protein_g": rng.uniform(4, 45),
+                       "carbs_g": rng.uniform(8, 90), "fat_g": rng.uniform(3, 35)},
+        })
+    return meals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 90])
+    parser.add_argument("--catalog-sizes", type=int, nargs="+", default=[40, 400, 4000])
+    parser.add_argument("--households", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.catalog_sizes:
+        start = time.perf_counter()
+        catalog = CompiledCatalog(synthetic_catalog(size, args.seed))
+        compile_ms = (time.perf_counter() - start) * 1000
+        households = [{"id": i} for i in range(args.households)]
+
+        for days in args.days:
+            start = time.perf_counter()
+            plans = generate_plans(households, seed=args.seed, days=days, catalog=catalog,
+                                   targets=TARGETS, repeat_window=min(7, size // 3))
+            elapsed = time.perf_counter() - start
+            again = generate_plans(households[:5], seed=args.seed, days=days, catalog=catalog,
+                                   targets=TARGETS, repeat_window=min(7, size // 3))
+            lists = [len(p["shopping_list"]) for p in plans.values()]
+            rows.append({
+                "catalog": size,
+                "days": days,
+                "compile_ms": round(compile_ms, 1),
+                "households_per_sec": round(len(plans) / elapsed, 1),
+                "ms_per_plan": round(elapsed / len(plans) * 1000, 2),
+                "avg_shopping_items": round(sum(lists) / len(lists), 1),
+                "deterministic": all(again[h]["schedule"] == plans[h]["schedule"] for h in again),
+            })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmark_note_index.py
+# Insert, delete and query costs of the note similarity index, exact vs IVF:
+#   python benchmark_note_index.py --sizes 10000 100000 1000000 --queries 200
+# Vectors are synthetic clustered 384-d embeddings (MiniLM's size), so no
+# model is needed; recall@k is the IVF results' overlap with exact search.
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from note_index import NoteIndex
+
+
+def clustered_vectors(rng, centers, n, noise=0.35):
+    labels = rng.integers(0, len(centers), n)
+    return (centers[labels] + noise * rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+            / np.sqrt(centers.shape[1]))
+
+
+def _latencies(fn, queries):
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probe", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--insert-batch", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        rng = np.random.default_rng(args.seed)
+        centers = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+        index = NoteIndex(mode="exact")
+        start = time.perf_counter()
+        for lo in range(0, size, args.insert_batch):
+            n = min(args.insert_batch, size - lo)
+            index.add([str(i) for i in range(lo, lo + n)], clustered_vectors(rng, centers, n))
+        insert_s = time.perf_counter() - start
+
+        # churn: delete 1% and insert as many new notes (reusing the freed slots)
+        churn = max(1, size // 100)
+        start = time.perf_counter()
+        index.remove([str(i) for i in rng.choice(size, churn, replace=False)])
+        index.add([f"new{i}" for i in range(churn)], clustered_vectors(rng, centers, churn))
+        churn_s = time.perf_counter() - start
+
+        # half near-duplicates of indexed notes, half fresh notes
+        dupes = index._vectors[rng.choice(index._size, args.queries // 2)]
+        dupes = dupes + 0.05 * rng.standard_normal(dupes.shape, dtype=np.float32) / np.sqrt(args.dim)
+        queries = np.vstack([dupes, clustered_vectors(rng, centers, args.queries - len(dupes))])
+
+        exact = index.search(queries, k=args.k, exact=True)
+        ms = _latencies(lambda q: index.search(q, k=args.k, exact=True), queries)
+        start = time.perf_counter()
+        index.search(queries, k=args.k, exact=True)
+        batched_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        base = {"notes": size, "insert_s": round(insert_s, 2), "churn_1pct_s": round(churn_s, 3),
+                "matrix_mb": index.stats()["matrix_mb"]}
+        rows.append({**base, "search": "exact", "train_s": None,
+                     "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                     "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                     "batched_ms_per_query": round(batched_ms, 3), f"recall@{args.k}": 1.0})
+
+        index.mode = "ivf"
+        start = time.perf_counter()
+        index._maybe_train()
+        train_s = time.perf_counter() - start
+        for probe in args.probe:
+            index.n_probe = index._ivf.n_probe = probe
+            approx = index.search(queries, k=args.k, exact=False)
+            recall = np.mean([len({i for i, _ in a} & {i for i, _ in e}) / max(1, len(e))
+                              for a, e in zip(approx, exact)])
+            ms = _latencies(lambda q: index.search(q, k=args.k, exact=False), queries)
+            rows.append({**base, "search": f"ivf {len(index._ivf.lists)}/{probe}",
+                         "train_s": round(train_s, 2),
+                         "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                         "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                         "batched_ms_per_query": None, f"recall@{args.k}": round(float(recall), 3)})
+        del index
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# benchmark_service.py
+# End-to-end load test of the service against a local Spoonacular stub:
+#   python benchmark_service.py --concurrency 1 16 --duration 10
+#   python benchmark_service.py --latency-ms 150 --jitter-ms 100 --error-rate 0.05 --scenarios nutrition recipe_generator
+#   python benchmark_service.py --save-baseline baseline.json
+#   python benchmark_service.py --baseline baseline.json      # exit code 1 on a regression
+#   python benchmark_service.py --url http://127.0.0.1:8000    # an already running service
+# The harness starts spoonacular_stub.py and `uvicorn main:app` (pointed at the
+# stub through SPOONACULAR_BASE_URL) unless --url is given, then drives each
+# scenario for --duration seconds with --concurrency clients and reports
+# throughput and latency percentiles. Baselines are machine specific: save
+# and compare them on the same host.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+NOTES = [
+    "Submit report by EOD", "Call mom back ASAP", "Buy milk and bread", "Water the plants",
+    "Schedule annual health checkup next month", "Plan summer vacation for July",
+]
+SYMPTOMS = ["none", "lethargy", "vomiting", "loss_of_appetite", "excessive_thirst",
+            "diarrhea", "coughing", "sneezing"]
+FOODS = ["dry_kibble", "wet_food", "mixed", "raw_diet"]
+BREEDS = ["labrador", "bulldog", "golden_retriever", "german_shepherd",
+          "persian_cat", "siamese_cat", "maine_coon", "ragdoll"]
+PANTRY = ["rice", "egg", "spinach", "tomato", "onion", "garlic", "paneer", "chickpeas", "lentils",
+          "bread", "milk", "cheese", "potato", "broccoli", "tofu", "pasta", "beans", "yogurt"]
+MEAL_LINES = ["2 eggs", "100g rice", "1 cup milk", "2 slices bread", "150g tofu", "1 banana",
+              "1 tbsp olive oil", "200g broccoli", "50g cheese", "1 cup lentils", "2 tomatoes"]
+
+
+def _notes():
+    try:
+        return pd.read_csv(os.path.join(HERE, "notes_dataset.csv"))["text"].astype(str).tolist()
+    except Exception:
+        return NOTES
+
+
+def _meal(rng):
+    return ", ".join(rng.sample(MEAL_LINES, rng.randint(2, 4)))
+
+
+def scenarios():
+    """name -> (method, path, payload(rng, i))"""
+    notes = _notes()
+    return {
+        "root": ("GET", "/", lambda rng, i: None),
+        "urgency": ("POST", "/predict_urgency", lambda rng, i: {"text": rng.choice(notes)}),
+        "urgency_batch": ("POST", "/predict_urgency_batch",
+                          lambda rng, i: {"texts": rng.sample(notes, min(16, len(notes)))}),
+        "pet_comfort": ("POST", "/predict_pet_comfort", lambda rng, i: {
+            "temperature": round(rng.uniform(5, 38), 1), "humidity": round(rng.uniform(20, 90)),
+            "feeding_interval": rng.randint(2, 12), "activity_level": rng.randint(1, 10)}),
+        "pet_health": ("POST", "/predict_pet_health", lambda rng, i: {
+            "symptoms": rng.choice(SYMPTOMS), "recentFood": rng.choice(FOODS),
+            "recentActivity": str(rng.randint(0, 180))}),
+        "pet_diet": ("POST", "/recommend_pet_diet", lambda rng, i: {
+            "breed": rng.choice(BREEDS), "weight": round(rng.uniform(2, 45), 1),
+            "activity": rng.randint(1, 5)}),
+        "meal_schedule": ("POST", "/meal-schedule", lambda rng, i: {
+            "preferences": rng.choice(["vegetarian", "low-carb", "high-protein"])}),
+        "meal_plan": ("POST", "/meal-plan", lambda rng, i: {"days": 7, "seed": i}),
+        "recipe_match": ("POST", "/recipe-match", lambda rng, i: {
+            "ingredients": ", ".join(rng.sample(PANTRY, rng.randint(3, 6)))}),
+        "recipe_generator": ("POST", "/recipe-generator", lambda rng, i: {
+            "ingredients": ", ".join(rng.sample(PANTRY, rng.randint(2, 4))), "index": rng.randint(0, 4)}),
+        "nutrition": ("POST", "/nutrition", lambda rng, i: {"meal": _meal(rng)}),
+        "nutrition_batch": ("POST", "/nutrition/batch",
+                            lambda rng, i: {"meals": [_meal(rng) for _ in range(7)]}),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout, expect=200):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=5).status_code == expect:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def start_servers(args):
+    """(service url, stub url, processes) for a stub + service pair on free ports."""
+    stub_port, service_port = free_port(), free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "spoonacular_stub.py"), "replay", "--port", str(stub_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+         "--error-rate", str(args.error_rate), "--seed", str(args.seed)],
+        start_new_session=True)
+    env = {
+        **os.environ,
+        "SPOONACULAR_BASE_URL": f"http://127.0.0.1:{stub_port}",
+        "SPOONACULAR_API_KEY": os.getenv("SPOONACULAR_API_KEY", "stub-key"),
+        # the stub has no quota; keep the client's token bucket out of the measurement
+        "SPOONACULAR_RPS": "100000", "SPOONACULAR_BURST": "100000",
+        "MODEL_WATCH_SECONDS": "0",
+    }
+    if not args.nutrition_store:
+        env["NUTRITION_STORE_PATH"] = "off"  # every /nutrition miss goes upstream
+    service = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", HERE, "--port", str(service_port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        env=env, start_new_session=True, stdout=subprocess.DEVNULL if args.quiet else None)
+    service_url, stub_url = f"http://127.0.0.1:{service_port}", f"http://127.0.0.1:{stub_port}"
+    if not wait_for(stub_url + "/__stub/stats", 30) or not wait_for(service_url + "/", args.startup_timeout):
+        stop_servers([stub, service])
+        raise RuntimeError("stub or service did not start")
+    if not wait_for(service_url + "/ready", args.startup_timeout):
+        print("warning: /ready never returned 200; model scenarios may fail")
+    return service_url, stub_url, [stub, service]
+
+
+def stop_servers(procs):
+    for proc in procs:
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            continue
+    for proc in procs:
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+
+
+async def run_scenario(url, method, path, payloads, concurrency, duration, warmup):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        async def call(payload):
+            start = time.perf_counter()
+            try:
+                resp = await client.request(method, path, json=payload)
+            except httpx.HTTPError:
+                return time.perf_counter() - start, False, False
+            degraded = b'"degraded":true' in resp.content
+            return time.perf_counter() - start, resp.status_code < 400, degraded
+
+        for i in range(warmup):
+            await call(payloads[i % len(payloads)])
+
+        latencies, errors, degraded = [], 0, 0
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + duration
+        next_index = iter(range(10 ** 12))
+
+        async def worker():
+            nonlocal errors, degraded
+            while loop.time() < stop_at:
+                seconds, ok, was_degraded = await call(payloads[next(next_index) % len(payloads)])
+                latencies.append(seconds)
+                errors += not ok
+                degraded += was_degraded
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    n = max(1, len(ms))
+    return {
+        "requests": len(ms),
+        "rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+        "p95_ms": round(float(np.percentile(ms, 95)), 2) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+        "max_ms": round(float(ms.max()), 2) if len(ms) else None,
+        "error_rate": round(errors / n, 4),
+        "degraded_rate": round(degraded / n, 4),
+    }
+
+
+def compare(results, baseline, args):
+    """Rows with baseline numbers and a verdict; a scenario regresses on latency, throughput or errors."""
+    rows = []
+    for key, r in results.items():
+        b = baseline.get(key)
+        row = {"run": key, "rps": r["rps"], "p95_ms": r["p95_ms"], "p99_ms": r["p99_ms"],
+               "error_rate": r["error_rate"]}
+        if b is None:
+            rows.append({**row, "verdict": "no baseline"})
+            continue
+        problems = []
+        for field in ("p95_ms", "p99_ms"):
+            if r[field] is not None and b.get(field) is not None:
+                limit = b[field] * (1 + args.latency_tolerance)
+                # sub-millisecond noise is not a regression
+                if r[field] > limit and r[field] - b[field] > args.min_latency_delta_ms:
+                    problems.append(f"{field} {r[field]} > {limit:.2f}")
+        if r["rps"] < b["rps"] * (1 - args.throughput_tolerance):
+            problems.append(f"rps {r['rps']} < {b['rps'] * (1 - args.throughput_tolerance):.1f}")
+        if r["error_rate"] > b["error_rate"] + args.error_tolerance:
+            problems.append(f"error_rate {r['error_rate']} > {b['error_rate'] + args.error_tolerance:.4f}")
+        rows.append({**row, "base_rps": b["rps"], "base_p95_ms": b.get("p95_ms"),
+                     "base_p99_ms": b.get("p99_ms"),
+                     "verdict": "REGRESSED: " + "; ".join(problems) if problems else "ok"})
+    return rows
+
+
+def main(argv=None):
+    all_scenarios = scenarios()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=list(all_scenarios), default=list(all_scenarios))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario and concurrency")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=200,
+                        help="distinct payloads per scenario (lower -> more cache hits)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="benchmark a running service instead of starting one")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub latency per upstream call")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub error probability per call")
+    parser.add_argument("--nutrition-store", action="store_true",
+                        help="keep the service's nutrition store (default: off, so lookups go upstream)")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--baseline", help="compare against this baseline file; exit 1 on a regression")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25)
+    parser.add_argument("--throughput-tolerance", type=float, default=0.20)
+    parser.add_argument("--error-tolerance", type=float, default=0.01)
+    parser.add_argument("--min-latency-delta-ms", type=float, default=1.0)
+    parser.add_argument("--quiet", action="store_true", help="hide the service's own output")
+    args = parser.parse_args(argv)
+
+    procs, stub_url = [], None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        url, stub_url, procs = start_servers(args)
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            method, path, make = all_scenarios[name]
+            rng = random.Random(f"{args.seed}:{name}")
+            payloads = [make(rng, i) for i in range(max(1, args.distinct))]
+            for concurrency in args.concurrency:
+                key = f"{name}@c{concurrency}"
+                results[key] = run = asyncio.run(run_scenario(
+                    url, method, path, payloads, concurrency, args.duration, args.warmup))
+                print(key, run, flush=True)
+        upstream = httpx.get(stub_url + "/__stub/stats").json()["calls"] if stub_url else None
+    finally:
+        stop_servers(procs)
+
+    frame = pd.DataFrame([{"run": k, **v} for k, v in results.items()])
+    print(frame.to_string(index=False))
+    if upstream:
+        print("stub calls:", json.dumps(upstream))
+
+    meta = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "host": platform.node(),
+            "cpus": os.cpu_count(), "python": platform.python_version(),
+            "settings": {k: getattr(args, k) for k in ("duration", "distinct", "workers", "latency_ms",
+                                                       "jitter_ms", "error_rate", "seed")}}
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print("Saved baseline to", args.save_baseline)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("meta", {}).get("settings") != meta["settings"]:
+            print("warning: baseline was recorded with different settings:", stored.get("meta", {}).get("settings"))
+        rows = compare(results, stored["results"], args)
+        print(pd.DataFrame(rows).to_string(index=False))
+        regressed = [r["run"] for r in rows if r["verdict"].startswith("REGRESSED")]
+        if regressed:
+            print(f"{len(regressed)} regression(s): {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
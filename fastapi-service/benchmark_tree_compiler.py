@@ -0,0 +1,78 @@
+# benchmark_tree_compiler.py
+# Checks that compiled pet forests match sklearn exactly and reports speedups:
+#   python benchmark_tree_compiler.py --batch-sizes 1 100 10000
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from tree_compiler import compile_forest
+
+ARTIFACTS = [
+    ("pet_comfort", "pet_comfort_model.pkl", None),
+    ("pet_health", "pet_health_model.pkl", "model"),
+    ("pet_diet", "pet_diet_model.pkl", "model"),
+]
+
+
+def _per_call(fn, X, rows, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(X[i * rows:(i + 1) * rows] if (i + 1) * rows <= len(X) else X[:rows])
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    n_rows = max(args.batch_sizes)
+
+    rows = []
+    for name, path, key in ARTIFACTS:
+        artifact = joblib.load(path)
+        model = artifact[key] if key else artifact
+
+        start = time.perf_counter()
+        compiled = compile_forest(model)
+        compile_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        # random rows over each feature's split range exercise every branch
+        rng = np.random.default_rng(args.seed)
+        X = np.empty((n_rows, compiled.n_features_in_))
+        for f in range(compiled.n_features_in_):
+            thr = compiled.threshold[compiled.feature == f]
+            lo, hi = (thr.min() - 1.0, thr.max() + 1.0) if thr.size else (0.0, 1.0)
+            X[:, f] = rng.uniform(lo, hi, n_rows)
+
+        identical = bool(np.array_equal(model.predict(X), compiled.predict(X)))
+        if compiled.is_classifier:
+            identical = identical and bool(np.array_equal(model.predict_proba(X),
+                                                          compiled.predict_proba(X)))
+
+        for batch in args.batch_sizes:
+            # fewer repeats for big batches keeps the run short
+            repeats = max(1, min(args.repeats, args.repeats * 100 // batch))
+            sk = _per_call(model.predict, X, batch, repeats)
+            cf = _per_call(compiled.predict, X, batch, repeats)
+            rows.append({
+                "model": name,
+                "trees": compiled.n_trees,
+                "compiled_kb": round(compiled.nbytes / 1024, 1),
+                "compile_ms": compile_ms,
+                "identical": identical,
+                "rows": batch,
+                "sklearn_ms": round(sk * 1000, 3),
+                "compiled_ms": round(cf * 1000, 3),
+                "speedup": round(sk / cf, 2),
+            })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
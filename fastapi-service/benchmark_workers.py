@@ -0,0 +1,155 @@
+# benchmark_workers.py
+# Startup time and per-worker memory of the service at several worker counts:
+#   python benchmark_workers.py --workers 1 4 16
+#   python benchmark_workers.py --modes uvicorn preload-mmap --workers 4
+# Modes:
+#   uvicorn       python -m uvicorn main:app --workers N  (every worker loads its own models)
+#   uvicorn-mmap  the same with MODEL_SHARING=mmap         (arrays shared through the page cache)
+#   preload       python serve.py --workers N              (load once, fork, share copy-on-write)
+#   preload-mmap  serve.py with MODEL_SHARING=mmap
+# Memory comes from /proc/<pid>/smaps_rollup (Linux). PSS splits each shared
+# page between the processes mapping it, so total PSS is what the node pays;
+# USS is memory private to one worker.
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVE = os.path.join(HERE, "serve.py")
+MODES = {
+    "uvicorn": ([sys.executable, "-m", "uvicorn", "main:app", "--app-dir", HERE, "--workers", "{workers}",
+                 "--port", "{port}", "--log-level", "warning"], {}),
+    "uvicorn-mmap": ([sys.executable, "-m", "uvicorn", "main:app", "--app-dir", HERE, "--workers", "{workers}",
+                      "--port", "{port}", "--log-level", "warning"], {"MODEL_SHARING": "mmap"}),
+    "preload": ([sys.executable, SERVE, "--workers", "{workers}",
+                 "--port", "{port}", "--log-level", "warning"], {}),
+    "preload-mmap": ([sys.executable, SERVE, "--workers", "{workers}",
+                      "--port", "{port}", "--log-level", "warning"], {"MODEL_SHARING": "mmap"}),
+}
+
+WARMUP = [
+    ("/predict_urgency", {"text": "Submit report by EOD"}),
+    ("/predict_pet_comfort", {"temperature": 22, "humidity": 50, "feeding_interval": 4,
+                              "activity_level": 5}),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def worker_pids(pid):
+    """Child processes of `pid` that serve requests (not multiprocessing's resource tracker)."""
+    out = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # the ppid follows the parenthesized command name
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) != pid:
+                        continue
+                with open(f"/proc/{entry}/cmdline", "rb") as f:
+                    if b"resource_tracker" not in f.read():
+                        out.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return out
+
+
+def memory_mb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+    return {"rss": fields.get("Rss", 0.0), "pss": fields.get("Pss", 0.0),
+            "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)}
+
+
+def wait_ready(url, workers, timeout):
+    """Seconds until /ready answered 200 on enough consecutive new connections to cover the workers."""
+    start = time.perf_counter()
+    streak = 0
+    while time.perf_counter() - start < timeout:
+        try:
+            ok = httpx.get(url + "/ready", timeout=5).status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        streak = streak + 1 if ok else 0
+        if streak >= 2 * workers:
+            return time.perf_counter() - start
+        if not ok:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def measure(mode, workers, requests, timeout):
+    command, env = MODES[mode]
+    port = free_port()
+    argv = [part.format(workers=workers, port=port) for part in command]
+    proc = subprocess.Popen(argv, env={**os.environ, **env}, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        startup = wait_ready(url, workers, timeout)
+        with httpx.Client(base_url=url, timeout=30) as client:
+            for _ in range(requests):
+                for path, body in WARMUP:
+                    client.post(path, json=body, headers={"Connection": "close"})
+        pids = worker_pids(proc.pid)
+        parent = memory_mb(proc.pid)
+        if pids:
+            worker_mem = [memory_mb(pid) for pid in pids]
+        else:
+            # a single uvicorn worker runs in the launched process itself
+            worker_mem, parent = [parent], {"rss": 0.0, "pss": 0.0, "uss": 0.0}
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+
+    n = max(1, len(worker_mem))
+    return {
+        "mode": mode,
+        "workers": workers,
+        "processes": len(pids) + 1 if pids else 1,
+        "startup_s": round(startup, 2),
+        "worker_rss_mb": round(sum(m["rss"] for m in worker_mem) / n, 1),
+        "worker_uss_mb": round(sum(m["uss"] for m in worker_mem) / n, 1),
+        "worker_pss_mb": round(sum(m["pss"] for m in worker_mem) / n, 1),
+        "parent_pss_mb": round(parent["pss"], 1),
+        "total_pss_mb": round(parent["pss"] + sum(m["pss"] for m in worker_mem), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--requests", type=int, default=20, help="warm-up requests per endpoint")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    rows = []
+    for workers in args.workers:
+        for mode in args.modes:
+            rows.append(measure(mode, workers, args.requests, args.timeout))
+            print(rows[-1], flush=True)
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
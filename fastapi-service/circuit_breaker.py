@@ -0,0 +1,103 @@
+# circuit_breaker.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails fast once an upstream route keeps failing.
+
+    `failure_threshold` consecutive failures (errors, or calls slower than
+    `latency_threshold` seconds) open the circuit. After `reset_timeout`
+    seconds it goes half-open and lets `half_open_probes` calls through: a
+    success closes it again, a failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 latency_threshold: Optional[float] = None, reset_timeout: float = 30.0,
+                 half_open_probes: int = 1):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, int(half_open_probes))
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.trips = 0
+        self.rejected = 0
+        self.successes = 0
+        self.failures = 0
+
+    def _trip(self):
+        if self.state != OPEN:
+            self.trips += 1
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def _before_call(self):
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(f"Upstream '{self.name}' circuit is open")
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(f"Upstream '{self.name}' circuit is half-open")
+            self.probes_in_flight += 1
+
+    def record(self, ok: bool, latency: float):
+        if ok and self.latency_threshold is not None and latency > self.latency_threshold:
+            ok = False
+        if self.state == HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+        if ok:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._trip()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]],
+                   is_failure: Callable[[Any], bool] = lambda result: False) -> Any:
+        """Run `fn` through the breaker; `is_failure` marks bad results (e.g. 5xx responses)."""
+        self._before_call()
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # the caller went away; that says nothing about upstream health
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(not is_failure(result), time.monotonic() - start)
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
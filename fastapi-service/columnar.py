@@ -0,0 +1,72 @@
+# columnar.py
+import io
+import json
+from typing import Dict, Sequence
+
+import numpy as np
+
+JSON = "application/json"
+NPZ = "application/x-npz"
+
+
+class ColumnError(ValueError):
+    """A columnar payload that does not match the expected columns."""
+
+
+def payload_format(content_type: str) -> str:
+    return NPZ if content_type and content_type.split(";")[0].strip() == NPZ else JSON
+
+
+def read_columns(body: bytes, content_type: str, names: Sequence[str],
+                 max_rows: int = 1_000_000) -> Dict[str, np.ndarray]:
+    """
+    Equal-length input columns from a JSON object of arrays
+    ({"breed": [...], "weight": [...]}) or an .npz archive with one array
+    per column (np.savez(f, breed=..., weight=...); loaded without pickle,
+    so only numeric and fixed-width string arrays are accepted).
+    """
+    if payload_format(content_type) == NPZ:
+        try:
+            with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+                raw = {name: archive[name] for name in archive.files}
+        except (ValueError, OSError) as e:
+            raise ColumnError(f"unreadable npz payload: {e}")
+    else:
+        try:
+            raw = json.loads(body)
+        except ValueError as e:
+            raise ColumnError(f"invalid JSON: {e}")
+        if not isinstance(raw, dict):
+            raise ColumnError("expected an object of column arrays")
+
+    missing = [n for n in names if n not in raw]
+    if missing:
+        raise ColumnError(f"missing column(s): {', '.join(missing)}")
+    columns = {}
+    for name in names:
+        column = np.asarray(raw[name])
+        if column.ndim != 1:
+            raise ColumnError(f"column {name} must be one-dimensional")
+        columns[name] = column
+    lengths = {len(c) for c in columns.values()}
+    if len(lengths) > 1:
+        raise ColumnError("columns must all have the same length")
+    if lengths and max(lengths) > max_rows:
+        raise ColumnError(f"at most {max_rows} rows per request")
+    return columns
+
+
+def numeric_column(columns: Dict[str, np.ndarray], name: str, dtype=np.float64) -> np.ndarray:
+    try:
+        return columns[name].astype(dtype)
+    except (TypeError, ValueError):
+        raise ColumnError(f"column {name} must be numeric")
+
+
+def write_columns(columns: Dict[str, np.ndarray], fmt: str) -> bytes:
+    """Result columns in the request's format."""
+    if fmt == NPZ:
+        buffer = io.BytesIO()
+        np.savez(buffer, **{k: np.asarray(v) for k, v in columns.items()})
+        return buffer.getvalue()
+    return json.dumps({k: np.asarray(v).tolist() for k, v in columns.items()}).encode("utf-8")
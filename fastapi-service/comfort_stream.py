@@ -0,0 +1,268 @@
+# comfort_stream.py
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+FIELDS = ("temperature", "humidity", "feeding_interval", "activity_level")
+
+
+class PetWindow:
+    """
+    Sliding window of one pet's readings: the last `size` within `max_age`
+    seconds. Temperature and humidity are averaged over the window to
+    smooth sensor noise; feeding interval and activity are last-known values.
+    """
+
+    __slots__ = ("readings", "sums", "latest", "level", "last_seen", "sink", "count")
+
+    def __init__(self, size: int):
+        self.readings = deque(maxlen=size)  # (time, temperature, humidity)
+        self.sums = [0.0, 0.0]
+        self.latest: Dict[str, float] = {}
+        self.level: Optional[str] = None
+        self.last_seen = 0.0
+        self.sink: Optional["ChangeSink"] = None
+        self.count = 0
+
+    def add(self, now: float, reading: Dict, max_age: float):
+        """
+        Temperature and humidity may arrive in separate readings: a missing
+        one takes its last known value. Until both have been seen, readings
+        only update the last known values and the window stays empty.
+        """
+        for name in FIELDS:
+            if name in reading:
+                self.latest[name] = float(reading[name])
+        if ("temperature" in reading or "humidity" in reading) \
+                and "temperature" in self.latest and "humidity" in self.latest:
+            if len(self.readings) == self.readings.maxlen:
+                _, t, h = self.readings[0]
+                self.sums[0] -= t
+                self.sums[1] -= h
+            t, h = self.latest["temperature"], self.latest["humidity"]
+            self.readings.append((now, t, h))
+            self.sums[0] += t
+            self.sums[1] += h
+        while len(self.readings) > 1 and now - self.readings[0][0] > max_age:
+            _, t, h = self.readings.popleft()
+            self.sums[0] -= t
+            self.sums[1] -= h
+        self.last_seen = now
+        self.count += 1
+
+    def ready(self) -> bool:
+        return bool(self.readings) and "feeding_interval" in self.latest and "activity_level" in self.latest
+
+    def features(self) -> List[float]:
+        n = len(self.readings)
+        return [self.sums[0] / n, self.sums[1] / n,
+                self.latest["feeding_interval"], self.latest["activity_level"]]
+
+
+class ChangeSink:
+    """
+    One connection's outgoing changes. With `coalesce`, only the newest
+    change per pet is kept until the writer takes it, so a slow client
+    costs at most one pending message per pet instead of an unbounded
+    queue; without it every change is kept (for replies to an upload).
+    """
+
+    def __init__(self, coalesce: bool = True):
+        self.coalesce = coalesce
+        self.pending: "OrderedDict" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.pets = set()
+        self._seq = 0
+
+    def put(self, pet_id: str, message: Dict):
+        if self.coalesce:
+            self.pending.pop(pet_id, None)
+            self.pending[pet_id] = message
+        else:
+            self._seq += 1
+            self.pending[self._seq] = message
+        self.ready.set()
+
+    async def take(self, timeout: Optional[float] = None) -> List[Dict]:
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        messages = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+        return messages
+
+
+class ComfortStream:
+    """
+    Continuous comfort scoring for streamed sensor readings.
+
+    `submit()` only updates the pet's window and marks it dirty. A single
+    background task scores every dirty pet in one `predict_fn` call once
+    `max_batch_size` pets are dirty or `max_wait_ms` has passed, and sends
+    a message to the pet's sink only when its comfort level changes.
+    Windows outlive connections (a reconnecting device keeps its state)
+    and are dropped after `idle_seconds` without readings.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], List[str]], window_size: int = 5,
+                 window_seconds: float = 60.0, max_batch_size: int = 1024,
+                 max_wait_ms: float = 50.0, idle_seconds: float = 600.0,
+                 on_batch: Optional[Callable[[int, float], None]] = None):
+        self.predict_fn = predict_fn
+        self.window_size = max(1, int(window_size))
+        self.window_seconds = float(window_seconds)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.idle_seconds = float(idle_seconds)
+        self.on_batch = on_batch
+        self.pets: Dict[str, PetWindow] = {}
+        self._dirty: Dict[str, None] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._next_sweep = 0.0
+        self._busy = False
+        self.connections = 0
+        self.readings = 0
+        self.rejected = 0
+        self.batches_run = 0
+        self.pets_scored = 0
+        self.changes = 0
+        self.errors = 0
+
+    def _ensure_worker(self):
+        # created lazily so the events and task belong to the serving loop
+        if self._worker is None or self._worker.done():
+            self._wake = asyncio.Event()
+            self._full = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, reading: Dict, sink: ChangeSink) -> Optional[str]:
+        """Add one reading; returns an error message when it is rejected."""
+        pet_id = reading.get("pet_id")
+        if pet_id is None:
+            self.rejected += 1
+            return "missing pet_id"
+        try:
+            values = {k: float(reading[k]) for k in FIELDS if k in reading}
+        except (TypeError, ValueError):
+            self.rejected += 1
+            return "readings must be numbers"
+        self._ensure_worker()
+        pet_id = str(pet_id)
+        window = self.pets.get(pet_id)
+        if window is None:
+            window = self.pets[pet_id] = PetWindow(self.window_size)
+        window.add(time.monotonic(), values, self.window_seconds)
+        if window.sink is not sink:
+            if window.sink is not None:
+                window.sink.pets.discard(pet_id)
+            window.sink = sink
+            sink.pets.add(pet_id)
+        self.readings += 1
+        if window.ready():
+            self._dirty[pet_id] = None
+            self._wake.set()
+            if len(self._dirty) >= self.max_batch_size:
+                self._full.set()
+        return None
+
+    def detach(self, sink: ChangeSink):
+        """Stop sending to `sink`; its pets keep their windows until they go idle."""
+        sink.closed = True
+        for pet_id in sink.pets:
+            window = self.pets.get(pet_id)
+            if window is not None and window.sink is sink:
+                window.sink = None
+        sink.pets.clear()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+            if len(self._dirty) < self.max_batch_size and self.max_wait > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            self._full.clear()
+            dirty = list(self._dirty)[:self.max_batch_size]
+            for pet_id in dirty:
+                del self._dirty[pet_id]
+            if self._dirty:
+                self._wake.set()
+            batch = [(pet_id, self.pets[pet_id]) for pet_id in dirty if pet_id in self.pets]
+            if batch:
+                self._busy = True
+                # snapshot here: readings that arrive while predicting mark the pet dirty again
+                X = np.array([window.features() for _, window in batch], dtype=np.float64)
+                start = time.perf_counter()
+                try:
+                    levels = await loop.run_in_executor(None, self.predict_fn, X)
+                except Exception as e:
+                    self.errors += 1
+                    for pet_id, window in batch:
+                        if window.sink is not None:
+                            window.sink.put(pet_id, {"pet_id": pet_id, "error": str(e)})
+                    levels = None
+                if levels is not None:
+                    self._emit(batch, X, levels)
+                    if self.on_batch is not None:
+                        self.on_batch(len(batch), time.perf_counter() - start)
+                self._busy = False
+            self._sweep()
+
+    async def flush(self):
+        """Wait until every reading submitted so far has been scored."""
+        while self._dirty or self._busy:
+            await asyncio.sleep(max(self.max_wait, 0.001))
+
+    def _emit(self, batch, X, levels):
+        self.batches_run += 1
+        self.pets_scored += len(batch)
+        for (pet_id, window), row, level in zip(batch, X.tolist(), levels):
+            level = str(level)
+            if level == window.level:
+                continue
+            message = {"pet_id": pet_id, "comfort_level": level, "previous": window.level,
+                       "readings": window.count, "features": dict(zip(FIELDS, row))}
+            window.level = level
+            self.changes += 1
+            if window.sink is not None and not window.sink.closed:
+                window.sink.put(pet_id, message)
+
+    def _sweep(self):
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(self.idle_seconds, 60.0)
+        idle = [pet_id for pet_id, w in self.pets.items() if now - w.last_seen > self.idle_seconds]
+        for pet_id in idle:
+            window = self.pets.pop(pet_id)
+            if window.sink is not None:
+                window.sink.pets.discard(pet_id)
+
+    def stats(self) -> Dict:
+        avg = self.pets_scored / self.batches_run if self.batches_run else 0.0
+        return {
+            "connections": self.connections,
+            "pets": len(self.pets),
+            "readings": self.readings,
+            "rejected": self.rejected,
+            "batches": self.batches_run,
+            "avg_batch_size": round(avg, 2),
+            "changes": self.changes,
+            "errors": self.errors,
+            "window_size": self.window_size,
+            "window_seconds": self.window_seconds,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
@@ -0,0 +1,85 @@
+# compare_embedder_backends.py
+# Parity and latency report for the urgency embedder backends:
+#   python compare_embedder_backends.py --backends torch int8 onnx --min-agreement 0.98
+import argparse
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from embedder_backends import BACKENDS, build_embedder
+
+
+def _time_encode(embedder, texts, batch_size, repeats):
+    # single-row latency over the first few texts, then full-dataset batches
+    singles = []
+    for text in texts[:repeats]:
+        start = time.perf_counter()
+        embedder.encode([text])
+        singles.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    embeddings = np.vstack([embedder.encode(texts[i:i + batch_size])
+                            for i in range(0, len(texts), batch_size)])
+    batch_seconds = time.perf_counter() - start
+    return embeddings, singles, batch_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model.pkl")
+    parser.add_argument("--data", default="notes_dataset.csv")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--onnx-path", default="model_embedder.onnx")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--single-repeats", type=int, default=50)
+    parser.add_argument("--min-agreement", type=float, default=None,
+                        help="exit non-zero if any backend agrees with torch on fewer predictions")
+    args = parser.parse_args()
+
+    package = joblib.load(args.model)
+    clf, model = package["classifier"], package["embedder"]
+    df = pd.read_csv(args.data)
+    texts = df["text"].astype(str).str.lower().tolist()
+
+    # the fp32 torch pipeline is always the reference
+    ref_emb, ref_singles, ref_batch = _time_encode(model, texts, args.batch_size, args.single_repeats)
+    ref_pred = clf.predict(ref_emb)
+
+    rows = []
+    failed = False
+    for backend in args.backends:
+        if backend == "torch":
+            emb, singles, batch_seconds = ref_emb, ref_singles, ref_batch
+        else:
+            embedder = build_embedder(model, backend, onnx_path=args.onnx_path)
+            emb, singles, batch_seconds = _time_encode(embedder, texts, args.batch_size,
+                                                       args.single_repeats)
+        pred = clf.predict(emb)
+        cos = np.sum(emb * ref_emb, axis=1) / (
+            np.linalg.norm(emb, axis=1) * np.linalg.norm(ref_emb, axis=1) + 1e-12)
+        agreement = float(np.mean(pred == ref_pred))
+        rows.append({
+            "backend": backend,
+            "agreement_vs_torch": round(agreement, 4),
+            "accuracy_vs_labels": round(float(np.mean(pred == df["urgency"].values)), 4),
+            "min_cosine": round(float(cos.min()), 5),
+            "mean_cosine": round(float(cos.mean()), 5),
+            "single_p50_ms": round(float(np.percentile(singles, 50)) * 1000, 2),
+            "single_p99_ms": round(float(np.percentile(singles, 99)) * 1000, 2),
+            "batch_rows_per_s": round(len(texts) / batch_seconds, 1),
+            "speedup_vs_torch": round(ref_batch / batch_seconds, 2),
+        })
+        if args.min_agreement is not None and agreement < args.min_agreement:
+            failed = True
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    if failed:
+        print(f"Parity check failed: agreement below {args.min_agreement}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
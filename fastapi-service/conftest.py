@@ -0,0 +1,12 @@
+# conftest.py
+# Lets tests/ import the service modules (they live flat in this directory)
+# and keeps main.py from touching real models, stores or the network.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("MODEL_LOADING", "lazy")
+os.environ.setdefault("MODEL_WATCH_SECONDS", "0")
+os.environ.setdefault("NUTRITION_STORE_PATH", "off")
+os.environ.setdefault("LOG_LEVEL", "error")
@@ -0,0 +1,126 @@
+# embedder_backends.py
+import hashlib
+import os
+from typing import List
+
+import numpy as np
+
+from event_log import NULL_LOG
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def _quantize_int8(model):
+    """Dynamic int8 quantization of every nn.Linear in the SentenceTransformer."""
+    import torch
+
+    model = model.to("cpu").eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxEmbedder:
+    """
+    Runs the SentenceTransformer's transformer module as an exported ONNX
+    graph with onnxruntime, then applies the same mean pooling and
+    normalization as the original pipeline. Exposes the `encode` API used
+    by the urgency endpoints.
+
+    The graph is cached next to `onnx_path` under a name that includes a
+    hash of the transformer's weights (model_embedder-<hash>.onnx), so a
+    reloaded model with new weights gets a fresh export instead of the
+    previous model's graph.
+    """
+
+    def __init__(self, model, onnx_path: str, intra_op_threads: int = 0, log=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The 'onnx' embedder backend needs onnxruntime: "
+                              "pip install onnxruntime") from e
+
+        transformer = model[0]
+        self.tokenizer = transformer.tokenizer
+        self.max_seq_length = transformer.max_seq_length
+        self.normalize = any(type(m).__name__ == "Normalize" for m in model)
+        onnx_path = versioned_onnx_path(onnx_path, weights_fingerprint(model))
+        if not os.path.exists(onnx_path):
+            # exported under a temporary name so no other process loads a partial file
+            tmp_path = f"{onnx_path}.{os.getpid()}.tmp"
+            export_onnx(model, tmp_path, log=log)
+            os.replace(tmp_path, onnx_path)
+        self.onnx_path = onnx_path
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            opts.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(onnx_path, opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        out = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(list(texts[start:start + batch_size]), padding=True,
+                                 truncation=True, max_length=self.max_seq_length,
+                                 return_tensors="np")
+            feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out.append(pooled.astype(np.float32))
+        return np.vstack(out)
+
+
+def weights_fingerprint(model) -> str:
+    """Short hash of the SentenceTransformer's transformer weights."""
+    digest = hashlib.sha1()
+    for name, tensor in model[0].auto_model.state_dict().items():
+        digest.update(name.encode("utf-8"))
+        digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+def versioned_onnx_path(onnx_path: str, fingerprint: str) -> str:
+    """model_embedder.onnx -> model_embedder-<fingerprint>.onnx"""
+    root, ext = os.path.splitext(onnx_path)
+    return f"{root}-{fingerprint}{ext or '.onnx'}"
+
+
+def export_onnx(model, onnx_path: str, log=None):
+    """Export the transformer of a SentenceTransformer to ONNX with dynamic batch/sequence axes."""
+    import torch
+
+    transformer = model[0]
+    auto_model = transformer.auto_model.to("cpu").eval()
+    sample = transformer.tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Wrapper(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *args):
+            return self.inner(**dict(zip(names, args)))[0]
+
+    with torch.no_grad():
+        torch.onnx.export(_Wrapper(auto_model), tuple(sample[n] for n in names), onnx_path,
+                          input_names=names, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic_axes, opset_version=14)
+    (log or NULL_LOG).event("embedder_exported", sample_rate=1.0, path=onnx_path)
+
+
+def build_embedder(model, backend: str = "torch", onnx_path: str = "model_embedder.onnx", log=None):
+    """Return an object with `encode(texts)` for the requested inference backend."""
+    backend = (backend or "torch").lower()
+    if backend == "torch":
+        return model
+    if backend == "int8":
+        return _quantize_int8(model)
+    if backend == "onnx":
+        return OnnxEmbedder(model, onnx_path, log=log)
+    raise ValueError(f"Unknown embedder backend '{backend}', expected one of {BACKENDS}")
@@ -0,0 +1,274 @@
+# embedding_cache.py
+import csv
+import fcntl
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for a note: lowercased with whitespace collapsed."""
+    return " ".join(str(text).lower().split())
+
+
+class LRUEmbeddingCache:
+    """
+    In-memory text -> embedding cache bounded by entry count and bytes.
+    The least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, key: str, vec: np.ndarray):
+        vec = np.asarray(vec, dtype=np.float32)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._data[key] = vec
+            self._bytes += vec.nbytes
+            while self._data and (len(self._data) > self.max_entries or
+                                  (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def after_fork(self):
+        """Call in a forked child; the entries are kept as this process's own copy."""
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class PersistentEmbeddingStore:
+    """
+    Append-only on-disk embedding store that survives restarts.
+
+    Layout for a store at `path`:
+      path.f32        memory-mapped float32 matrix, one row per key
+      path.keys       one normalized key per line, line N -> row N
+      path.meta.json  {"dim": ...}
+      path.lock       flock()ed while appending
+
+    Several processes (uvicorn or serve.py workers) may share one store.
+    Appends hold an exclusive lock on path.lock, pick up keys other
+    processes added since, and write vectors before their keys, so a key
+    that is visible always has its vector on disk. A lookup that misses
+    re-reads the key log when it has grown.
+    """
+
+    def __init__(self, path: str, dim: Optional[int] = None, initial_capacity: int = 1024):
+        self.path = path
+        self.dim = dim
+        self._index: Dict[str, int] = {}
+        self._rows = 0  # lines read from path.keys
+        self._keys_offset = 0
+        self._matrix = None
+        self._capacity = 0
+        self._initial_capacity = max(1, int(initial_capacity))
+        self._lock = threading.Lock()
+        with self._lock:
+            self._refresh()
+
+    def _load_meta(self) -> bool:
+        meta_path = self.path + ".meta.json"
+        if self._matrix is None and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.dim = json.load(f)["dim"]
+            self._open(self._initial_capacity)
+        return self._matrix is not None
+
+    def _refresh(self):
+        """Read keys appended (by any process) since the last refresh."""
+        if not self._load_meta():
+            return
+        keys_path = self.path + ".keys"
+        if not os.path.exists(keys_path) or os.path.getsize(keys_path) == self._keys_offset:
+            return
+        with open(keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1  # a line still being written is read next time
+        for line in data[:complete].decode("utf-8").split("\n")[:-1]:
+            self._index.setdefault(line, self._rows)
+            self._rows += 1
+        self._keys_offset += complete
+        if self._rows > self._capacity:
+            self._reopen(self._rows)
+
+    def _open(self, capacity: int):
+        data_path = self.path + ".f32"
+        needed = capacity * self.dim * 4
+        mode = "r+b" if os.path.exists(data_path) else "w+b"
+        with open(data_path, mode) as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < needed:
+                f.truncate(needed)
+                size = needed
+        self._capacity = size // (self.dim * 4)
+        self._matrix = np.memmap(data_path, dtype=np.float32, mode="r+",
+                                 shape=(self._capacity, self.dim))
+
+    def _reopen(self, capacity: int):
+        self._matrix.flush()
+        self._matrix = None
+        self._open(capacity)
+
+    def _init_dim(self, dim: int):
+        self.dim = int(dim)
+        with open(self.path + ".meta.json", "w") as f:
+            json.dump({"dim": self.dim}, f)
+        self._open(self._initial_capacity)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                self._refresh()
+                row = self._index.get(key)
+                if row is None:
+                    return None
+            return np.array(self._matrix[row])
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file closes
+            self._refresh()
+            if self._matrix is None:
+                self._init_dim(vectors.shape[1])
+            new = {}
+            for key, vec in zip(keys, vectors):
+                if key not in self._index and key not in new:
+                    new[key] = vec
+            if not new:
+                return
+            needed = self._rows + len(new)
+            if needed > self._capacity:
+                # Grow geometrically so appends stay amortized O(1)
+                self._reopen(max(needed, self._capacity * 2))
+            self._matrix[self._rows:needed] = np.vstack(list(new.values()))
+            self._matrix.flush()
+            block = "".join(key + "\n" for key in new).encode("utf-8")
+            with open(self.path + ".keys", "ab") as f:
+                f.write(block)
+            for key in new:
+                self._index[key] = self._rows
+                self._rows += 1
+            self._keys_offset += len(block)
+
+    def after_fork(self):
+        """Call in a forked child; the mapping is shared and stays valid, the lock is not."""
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._index)
+
+
+class CachedEmbedder:
+    """
+    Wraps a SentenceTransformer-like embedder. Only texts that miss both the
+    LRU cache and the optional persistent store are sent to `encode`.
+    """
+
+    def __init__(self, embedder, cache: LRUEmbeddingCache,
+                 store: Optional[PersistentEmbeddingStore] = None):
+        self.embedder = embedder
+        self.cache = cache
+        self.store = store
+        self.store_hits = 0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        keys = [normalize_text(t) for t in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+
+        for i, key in enumerate(keys):
+            vec = self.cache.get(key)
+            if vec is None and self.store is not None:
+                vec = self.store.get(key)
+                if vec is not None:
+                    self.store_hits += 1
+                    self.cache.put(key, vec)
+            if vec is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                vectors[i] = vec
+
+        if missing:
+            miss_keys = list(missing)
+            encoded = np.asarray(self.embedder.encode(miss_keys), dtype=np.float32)
+            for key, vec in zip(miss_keys, encoded):
+                self.cache.put(key, vec)
+                for i in missing[key]:
+                    vectors[i] = vec
+            if self.store is not None:
+                self.store.put_many(miss_keys, encoded)
+
+        return np.vstack(vectors)
+
+    def prewarm_from_csv(self, csv_path: str, text_column: str = "text",
+                         batch_size: int = 64) -> int:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            texts = [row[text_column] for row in csv.DictReader(f) if row.get(text_column)]
+        for start in range(0, len(texts), batch_size):
+            self.encode(texts[start:start + batch_size])
+        return len(texts)
+
+    def stats(self) -> Dict:
+        out = self.cache.stats()
+        out["store_entries"] = len(self.store) if self.store is not None else None
+        out["store_hits"] = self.store_hits
+        return out
+
+
+if __name__ == "__main__":
+    # Build (or extend) the persistent store from the notes dataset:
+    #   python embedding_cache.py notes_dataset.csv embedding_store/notes
+    import sys
+    import joblib
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "notes_dataset.csv"
+    store_path = sys.argv[2] if len(sys.argv) > 2 else "embedding_store/notes"
+    package = joblib.load("model.pkl")
+    cached = CachedEmbedder(package["embedder"], LRUEmbeddingCache(),
+                            PersistentEmbeddingStore(store_path))
+    n = cached.prewarm_from_csv(csv_path)
+    print(f"Prewarmed {n} rows -> {len(cached.store)} stored embeddings at {store_path}")
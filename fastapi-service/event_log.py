@@ -0,0 +1,129 @@
+# event_log.py
+import atexit
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional, TextIO
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+
+class EventLog:
+    """
+    Structured, sampled, non-blocking event log (one JSON object per line).
+
+    `event()` only samples and enqueues; formatting and writing happen on a
+    background thread, so a slow or blocked stdout never stalls a request.
+    Events below `always_level` are kept with probability `sample_rate`
+    (each written line carries the rate, so counts can be scaled back up);
+    warnings and errors are always kept. When the queue is full, events are
+    dropped and counted instead of waiting.
+    """
+
+    def __init__(self, stream: TextIO = sys.stdout, level: str = "info",
+                 sample_rate: float = 1.0, always_level: str = "warning",
+                 max_queue: int = 10000):
+        self.stream = stream
+        self.level = LEVELS[level]
+        self.sample_rate = sample_rate
+        self.always_level = LEVELS[always_level]
+        self.max_queue = max_queue
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+        self._start()
+        atexit.register(self.flush)
+
+    def _start(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def after_fork(self):
+        """Call in a forked child: the writer thread does not survive fork."""
+        self._start()
+
+    def event(self, name: str, level: str = "info", sample_rate: Optional[float] = None, **fields):
+        severity = LEVELS[level]
+        if severity < self.level:
+            return
+        rate = 1.0
+        if severity < self.always_level:
+            rate = self.sample_rate if sample_rate is None else sample_rate
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return
+        try:
+            self._queue.put_nowait((time.time(), level, name, rate, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, name: str, **fields):
+        self.event(name, "debug", **fields)
+
+    def info(self, name: str, **fields):
+        self.event(name, "info", **fields)
+
+    def warning(self, name: str, **fields):
+        self.event(name, "warning", **fields)
+
+    def error(self, name: str, **fields):
+        self.event(name, "error", **fields)
+
+    def _format(self, ts: float, level: str, name: str, rate: float, fields: Dict) -> str:
+        entry = {"ts": round(ts, 3), "level": level, "event": name}
+        if rate < 1.0:
+            entry["sample_rate"] = rate
+        entry.update(fields)
+        return json.dumps(entry, default=str)
+
+    def _run(self):
+        q = self._queue
+        while True:
+            item = q.get()
+            try:
+                self.stream.write(self._format(*item) + "\n")
+                self.written += 1
+                if q.empty():
+                    self.stream.flush()
+            except Exception:
+                self.dropped += 1
+            finally:
+                q.task_done()
+
+    def flush(self, timeout: float = 2.0):
+        """Wait (briefly) for queued events to be written."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> Dict:
+        return {"written": self.written, "sampled_out": self.sampled_out,
+                "dropped": self.dropped, "queued": self._queue.qsize(),
+                "sample_rate": self.sample_rate}
+
+
+class NullLog:
+    """Discards events; the default for components used without an EventLog."""
+
+    def event(self, name: str, level: str = "info", sample_rate: Optional[float] = None, **fields):
+        pass
+
+    def debug(self, name: str, **fields):
+        pass
+
+    def info(self, name: str, **fields):
+        pass
+
+    def warning(self, name: str, **fields):
+        pass
+
+    def error(self, name: str, **fields):
+        pass
+
+
+NULL_LOG = NullLog()
+
@@ -0,0 +1,200 @@
+# ingredient_parser.py
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# canonical unit -> (kind, grams or millilitres per unit)
+UNITS: Dict[str, Tuple[str, float]] = {
+    "mg": ("mass", 0.001),
+    "g": ("mass", 1.0),
+    "kg": ("mass", 1000.0),
+    "oz": ("mass", 28.3495),
+    "lb": ("mass", 453.592),
+    "ml": ("volume", 1.0),
+    "l": ("volume", 1000.0),
+    "tsp": ("volume", 5.0),
+    "tbsp": ("volume", 15.0),
+    "fl oz": ("volume", 29.5735),
+    "cup": ("volume", 240.0),
+    "pint": ("volume", 473.176),
+    "quart": ("volume", 946.353),
+    "pinch": ("volume", 0.3),
+    "dash": ("volume", 0.6),
+    # counted units with a typical weight, whatever the ingredient
+    "clove": ("count", 3.0),
+    "can": ("count", 400.0),
+    "slice": ("count", 30.0),
+    "stick": ("count", 113.0),
+    "handful": ("count", 30.0),
+}
+
+UNIT_ALIASES: Dict[str, str] = {
+    "mg": "mg", "milligram": "mg", "milligrams": "mg",
+    "g": "g", "gr": "g", "gm": "g", "gms": "g", "gram": "g", "grams": "g",
+    "kg": "kg", "kgs": "kg", "kilo": "kg", "kilos": "kg", "kilogram": "kg", "kilograms": "kg",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "l", "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "tsp": "tsp", "tsps": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "tbsp": "tbsp", "tbsps": "tbsp", "tbs": "tbsp", "tbl": "tbsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "fl oz": "fl oz", "fluid ounce": "fl oz", "fluid ounces": "fl oz",
+    "cup": "cup", "cups": "cup", "c": "cup",
+    "pint": "pint", "pints": "pint", "pt": "pint",
+    "quart": "quart", "quarts": "quart", "qt": "quart",
+    "pinch": "pinch", "pinches": "pinch", "dash": "dash", "dashes": "dash",
+    "clove": "clove", "cloves": "clove", "can": "can", "cans": "can", "tin": "can", "tins": "can",
+    "slice": "slice", "slices": "slice", "stick": "stick", "sticks": "stick",
+    "handful": "handful", "handfuls": "handful",
+}
+
+# preparation and size words that do not change what the ingredient is;
+# dropped so "diced onion" and "onion" share one nutrition lookup
+DESCRIPTORS = (
+    "chopped", "diced", "minced", "sliced", "grated", "shredded", "crushed", "cubed", "halved",
+    "peeled", "seeded", "trimmed", "rinsed", "drained", "softened", "melted", "beaten", "packed",
+    "fresh", "freshly", "finely", "roughly", "coarsely", "thinly", "large", "medium", "small",
+    "ripe", "to taste", "optional",
+)
+
+# grams per millilitre, matched on the longest keyword found in the name;
+# anything unknown converts at 1 g/ml as the old parser did
+DENSITIES: Dict[str, float] = {
+    "water": 1.0, "milk": 1.03, "coconut milk": 0.97, "cream": 1.0, "yogurt": 1.03,
+    "greek yogurt": 1.1, "oil": 0.91, "olive oil": 0.91, "butter": 0.96, "ghee": 0.91,
+    "honey": 1.42, "maple syrup": 1.32, "soy sauce": 1.2, "sugar": 0.85,
+    "brown sugar": 0.93, "salt": 1.2, "flour": 0.53, "rice": 0.85, "cooked rice": 0.66,
+    "oats": 0.41, "quinoa": 0.72, "lentils": 0.8, "chickpeas": 0.68, "black beans": 0.72,
+    "peas": 0.6, "spinach": 0.13, "lettuce": 0.2, "kale": 0.28, "broccoli": 0.37,
+    "cauliflower": 0.45, "carrot": 0.54, "tomato": 0.76, "onion": 0.67, "mushroom": 0.3,
+    "blueberries": 0.62, "berries": 0.6, "almonds": 0.6, "peanut butter": 1.08,
+    "cheese": 0.47, "parmesan": 0.42, "mozzarella": 0.47, "ricotta": 1.03,
+    "cottage cheese": 0.95, "tahini": 1.0, "pesto": 1.0, "tomato sauce": 1.03,
+    "protein powder": 0.42, "cocoa": 0.36, "spices": 0.5, "herbs": 0.2,
+}
+
+# grams per piece for bare counts such as "2 eggs"
+PIECE_WEIGHTS: Dict[str, float] = {
+    "egg": 50.0, "banana": 118.0, "apple": 182.0, "orange": 131.0, "avocado": 150.0,
+    "tomato": 123.0, "onion": 110.0, "carrot": 61.0, "potato": 173.0,
+    "sweet potato": 130.0, "garlic clove": 3.0, "clove": 3.0, "zucchini": 196.0,
+    "bell pepper": 119.0, "capsicum": 119.0, "cucumber": 301.0, "lemon": 84.0,
+    "slice of bread": 30.0, "bread": 30.0, "tortilla": 45.0, "burger bun": 52.0,
+}
+
+UNICODE_FRACTIONS = {
+    "½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅕": 0.2, "⅖": 0.4,
+    "⅗": 0.6, "⅘": 0.8, "⅙": 1 / 6, "⅚": 5 / 6, "⅛": 0.125, "⅜": 0.375, "⅝": 0.625, "⅞": 0.875,
+}
+
+
+def _alternation(words: Iterable[str]) -> str:
+    # longest first so "cups" wins over "c" and "fl oz" over "oz"
+    return "|".join(re.escape(w).replace(r"\ ", r"\s+") for w in sorted(words, key=len, reverse=True))
+
+
+_FRAC = "[" + "".join(UNICODE_FRACTIONS) + "]"
+_NUMBER = rf"(?:\d+\s+\d+/\d+|\d+/\d+|\d+\s*{_FRAC}|{_FRAC}|\d+(?:\.\d+)?)"
+_LINE_RE = re.compile(
+    rf"^(?P<qty>{_NUMBER})(?:\s*(?:-|–|to)\s*(?P<qty_hi>{_NUMBER}))?"
+    rf"\s*(?:(?P<unit>{_alternation(UNIT_ALIASES)})(?![a-z])\.?)?"
+    rf"\s*(?:of\s+)?(?P<name>.*)$"
+)
+_PARENS_RE = re.compile(r"\([^)]*\)")
+_SPACE_RE = re.compile(r"\s+")
+_SPLIT_RE = re.compile(r"[,\n]+")
+# "peeled and diced" goes as a whole, so no stray "and" is left in the name
+_DESCRIPTOR_RE = re.compile(rf"\b(?:{_alternation(DESCRIPTORS)})(?:\s+(?:and|or)\s+(?:{_alternation(DESCRIPTORS)}))*\b")
+# keyword plus an optional plural ending: "tomatoes", "eggs", "cloves"
+_DENSITY_RE = re.compile(rf"\b({_alternation(DENSITIES)})(?:e?s)?\b")
+_PIECE_RE = re.compile(rf"\b({_alternation(PIECE_WEIGHTS)})(?:e?s)?\b")
+
+
+class ParsedIngredient(NamedTuple):
+    quantity: Optional[float]
+    unit: Optional[str]
+    grams: Optional[float]
+    name: str
+
+
+def _number(text: str) -> float:
+    text = text.strip()
+    if text in UNICODE_FRACTIONS:
+        return UNICODE_FRACTIONS[text]
+    if text[-1] in UNICODE_FRACTIONS:
+        return float(text[:-1].strip() or 0) + UNICODE_FRACTIONS[text[-1]]
+    if "/" in text:
+        whole, _, frac = text.rpartition(" ")
+        a, b = frac.split("/")
+        return float(whole or 0) + float(a) / float(b)
+    return float(text)
+
+
+def clean_name(name: str) -> str:
+    """The ingredient itself: "onion, diced" / "finely chopped onion" -> "onion"."""
+    name = _DESCRIPTOR_RE.sub(" ", name.split(",")[0])
+    return _SPACE_RE.sub(" ", name).strip(" .-")
+
+
+def density(name: str) -> float:
+    m = _DENSITY_RE.findall(name)
+    return DENSITIES[_SPACE_RE.sub(" ", max(m, key=len))] if m else 1.0
+
+
+@lru_cache(maxsize=8192)
+def parse_line(text: str) -> ParsedIngredient:
+    """
+    "1 1/2 cups milk" -> ParsedIngredient(1.5, "cup", 370.8, "milk")
+    "½ tsp salt"      -> ParsedIngredient(0.5, "tsp", 3.0, "salt")
+    "8 oz tofu"       -> ParsedIngredient(8.0, "oz", 226.8, "tofu")
+    "1 can chickpeas" -> ParsedIngredient(1.0, "can", 400.0, "chickpeas")
+    "2 diced onions"  -> ParsedIngredient(2.0, "piece", 220.0, "onions")
+    "spinach"         -> ParsedIngredient(None, None, None, "spinach")
+    """
+    s = _SPACE_RE.sub(" ", _PARENS_RE.sub(" ", str(text).lower())).strip()
+    m = _LINE_RE.match(s)
+    if not m:
+        return ParsedIngredient(None, None, None, clean_name(s) or s)
+
+    try:
+        qty = _number(m.group("qty"))
+        if m.group("qty_hi"):
+            qty = (qty + _number(m.group("qty_hi"))) / 2
+    except (ValueError, ZeroDivisionError):
+        return ParsedIngredient(None, None, None, s)
+    name = clean_name(m.group("name")) or s
+
+    unit = m.group("unit")
+    if unit:
+        unit = UNIT_ALIASES[_SPACE_RE.sub(" ", unit)]
+        kind, factor = UNITS[unit]
+        grams = qty * factor
+        if kind == "volume":
+            grams *= density(name)
+        return ParsedIngredient(qty, unit, grams, name)
+
+    piece = _PIECE_RE.search(name)
+    if piece:
+        return ParsedIngredient(qty, "piece", qty * PIECE_WEIGHTS[_SPACE_RE.sub(" ", piece.group(1))], name)
+    # a bare number is taken as grams (best effort)
+    return ParsedIngredient(qty, None, qty, name)
+
+
+def parse_many(lines: Iterable[str]) -> List[ParsedIngredient]:
+    """Parse a batch of lines; repeated lines (here or in earlier batches) hit the cache."""
+    return [parse_line(line) for line in lines]
+
+
+def split_lines(meal_text: str) -> List[str]:
+    """
+    A meal description split on commas and newlines, blanks dropped, as
+    are pieces that only describe the previous one ("3 cloves garlic, minced").
+    """
+    return [c.strip() for c in _SPLIT_RE.split(meal_text) if clean_name(c.lower())]
+
+
+def parse_quantity_and_name(text: str) -> Tuple[Optional[float], str]:
+    """(grams or None, ingredient name), the shape /nutrition has always used."""
+    parsed = parse_line(text)
+    return parsed.grams, parsed.name
@@ -1,20 +1,146 @@
 import os
+import asyncio
+import hashlib
+import hmac
+import json
 import numpy as np
-import re
-import time
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Literal
+from typing import Dict, List, Literal, Optional
 import joblib
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
-import requests
-from meal_scheduler import generate_daily_schedule
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from contextlib import asynccontextmanager
+from meal_scheduler import generate_daily_schedule, generate_plan, use_meal_db
+from meal_catalog import load_catalog
+from pantry_matcher import PantryIndex
+from urgency_batcher import MicroBatcher
+from comfort_stream import ChangeSink, ComfortStream
+from note_index import NoteIndex
+from columnar import ColumnError, numeric_column, payload_format, read_columns, write_columns
+from embedding_cache import CachedEmbedder, LRUEmbeddingCache, PersistentEmbeddingStore
+from model_registry import ArtifactVersions, ModelNotReady, ModelRegistry
+from embedder_backends import build_embedder
+from tree_compiler import compile_or_keep
+from shared_artifacts import load_shared, shareable_forest
+from pet_lookup_tables import build_comfort_table, build_diet_table, build_health_table
+from spoonacular_client import BREAKER_FAILURE_STATUSES, SpoonacularClient, UpstreamError
+from rate_limiter import TokenBucket
+from nutrition_store import NutritionStore, canonical_name
+from nutrient_vectors import N_NUTRIENTS, items_vector, meal_totals, nutrient_vector, to_dict, zeros
+from response_cache import SingleFlight, TTLCache, get_or_fetch
+from circuit_breaker import CircuitOpenError
+from ingredient_parser import parse_many, split_lines
+from metrics import MetricsMiddleware, MetricsRegistry, render_stats
+from event_log import EventLog
 from dotenv import load_dotenv
 load_dotenv()
 SPOONACULAR_API_KEY = os.getenv("SPOONACULAR_API_KEY")
 # print(SPOONACULAR_API_KEY)
 
-app = FastAPI()
+# Structured JSON-lines events written off the request path; routine events
+# are sampled (LOG_SAMPLE_RATE), warnings and errors are always written
+log = EventLog(level=os.getenv("LOG_LEVEL", "info").lower(),
+               sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.01")))
+
+# Prometheus metrics served at /metrics
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_in_flight = metrics.gauge("http_requests_in_flight", "HTTP requests being served")
+inference_latency = metrics.histogram(
+    "model_inference_seconds", "Model compute time per call, excluding queueing", ("model", "phase"))
+upstream_latency = metrics.histogram(
+    "upstream_request_seconds", "Spoonacular call time per attempt", ("route", "outcome"))
+pet_table_lookups = metrics.counter(
+    "pet_table_lookups_total", "Pet lookup-table answers vs. model fallbacks", ("model", "result"))
+
+
+def _observe_upstream(route, seconds, outcome):
+    upstream_latency.observe(seconds, route=route, outcome=outcome)
+
+
+# One pooled keep-alive client for every Spoonacular call
+spoonacular = SpoonacularClient(
+    SPOONACULAR_API_KEY,
+    base_url=os.getenv("SPOONACULAR_BASE_URL", "https://api.spoonacular.com"),
+    timeout=float(os.getenv("SPOONACULAR_TIMEOUT", "10")),
+    max_connections=int(os.getenv("SPOONACULAR_MAX_CONNECTIONS", "20")),
+    retries=int(os.getenv("SPOONACULAR_RETRIES", "2")),
+    # requests per second allowed by the Spoonacular plan
+    rate_limiter=TokenBucket(float(os.getenv("SPOONACULAR_RPS", "5")),
+                             burst=float(os.getenv("SPOONACULAR_BURST", "5"))),
+    # per-route breakers: trip after N consecutive failures or slow calls
+    breaker_options={
+        "failure_threshold": int(os.getenv("SPOONACULAR_BREAKER_FAILURES", "5")),
+        "latency_threshold": float(os.getenv("SPOONACULAR_BREAKER_SLOW_SECONDS", "8")),
+        "reset_timeout": float(os.getenv("SPOONACULAR_BREAKER_RESET_SECONDS", "30")),
+    },
+    observe=_observe_upstream,
+)
+# per-ingredient Spoonacular lookups one /nutrition(/batch) request runs at once
+NUTRITION_FANOUT_CONCURRENCY = int(os.getenv("NUTRITION_FANOUT_CONCURRENCY", "8"))
+# Recipe searches keyed on the normalized pantry + diet + type
+recipe_cache = TTLCache(max_entries=int(os.getenv("RECIPE_CACHE_SIZE", "1024")),
+                        ttl=float(os.getenv("RECIPE_CACHE_TTL", "3600")))
+recipe_flight = SingleFlight()
+# stale entries are served (and refreshed) for this long past their TTL
+RECIPE_CACHE_MAX_STALE = float(os.getenv("RECIPE_CACHE_MAX_STALE", "86400"))
+# Meal catalog behind /meal-schedule, /meal-plan and local recipe matching:
+# a memory-mapped file built with meal_catalog.py (shared by all workers),
+# or the built-in VEG_MEALS_DB when MEAL_CATALOG_PATH is unset or missing
+meal_catalog = load_catalog(os.getenv("MEAL_CATALOG_PATH"), log=log)
+if meal_catalog.path:
+    use_meal_db(meal_catalog.by_category())
+# Local "what can I cook" matching over the catalog for /recipe-generator:
+#   off      - Spoonacular only
+#   fallback - local matches only when Spoonacular is unavailable
+#   first    - a local meal missing at most RECIPE_LOCAL_MAX_MISSING
+#              ingredients is served without going upstream
+#   only     - never call Spoonacular
+RECIPE_LOCAL_MATCH = os.getenv("RECIPE_LOCAL_MATCH", "fallback")
+RECIPE_LOCAL_MAX_MISSING = int(os.getenv("RECIPE_LOCAL_MAX_MISSING", "0"))
+RECIPE_LOCAL_TOP_K = int(os.getenv("RECIPE_LOCAL_TOP_K", "10"))
+pantry_index = PantryIndex(meal_catalog)
+# whole-meal /nutrition results, same stale-while-revalidate policy
+nutrition_cache = TTLCache(max_entries=int(os.getenv("NUTRITION_CACHE_SIZE", "2048")),
+                           ttl=float(os.getenv("NUTRITION_CACHE_TTL", "86400")))
+nutrition_flight = SingleFlight()
+NUTRITION_CACHE_MAX_STALE = float(os.getenv("NUTRITION_CACHE_MAX_STALE", "604800"))
+# per-ingredient upstream lookups shared across meals and requests
+ingredient_flight = SingleFlight()
+NUTRITION_BATCH_MAX_MEALS = int(os.getenv("NUTRITION_BATCH_MAX_MEALS", "500"))
+MEAL_PLAN_MAX_DAYS = int(os.getenv("MEAL_PLAN_MAX_DAYS", "92"))
+_background_tasks = set()
+
+
+def _spawn(coro):
+    # keep a reference so fire-and-forget tasks are not garbage collected
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+# Local per-gram nutrient store filled from upstream lookups
+# (NUTRITION_STORE_PATH=off disables it). NUTRITION_OFFLINE=1 answers
+# /nutrition from the store only, without calling Spoonacular.
+_nutrition_store_path = os.getenv("NUTRITION_STORE_PATH", "nutrition_store.sqlite3")
+nutrition_store = NutritionStore(_nutrition_store_path) if _nutrition_store_path != "off" else None
+NUTRITION_OFFLINE = os.getenv("NUTRITION_OFFLINE", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    models.watch(MODEL_WATCH_SECONDS)
+    yield
+    models.stop()
+    await spoonacular.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,32 +149,249 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, requests=http_requests, latency=http_latency,
+                   in_flight=http_in_flight)
+
+# Repeated note texts skip the transformer; optionally persisted across restarts
+_cache_max_mb = os.getenv("EMBEDDING_CACHE_MAX_MB")
+_store_path = os.getenv("EMBEDDING_STORE_PATH")
+# torch (fp32, default) / int8 (dynamic quantization) / onnx (onnxruntime)
+EMBEDDER_BACKEND = os.getenv("URGENCY_EMBEDDER_BACKEND", "torch").lower()
+if _store_path and EMBEDDER_BACKEND != "torch":
+    # vectors from different backends must not share a store
+    _store_path = f"{_store_path}.{EMBEDDER_BACKEND}"
+embedding_lru = LRUEmbeddingCache(
+    max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+    max_bytes=int(float(_cache_max_mb) * 1024 * 1024) if _cache_max_mb else None,
+)
+embedding_store = PersistentEmbeddingStore(_store_path) if _store_path else None
+
+
+# MODEL_SHARING=mmap loads the pet artifacts with their NumPy arrays
+# memory-mapped from <artifact>.mmap (built on first use, see
+# shared_artifacts.py), so worker processes share one physical copy. The
+# urgency package is always loaded plainly: its embedder weights are not
+# NumPy arrays and would only be copied; serve.py shares them by loading
+# before it forks.
+MODEL_SHARING = os.getenv("MODEL_SHARING", "off").lower()
+
+
+def _load_artifact(path, prepare=None):
+    if MODEL_SHARING == "mmap":
+        return load_shared(path, prepare)
+    return joblib.load(path)
+
+
+def _embedder_fingerprint(embedder):
+    """Changes when the embedding model does, so cached vectors are not reused across models."""
+    probe = np.asarray(embedder.encode(["fingerprint probe"]), dtype=np.float32)
+    return np.round(probe, 4).tobytes()
+
+
+_embedder_fingerprints = []
+
+
+def _load_urgency(path='model.pkl'):
+    package = joblib.load(path)
+    embedder = build_embedder(package['embedder'], EMBEDDER_BACKEND,
+                              onnx_path=os.getenv("URGENCY_ONNX_PATH", "model_embedder.onnx"), log=log)
+    cache, store = embedding_lru, embedding_store
+    fingerprint = _embedder_fingerprint(embedder)
+    if not _embedder_fingerprints:
+        _embedder_fingerprints.append(fingerprint)
+    elif fingerprint != _embedder_fingerprints[0]:
+        # a retrained embedder: start an in-memory cache of its own
+        cache, store = LRUEmbeddingCache(max_entries=embedding_lru.max_entries,
+                                         max_bytes=embedding_lru.max_bytes), None
+    cached_embedder = CachedEmbedder(embedder, cache, store)
+    if os.getenv("EMBEDDING_PREWARM_CSV"):
+        cached_embedder.prewarm_from_csv(os.getenv("EMBEDDING_PREWARM_CSV"))
+    # notes embedded by a different embedder are not comparable in the note index
+    return {'classifier': package['classifier'], 'embedder': cached_embedder,
+            'version': package.get('version'), 'space': hashlib.sha1(fingerprint).hexdigest()[:16]}
+
+
+# sklearn (per-call predict) / compiled (flattened NumPy forests, same outputs)
+PET_MODEL_ENGINE = os.getenv("PET_MODEL_ENGINE", "compiled").lower()
+
+
+def _pet_forest(model):
+    if PET_MODEL_ENGINE != "compiled":
+        return model
+    if MODEL_SHARING == "mmap":
+        # no sklearn fallback: its trees would be a private copy in every worker
+        return shareable_forest(model)
+    return compile_or_keep(model, log=log)
+
+
+def _pet_package(package):
+    return {**package, "model": _pet_forest(package["model"])}
+
+
+def _load_pet_comfort(path='pet_comfort_model.pkl'):
+    return _pet_forest(_load_artifact(path, _pet_forest))
+
+
+def _load_pet_health(path="pet_health_model.pkl"):
+    return _pet_package(_load_artifact(path, _pet_package))
+
+
+def _load_pet_diet(path="pet_diet_model.pkl"):
+    return _pet_package(_load_artifact(path, _pet_package))
+
+
+# Smoke checks a new model version must pass before it is swapped in
+URGENCY_SMOKE_SET = [
+    ("submit report by eod", "urgent"),
+    ("call mom back asap", "urgent"),
+    ("buy milk and bread", "normal"),
+    ("water the plants", "normal"),
+    ("schedule annual health checkup next month", "later"),
+    ("plan summer vacation for july", "later"),
+]
+MODEL_SMOKE_MIN_ACCURACY = float(os.getenv("MODEL_SMOKE_MIN_ACCURACY", "0.5"))
 
-# Load model and embedder at startup
-package = joblib.load('model.pkl')
-clf = package['classifier']
-embedder = package['embedder']
-print("Loaded embedder")
-# Pet comfort model
-pet_comfort_model = joblib.load('pet_comfort_model.pkl')
-print("Loaded Pet model")
 
-pet_health_package = joblib.load("pet_health_model.pkl")
-pet_health_model = pet_health_package["model"]
-pet_health_encoder = pet_health_package["encoder"]
-print("Loaded pet_health_model")
+def _check_predictions(predictions, n, classes=None):
+    predictions = np.asarray(predictions)
+    if len(predictions) != n:
+        raise ValueError(f"expected {n} predictions, got {len(predictions)}")
+    if classes is not None and not np.isin(predictions, classes).all():
+        raise ValueError(f"predictions {predictions.tolist()} outside classes {list(classes)}")
+    if predictions.dtype.kind in "fc" and not np.isfinite(predictions).all():
+        raise ValueError(f"non-finite predictions {predictions.tolist()}")
+    return predictions
 
-pet_diet_package = joblib.load("pet_diet_model.pkl")
-pet_diet_model = pet_diet_package["model"]
-pet_diet_encoder = pet_diet_package["encoder"]
-pet_food_map = pet_diet_package["food_map"]
-print("Loaded pet_diet_model")
+
+def _validate_urgency(urgency):
+    texts, expected = zip(*URGENCY_SMOKE_SET)
+    classifier = urgency['classifier']
+    predictions = _check_predictions(classifier.predict(urgency['embedder'].encode(list(texts))),
+                                     len(texts), classifier.classes_)
+    accuracy = float(np.mean(predictions == np.array(expected)))
+    if accuracy < MODEL_SMOKE_MIN_ACCURACY:
+        raise ValueError(f"smoke accuracy {accuracy:.2f} < {MODEL_SMOKE_MIN_ACCURACY}")
+
+
+def _validate_pet_comfort(model):
+    X = [[22, 50, 4, 5], [35, 85, 8, 1], [5, 20, 2, 9]]
+    _check_predictions(model.predict(X), len(X), getattr(model, "classes_", None))
+
+
+def _validate_pet_package(package):
+    encoder = package["encoder"]
+    # one row per known category value; numeric columns at typical values
+    n = max(len(c) for c in encoder.categories_)
+    X_cat = encoder.transform([[c[i % len(c)] for c in encoder.categories_] for i in range(n)])
+    X = np.hstack([X_cat, np.tile([[5, 1]], (n, 1))])
+    _check_predictions(package["model"].predict(X), n, getattr(package["model"], "classes_", None))
+
+
+# Models load in parallel off the request path so lightweight routes
+# (/, /meal-schedule, /recipe-generator, ...) serve immediately.
+# MODEL_LOADING=lazy defers each load until its first request.
+# Versioned artifacts (<MODEL_ARTIFACT_DIR>/<model>/model-vNNNN.pkl) are
+# polled every MODEL_WATCH_SECONDS (0 = off); a new version is loaded in
+# the background, smoke-checked and swapped in without a restart.
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "artifacts")
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "30"))
+# Admin routes (model reload/rollback, clearing notes) answer 403 unless set
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
+models = ModelRegistry(
+    max_workers=int(os.getenv("MODEL_LOADER_THREADS", "4")),
+    warm_imports=["sklearn.ensemble", "sklearn.linear_model", "sklearn.preprocessing"],
+    log=log,
+)
+models.register("urgency", _load_urgency, validate=_validate_urgency,
+                versions=ArtifactVersions(os.path.join(MODEL_ARTIFACT_DIR, "urgency"), "model.pkl"))
+models.register("pet_comfort", _load_pet_comfort, validate=_validate_pet_comfort,
+                versions=ArtifactVersions(os.path.join(MODEL_ARTIFACT_DIR, "pet_comfort"),
+                                          "pet_comfort_model.pkl"))
+models.register("pet_health", _load_pet_health, validate=_validate_pet_package,
+                versions=ArtifactVersions(os.path.join(MODEL_ARTIFACT_DIR, "pet_health"),
+                                          "pet_health_model.pkl"))
+models.register("pet_diet", _load_pet_diet, validate=_validate_pet_package,
+                versions=ArtifactVersions(os.path.join(MODEL_ARTIFACT_DIR, "pet_diet"),
+                                          "pet_diet_model.pkl"))
+if os.getenv("MODEL_LOADING", "background") != "lazy":
+    models.load_all()
+
+
+def _after_fork_in_child():
+    # preforking servers (serve.py, gunicorn --preload) keep the loaded
+    # models; threads, locks and SQLite connections have to be recreated.
+    # The caches become per-worker copies; the embedding store, nutrition
+    # store and note index stay shared through their files.
+    models.after_fork()
+    log.after_fork()
+    for cache in (recipe_cache, nutrition_cache, embedding_lru):
+        cache.after_fork()
+    if embedding_store is not None:
+        embedding_store.after_fork()
+    if nutrition_store is not None:
+        nutrition_store.reopen()
+    note_index.after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# Optional O(1) lookup tables for the pet models: PET_LOOKUP_TABLES=startup
+# builds them from the loaded models, a file path loads tables saved by
+# pet_lookup_tables.py. Out-of-grid inputs always use the live model.
+PET_LOOKUP_TABLES = os.getenv("PET_LOOKUP_TABLES", "off")
+
+
+def _load_pet_tables():
+    if PET_LOOKUP_TABLES != "startup":
+        return _load_artifact(PET_LOOKUP_TABLES)
+    tables = {
+        "pet_comfort": build_comfort_table(
+            models.get("pet_comfort"),
+            temp_step=float(os.getenv("PET_TABLE_TEMP_STEP", "0.5")),
+            humidity_step=float(os.getenv("PET_TABLE_HUMIDITY_STEP", "1.0"))),
+        "pet_health": build_health_table(models.get("pet_health")),
+        "pet_diet": build_diet_table(
+            models.get("pet_diet"),
+            weight_step=float(os.getenv("PET_TABLE_WEIGHT_STEP", "0.1"))),
+    }
+    for table in tables.values():
+        table.measure_error(int(os.getenv("PET_TABLE_ERROR_SAMPLES", "5000")))
+    return tables
+
+
+if PET_LOOKUP_TABLES != "off":
+    # tables built at startup are rebuilt whenever a pet model is swapped
+    models.register("pet_tables", _load_pet_tables,
+                    depends_on=("pet_comfort", "pet_health", "pet_diet") if PET_LOOKUP_TABLES == "startup" else ())
+    if os.getenv("MODEL_LOADING", "background") != "lazy":
+        models.load_all()
+
+
+def _pet_table_lookup(name, *inputs):
+    # never wait for the tables; the live model answers until they are built
+    if PET_LOOKUP_TABLES == "off" or not models.is_loaded("pet_tables"):
+        return None
+    value = models.get("pet_tables")[name].lookup(*inputs)
+    pet_table_lookups.inc(model=name, result="miss" if value is None else "hit")
+    return value
+
+
+def _model(name):
+    try:
+        return models.get(name)
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
 class TextRequest(BaseModel):
     text: str
 
 
+class TextBatchRequest(BaseModel):
+    texts: List[str]
+
+
 class PetComfortRequest(BaseModel):
     temperature: float
     humidity: float
@@ -68,29 +411,199 @@ class PetDietRequest(BaseModel):
     activity: int
 
 
+class ModelReloadRequest(BaseModel):
+    version: Optional[int] = None  # default: newest on disk
+
+
+class Note(BaseModel):
+    id: str
+    text: str
+
+
+class NoteInsertRequest(BaseModel):
+    notes: List[Note]
+
+
+class NoteSearchRequest(BaseModel):
+    text: Optional[str] = None  # search by text, or
+    id: Optional[str] = None  # by an indexed note (excluded from its own results)
+    k: int = 10
+    min_score: Optional[float] = None  # cosine similarity
+    exact: Optional[bool] = None  # force (True) or allow (False) the approximate index
+
+
 class RecipeRequest(BaseModel):
     ingredients: str
     diet: str = "vegetarian"  # default to vegetarian
     type: str = "main course"
+    index: int = 0  # which of the cached search results to return ("next" = index + 1)
+
+
+class RecipeMatchRequest(BaseModel):
+    ingredients: str
+    diet: Optional[str] = None  # vegetarian (whole catalog) / low-carb / high-protein
+    top_k: int = 10
+    max_missing: Optional[int] = None
+    rank_by: Literal["missing", "coverage"] = "missing"
 
 
 class NutritionRequest(BaseModel):
     meal: str
 
 
+class NutritionBatchRequest(BaseModel):
+    meals: List[str]  # one entry per meal, e.g. a day or week log
+
+
 class MealScheduleRequest(BaseModel):
     preferences: str = "vegetarian"  # vegetarian / low-carb / high-protein
     meals_per_day: int = 3
 
 
+class MealPlanRequest(BaseModel):
+    preferences: str = "vegetarian"
+    days: int = 7
+    meals_per_day: int = 3
+    repeat_window: int = 3  # days before a meal may come back
+    targets: Optional[Dict[str, float]] = None  # daily {"calories", "protein_g", "carbs_g", "fat_g"}
+    seed: Optional[int] = None  # same seed -> same plan
+
+
+def _predict_urgency_batch(texts):
+    urgency = _model("urgency")
+    with inference_latency.time(model="urgency", phase="embed"):
+        embeddings = urgency['embedder'].encode(texts)
+    with inference_latency.time(model="urgency", phase="classify"):
+        return urgency['classifier'].predict(embeddings).tolist()
+
+
+# Concurrent /predict_urgency calls share one embedder.encode() per batch
+urgency_batcher = MicroBatcher(
+    _predict_urgency_batch,
+    max_batch_size=int(os.getenv("URGENCY_MAX_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.getenv("URGENCY_MAX_WAIT_MS", "5")),
+)
+
+
 @app.post('/predict_urgency')
-def predict_urgency(req: TextRequest):
-    text = req.text.lower()
-    embedding = embedder.encode([text])
-    prediction = clf.predict(embedding)[0]
+async def predict_urgency(req: TextRequest):
+    prediction = await urgency_batcher.submit(req.text)
     return {'urgency': prediction}
 
 
+@app.get('/embedding_cache')
+def embedding_cache_stats():
+    if models.is_loaded("urgency"):
+        return _model("urgency")['embedder'].stats()
+    return embedding_lru.stats()
+
+
+@app.post('/predict_urgency_batch')
+async def predict_urgency_batch(req: TextBatchRequest):
+    if not req.texts:
+        return {'urgencies': []}
+    predictions = await urgency_batcher.submit_many(req.texts)
+    return {'urgencies': predictions}
+
+
+# Note embeddings kept for duplicate / related-note search. NOTE_INDEX_PATH
+# is a SQLite log every insert and delete is written to as it happens: it
+# persists notes across restarts and keeps the per-worker indexes in sync.
+# With "off" each process holds its own, unsaved index.
+NOTE_INDEX_PATH = os.getenv("NOTE_INDEX_PATH", "off")
+NOTE_DUPLICATE_MIN_SCORE = float(os.getenv("NOTE_DUPLICATE_MIN_SCORE", "0.9"))
+NOTE_SEARCH_MAX_K = int(os.getenv("NOTE_SEARCH_MAX_K", "100"))
+_note_index_options = dict(
+    mode=os.getenv("NOTE_INDEX_MODE", "auto"),  # exact / ivf / auto
+    ivf_min_rows=int(os.getenv("NOTE_INDEX_IVF_MIN_ROWS", "200000")),
+    n_probe=int(os.getenv("NOTE_INDEX_IVF_PROBE", "16")),
+)
+note_index = (NoteIndex.open(NOTE_INDEX_PATH, **_note_index_options) if NOTE_INDEX_PATH != "off"
+              else NoteIndex(**_note_index_options))
+
+
+def _note_space(urgency):
+    note_index.sync()
+    if note_index.space is not None and note_index.space != urgency['space']:
+        raise HTTPException(status_code=409, detail=(
+            "the note index holds embeddings from a different embedder; "
+            "clear it with DELETE /notes and re-insert the notes"))
+
+
+@app.post('/notes')
+def insert_notes(req: NoteInsertRequest):
+    """Index notes by id (re-inserting an id replaces it); returns their urgency too."""
+    if not req.notes:
+        return {'notes': [], 'size': len(note_index)}
+    urgency = _model("urgency")
+    _note_space(urgency)
+    texts = [n.text for n in req.notes]
+    with inference_latency.time(model="urgency", phase="embed"):
+        embeddings = urgency['embedder'].encode(texts)
+    with inference_latency.time(model="urgency", phase="classify"):
+        urgencies = urgency['classifier'].predict(embeddings).tolist()
+    note_index.space = urgency['space']
+    with inference_latency.time(model="note_index", phase="insert"):
+        note_index.add([n.id for n in req.notes], embeddings, texts)
+    return {'notes': [{'id': n.id, 'urgency': u} for n, u in zip(req.notes, urgencies)],
+            'size': len(note_index)}
+
+
+@app.delete('/notes/{note_id}')
+def delete_note(note_id: str):
+    if not note_index.remove([note_id]):
+        raise HTTPException(status_code=404, detail=f"no note {note_id!r}")
+    return {'deleted': note_id, 'size': len(note_index)}
+
+
+@app.delete('/notes')
+def clear_notes(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    note_index.sync()
+    removed = len(note_index)
+    note_index.clear()
+    return {'deleted': removed, 'size': 0}
+
+
+def _search_notes(req: NoteSearchRequest, default_min_score):
+    if (req.text is None) == (req.id is None):
+        raise HTTPException(status_code=422, detail="give exactly one of text or id")
+    k = max(0, min(req.k, NOTE_SEARCH_MAX_K))
+    if req.id is not None:
+        query = note_index.get_vector(req.id)
+        if query is None:
+            raise HTTPException(status_code=404, detail=f"no note {req.id!r}")
+    else:
+        urgency = _model("urgency")
+        _note_space(urgency)
+        with inference_latency.time(model="urgency", phase="embed"):
+            query = urgency['embedder'].encode([req.text])[0]
+    min_score = default_min_score if req.min_score is None else req.min_score
+    with inference_latency.time(model="note_index", phase="search"):
+        hits = note_index.search(query, k=k, min_score=min_score,
+                                 exclude=[req.id] if req.id is not None else None,
+                                 exact=req.exact)[0]
+    return {'results': [{'id': note_id, 'score': round(score, 4), 'text': note_index.text(note_id)}
+                        for note_id, score in hits]}
+
+
+@app.post('/notes/search')
+def search_notes(req: NoteSearchRequest):
+    """Most similar indexed notes, best first."""
+    return _search_notes(req, -1.0)
+
+
+@app.post('/notes/duplicates')
+def duplicate_notes(req: NoteSearchRequest):
+    """Near-duplicates: like /notes/search, keeping scores >= NOTE_DUPLICATE_MIN_SCORE by default."""
+    return _search_notes(req, NOTE_DUPLICATE_MIN_SCORE)
+
+
+@app.get('/notes')
+def note_index_stats():
+    return note_index.stats()
+
+
 @app.post('/predict_pet_comfort')
 def predict_pet_comfort(req: PetComfortRequest):
     features = [[
@@ -99,14 +612,133 @@ def predict_pet_comfort(req: PetComfortRequest):
         req.feeding_interval,
         req.activity_level
     ]]
-    prediction = pet_comfort_model.predict(features)[0]
-
-    print('comfort_level', prediction)
+    prediction = _pet_table_lookup("pet_comfort", req.temperature, req.humidity,
+                                   req.feeding_interval, req.activity_level)
+    if prediction is None:
+        model = _model("pet_comfort")
+        with inference_latency.time(model="pet_comfort", phase="predict"):
+            prediction = model.predict(features)[0]
+
+    log.debug("pet_comfort", comfort_level=prediction)
     return {'comfort_level': prediction}
 
 
+def _predict_comfort_batch(X):
+    model = models.get("pet_comfort")
+    with inference_latency.time(model="pet_comfort", phase="stream"):
+        return model.predict(X).tolist()
+
+
+# Sensor readings streamed over /ws/pet_comfort or POST /stream/pet_comfort:
+# per-pet sliding windows, scored in micro-batches, changes sent only
+comfort_stream = ComfortStream(
+    _predict_comfort_batch,
+    window_size=int(os.getenv("PET_STREAM_WINDOW", "5")),
+    window_seconds=float(os.getenv("PET_STREAM_WINDOW_SECONDS", "60")),
+    max_batch_size=int(os.getenv("PET_STREAM_MAX_BATCH_SIZE", "1024")),
+    max_wait_ms=float(os.getenv("PET_STREAM_MAX_WAIT_MS", "50")),
+    idle_seconds=float(os.getenv("PET_STREAM_IDLE_SECONDS", "600")),
+)
+
+
+def _stream_readings(payload):
+    # one reading per message/line, or a list of them
+    return payload if isinstance(payload, list) else [payload]
+
+
+@app.websocket("/ws/pet_comfort")
+async def pet_comfort_socket(websocket: WebSocket):
+    """
+    Send {"pet_id", "temperature", "humidity", "feeding_interval",
+    "activity_level"} readings (any subset after the first; missing fields
+    keep their last value); receive {"pet_id", "comfort_level", "previous",
+    ...} whenever a pet's comfort level changes.
+    """
+    await websocket.accept()
+    sink = ChangeSink()
+    comfort_stream.connections += 1
+
+    async def send_changes():
+        while True:
+            for message in await sink.take():
+                await websocket.send_json(message)
+
+    sender = asyncio.get_running_loop().create_task(send_changes())
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                readings = _stream_readings(json.loads(text))
+            except ValueError:
+                await websocket.send_json({"error": "invalid JSON"})
+                continue
+            for reading in readings:
+                error = comfort_stream.submit(reading, sink) if isinstance(reading, dict) else "expected an object"
+                if error:
+                    await websocket.send_json({"error": error, "reading": reading})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        comfort_stream.detach(sink)
+        comfort_stream.connections -= 1
+
+
+@app.post("/stream/pet_comfort")
+async def pet_comfort_upload(request: Request):
+    """
+    NDJSON upload of readings (same fields as /ws/pet_comfort), read as it
+    arrives; answers with NDJSON of every comfort change they caused.
+    """
+    sink = ChangeSink(coalesce=False)
+    errors = []
+
+    def submit(line):
+        try:
+            readings = _stream_readings(json.loads(line))
+        except ValueError:
+            errors.append({"error": "invalid JSON", "line": line[:200].decode("utf-8", "replace")})
+            return
+        for reading in readings:
+            error = comfort_stream.submit(reading, sink) if isinstance(reading, dict) else "expected an object"
+            if error:
+                errors.append({"error": error, "reading": reading})
+
+    comfort_stream.connections += 1
+    try:
+        buffer = b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    submit(line)
+        if buffer.strip():
+            submit(buffer)
+        await comfort_stream.flush()
+        changes = await sink.take(0)
+    finally:
+        comfort_stream.detach(sink)
+        comfort_stream.connections -= 1
+    body = "".join(json.dumps(m) + "\n" for m in errors + changes)
+    return Response(body, media_type="application/x-ndjson")
+
+
+@app.get("/stream/pet_comfort")
+def pet_comfort_stream_stats():
+    return comfort_stream.stats()
+
+
 @app.post("/predict_pet_health")
 def predict_pet_health(req: PetHealthRequest):
+    pred = _pet_table_lookup("pet_health", req.symptoms, req.recentFood,
+                             len(req.symptoms.split()), int(req.recentActivity))
+    if pred is not None:
+        return {"risk": pred}
+
+    pet_health_package = _model("pet_health")
+    pet_health_model = pet_health_package["model"]
+    pet_health_encoder = pet_health_package["encoder"]
+
     # Match training order: ["symptom", "food_type"]
     X_cat = pet_health_encoder.transform([[req.symptoms, req.recentFood]])
 
@@ -116,281 +748,587 @@ def predict_pet_health(req: PetHealthRequest):
 
     X = np.hstack([X_cat, X_num])
 
-    pred = pet_health_model.predict(X)[0]
+    with inference_latency.time(model="pet_health", phase="predict"):
+        pred = pet_health_model.predict(X)[0]
     # pred = pred.upper()
-    print("risk", pred)
+    log.debug("pet_health", risk=pred)
     return {"risk": pred}
 
 
 @app.post("/recommend_pet_diet")
 def recommend_pet_diet(req: PetDietRequest):
-    X_cat = pet_diet_encoder.transform([[req.breed]])
-    X_num = [[req.weight, req.activity]]
-    X = np.hstack([X_cat, X_num])
-    portion = pet_diet_model.predict(X)[0]
+    pet_diet_package = _model("pet_diet")
+    pet_diet_model = pet_diet_package["model"]
+    pet_diet_encoder = pet_diet_package["encoder"]
+    pet_food_map = pet_diet_package["food_map"]
+
+    portion = _pet_table_lookup("pet_diet", req.breed, req.weight, req.activity)
+    if portion is None:
+        X_cat = pet_diet_encoder.transform([[req.breed]])
+        X_num = [[req.weight, req.activity]]
+        X = np.hstack([X_cat, X_num])
+        with inference_latency.time(model="pet_diet", phase="predict"):
+            portion = pet_diet_model.predict(X)[0]
     food_type = pet_food_map.get(req.breed, "dry_kibble")
-    print("risk", portion)
-    print("risk", food_type)
+    log.debug("pet_diet", portion=portion, food_type=food_type)
     return {
         "recommended_portion_g": round(portion, 1),
         "recommended_food_type": food_type
     }
 
 
+# Columnar batch scoring: one encoder transform and one predict per chunk of rows
+PET_BATCH_MAX_ROWS = int(os.getenv("PET_BATCH_MAX_ROWS", "1000000"))
+PET_BATCH_CHUNK_ROWS = int(os.getenv("PET_BATCH_CHUNK_ROWS", "65536"))
+
+
+def _pet_batch_predict(name, inputs, featurize):
+    """Model outputs for whole input columns; lookup tables first when they are built."""
+    n = len(inputs[0])
+    out = None
+    todo = np.arange(n)
+    if PET_LOOKUP_TABLES != "off" and models.is_loaded("pet_tables"):
+        values, hit = models.get("pet_tables")[name].lookup_many(*inputs)
+        out = values.astype(object) if values.dtype.kind not in "fc" else values.astype(np.float64)
+        todo = np.flatnonzero(~hit)
+        pet_table_lookups.inc(int(hit.sum()), model=name, result="hit")
+        pet_table_lookups.inc(len(todo), model=name, result="miss")
+    if len(todo):
+        package = _model(name)
+        for start in range(0, len(todo), PET_BATCH_CHUNK_ROWS):
+            rows = todo[start:start + PET_BATCH_CHUNK_ROWS]
+            X = featurize(package["encoder"], *[column[rows] for column in inputs])
+            with inference_latency.time(model=name, phase="batch"):
+                pred = package["model"].predict(X)
+            if out is None:
+                out = np.empty(n, dtype=np.float64 if pred.dtype.kind in "fc" else object)
+            out[rows] = pred
+    return out if out is not None else np.empty(0, dtype=object)
+
+
+def _pet_health_features(encoder, symptoms, foods, food_amount, activity):
+    X_cat = encoder.transform(np.column_stack([symptoms, foods]))
+    return np.hstack([X_cat, np.column_stack([food_amount, activity])])
+
+
+def _pet_diet_features(encoder, breeds, weight, activity):
+    X_cat = encoder.transform(breeds.reshape(-1, 1))
+    return np.hstack([X_cat, np.column_stack([weight, activity])])
+
+
+def _score_pet_health_columns(body, content_type):
+    columns = read_columns(body, content_type, ("symptoms", "recentFood", "recentActivity"),
+                           PET_BATCH_MAX_ROWS)
+    symptoms = columns["symptoms"].astype(str)
+    foods = columns["recentFood"].astype(str)
+    # same placeholder food amount as /predict_pet_health
+    food_amount = np.fromiter((len(s.split()) for s in symptoms.tolist()), dtype=np.int64,
+                              count=len(symptoms))
+    activity = numeric_column(columns, "recentActivity", np.int64)
+    risk = _pet_batch_predict("pet_health", [symptoms, foods, food_amount, activity], _pet_health_features)
+    return write_columns({"risk": risk.astype(str)}, payload_format(content_type))
+
+
+def _score_pet_diet_columns(body, content_type):
+    columns = read_columns(body, content_type, ("breed", "weight", "activity"), PET_BATCH_MAX_ROWS)
+    breeds = columns["breed"].astype(str)
+    weight = numeric_column(columns, "weight")
+    activity = numeric_column(columns, "activity", np.int64)
+    portion = _pet_batch_predict("pet_diet", [breeds, weight, activity], _pet_diet_features)
+    food_map = _model("pet_diet")["food_map"]
+    uniques, inverse = np.unique(breeds, return_inverse=True)
+    food_type = np.array([food_map.get(b, "dry_kibble") for b in uniques.tolist()], dtype=str)[inverse.reshape(-1)]
+    return write_columns({"recommended_portion_g": np.round(portion.astype(np.float64), 1),
+                          "recommended_food_type": food_type},
+                         payload_format(content_type))
+
+
+async def _columnar_response(request, score):
+    content_type = request.headers.get("content-type", "application/json")
+    body = await request.body()
+    try:
+        # parsing a million-row payload would stall the event loop
+        result = await asyncio.get_running_loop().run_in_executor(None, score, body, content_type)
+    except ColumnError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return Response(result, media_type=payload_format(content_type))
+
+
+@app.post("/predict_pet_health_batch")
+async def predict_pet_health_batch(request: Request):
+    """
+    Columns in, columns out: {"symptoms": [...], "recentFood": [...],
+    "recentActivity": [...]} -> {"risk": [...]}, as JSON or, with
+    Content-Type application/x-npz, as an .npz archive of arrays.
+    """
+    return await _columnar_response(request, _score_pet_health_columns)
+
+
+@app.post("/recommend_pet_diet_batch")
+async def recommend_pet_diet_batch(request: Request):
+    """
+    {"breed": [...], "weight": [...], "activity": [...]} ->
+    {"recommended_portion_g": [...], "recommended_food_type": [...]},
+    as JSON or application/x-npz like /predict_pet_health_batch.
+    """
+    return await _columnar_response(request, _score_pet_diet_columns)
+
+
+def _recipe_cache_key(ingredients_list, diet, dish_type):
+    ingredients = tuple(sorted({" ".join(i.lower().split()) for i in ingredients_list}))
+    return ingredients, diet.strip().lower(), dish_type.strip().lower()
+
+
+async def _search_recipes(ingredients_list, diet, dish_type):
+    # Step 1: Search for recipes
+    search_params = {
+        "includeIngredients": ",".join(ingredients_list),
+        "diet": diet,
+        "type": dish_type,
+        "number": 5,  # fetch top 5 results
+    }
+    search_res = await spoonacular.get("/recipes/complexSearch", params=search_params)
+    search_res.raise_for_status()  # never cache an error as "no results"
+    search_data = search_res.json()
+    ids = [r["id"] for r in search_data.get("results") or [] if r.get("id")]
+    # details of every result are kept so "next" recipes are served locally
+    return {"ids": ids, "details": {}}
+
+
+async def _recipe_details(recipe_id):
+    detail_res = await spoonacular.get(f"/recipes/{recipe_id}/information")
+    detail_res.raise_for_status()
+    return detail_res.json()
+
+
+async def _cached_recipe_details(entry, recipe_id):
+    if recipe_id not in entry["details"]:
+        entry["details"][recipe_id] = await recipe_flight.do(
+            ("detail", recipe_id), lambda: _recipe_details(recipe_id))
+    return entry["details"][recipe_id]
+
+
+async def _prefetch_recipe_details(entry):
+    for recipe_id in entry["ids"]:
+        try:
+            await _cached_recipe_details(entry, recipe_id)
+        except Exception as e:
+            log.warning("recipe_prefetch_failed", recipe_id=recipe_id, error=str(e))
+
+
+def _format_recipe(detail_data, diet):
+    # Step 3: Extract ingredients list
+    ingredients = []
+    for ing in detail_data.get("extendedIngredients", []):
+        amount = f"{ing.get('amount', '')} {ing.get('unit', '')}".strip()
+        name = ing.get("name", "")
+        ingredients.append(f"{amount} {name}".strip())
+
+    # Step 4: Build response JSON
+    return {
+        "title": detail_data.get("title"),
+        "category": diet.capitalize(),
+        "area": detail_data.get("cuisines", []),
+        "instructions": detail_data.get("instructions", ""),
+        "image": detail_data.get("image"),
+        "ingredients": ingredients
+    }
+
+
+def _format_local_recipe(match, diet):
+    return {
+        "title": match["name"],
+        "category": diet.capitalize(),
+        "area": [],
+        "instructions": "",
+        "image": None,
+        "ingredients": match["ingredients"],
+        "missing": match["missing"],
+    }
+
+
+def _local_recipe(ingredients_list, diet, index, max_missing=None):
+    """A catalog meal for the pantry in /recipe-generator's shape, or None."""
+    diet = diet.lower()
+    if diet not in meal_catalog.categories:
+        return None  # the catalog only knows its own categories
+    matches = pantry_index.match(ingredients_list, top_k=RECIPE_LOCAL_TOP_K,
+                                 category=None if diet == "vegetarian" else diet,
+                                 max_missing=max_missing)
+    if not matches:
+        return None
+    index = index % len(matches)
+    return {"recipe": _format_local_recipe(matches[index], diet), "index": index,
+            "total_results": len(matches), "source": "local"}
+
+
 @app.post("/recipe-generator")
-def generate_recipe(req: RecipeRequest):
+async def generate_recipe(req: RecipeRequest):
     ingredients_list = [ing.strip()
                         for ing in req.ingredients.split(",") if ing.strip()]
     if not ingredients_list:
         raise HTTPException(status_code=400, detail="No ingredients provided.")
 
+    if RECIPE_LOCAL_MATCH in ("first", "only"):
+        local = _local_recipe(ingredients_list, req.diet, req.index,
+                              RECIPE_LOCAL_MAX_MISSING if RECIPE_LOCAL_MATCH == "first" else None)
+        if local is not None:
+            return local
+        if RECIPE_LOCAL_MATCH == "only":
+            return {"recipe": f"No {req.diet} recipe found for given ingredients."}
+
     try:
-        # Build the ingredient string
-        ingredients_str = ",".join(ingredients_list)
-
-        # Step 1: Search for recipes
-        search_url = "https://api.spoonacular.com/recipes/complexSearch"
-        search_params = {
-            "includeIngredients": ingredients_str,
-            "diet": req.diet,
-            "type": req.type,
-            "number": 5,  # fetch top 5 results
-            "apiKey": SPOONACULAR_API_KEY
-        }
-        search_res = requests.get(search_url, params=search_params)
-        search_data = search_res.json()
-
-        if not search_data.get("results"):
+        # Same pantry + diet + type -> one cached search shared by all callers
+        # (a stale entry is served while it is refreshed in the background)
+        key = ("search", _recipe_cache_key(ingredients_list, req.diet, req.type))
+        entry, state = await get_or_fetch(
+            recipe_cache, recipe_flight, key,
+            lambda: _search_recipes(ingredients_list, req.diet, req.type),
+            max_stale=RECIPE_CACHE_MAX_STALE, log=log)
+        if state == "miss" and len(entry["ids"]) > 1:
+            _spawn(_prefetch_recipe_details(entry))
+
+        if not entry["ids"]:
             return {"recipe": f"No {req.diet} recipe found for given ingredients."}
 
-        # Step 2: Get full recipe details for the first recipe
-        recipe_id = search_data["results"][0]["id"]
-        detail_url = f"https://api.spoonacular.com/recipes/{recipe_id}/information"
-        detail_res = requests.get(
-            detail_url, params={"apiKey": SPOONACULAR_API_KEY})
-        detail_data = detail_res.json()
-
-        # Step 3: Extract ingredients list
-        ingredients = []
-        for ing in detail_data.get("extendedIngredients", []):
-            amount = f"{ing.get('amount', '')} {ing.get('unit', '')}".strip()
-            name = ing.get("name", "")
-            ingredients.append(f"{amount} {name}".strip())
-
-        # Step 4: Build response JSON
-        recipe_json = {
-            "title": detail_data.get("title"),
-            "category": req.diet.capitalize(),
-            "area": detail_data.get("cuisines", []),
-            "instructions": detail_data.get("instructions", ""),
-            "image": detail_data.get("image"),
-            "ingredients": ingredients
-        }
-
-        return {"recipe": recipe_json}
+        # Step 2: Get full recipe details for the requested result (0 = best match)
+        index = req.index % len(entry["ids"])
+        detail_data = await _cached_recipe_details(entry, entry["ids"][index])
+        return {"recipe": _format_recipe(detail_data, req.diet),
+                "index": index, "total_results": len(entry["ids"])}
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        # upstream failed: the local catalog can still suggest something
+        local = _local_recipe(ingredients_list, req.diet, req.index) if RECIPE_LOCAL_MATCH != "off" else None
+        if local is not None:
+            log.warning("recipe_local_fallback", error=str(e))
+            return {**local, "degraded": True}
+        raise HTTPException(status_code=503 if isinstance(e, CircuitOpenError) else 500, detail=str(e))
+
+
+@app.post("/recipe-match")
+def recipe_match(req: RecipeMatchRequest):
+    pantry = [ing.strip() for ing in req.ingredients.split(",") if ing.strip()]
+    if not pantry:
+        raise HTTPException(status_code=400, detail="No ingredients provided.")
+    category = (req.diet or "").lower()
+    if category and category not in meal_catalog.categories:
+        raise HTTPException(status_code=400, detail=f"diet must be one of {meal_catalog.categories}")
+    matches = pantry_index.match(pantry, top_k=req.top_k,
+                                 category=None if category in ("", "vegetarian") else category,
+                                 max_missing=req.max_missing, rank_by=req.rank_by)
+    return {"matches": matches, "catalog_size": len(pantry_index)}
 
 # --- Helper functions for nutrition parsing/aggregation ---
 
 
-def _sum_nutrients_from_spoonacular_items(items):
-    total = {"calories": 0.0, "protein_g": 0.0,
-             "carbs_g": 0.0, "fat_g": 0.0, "fiber_g": 0.0}
-    for item in items:
-        nutrition = item.get("nutrition", {}) or {}
-        nutrients = nutrition.get("nutrients", []) or []
-        for n in nutrients:
-            name = n.get("name", "").lower()
-            amount = n.get("amount", 0) or 0
-            if "calories" in name:
-                total["calories"] += amount
-            elif "protein" in name:
-                total["protein_g"] += amount
-            elif "carbohydrates" in name:
-                total["carbs_g"] += amount
-            elif name == "fat":
-                total["fat_g"] += amount
-            elif "fiber" in name:
-                total["fiber_g"] += amount
-    return total
-
-
-def _aggregate_dicts(a, b):
-    return {k: a.get(k, 0) + b.get(k, 0) for k in set(a) | set(b)}
-
-
-def _parse_quantity_and_name(ing_text):
+def _parse_candidates(meal_text):
+    out = []
+    cands = split_lines(meal_text)
+    for cand, (_, _, grams, name) in zip(cands, parse_many(cands)):
+        if grams is None or grams <= 0:
+            grams = 100.0  # default fallback weight
+        out.append((cand, grams, name))
+    return out
+
+
+def _stored_per_gram(names):
+    return nutrition_store.get_many(names) if nutrition_store is not None else {}
+
+
+async def _in_thread(fn, *args):
+    # the SQLite store blocks; keep its calls off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+def _totals(cands, per_g):
+    """Per-gram vectors times the locally parsed grams; returns (total vector, names without a vector)."""
+    total = zeros()
+    missing = []
+    for _, grams, name in cands:
+        vec = per_g.get(name)
+        if vec is None:
+            missing.append(name)
+        else:
+            total += vec * grams
+    return total, missing
+
+
+def _local_nutrition(meal_text):
+    """Totals from the local store; returns (total vector, names missing from the store)."""
+    cands = _parse_candidates(meal_text)
+    return _totals(cands, _stored_per_gram(name for _, _, name in cands))
+
+
+def _parsed_per_gram(cands, items):
     """
-    Heuristic to extract a grams amount (approx) and normalized name from a text like:
-      "2 cups spinach" -> (480.0, "spinach")  # 2 * 240
-      "100 g chicken" -> (100.0, "chicken")
-      "1 tbsp olive oil" -> (15.0, "olive oil")
-    Returns (grams_or_None, ingredient_name)
+    (name, per-gram vector, id) rows from parseIngredients items, one item
+    per candidate line in the same order. parseIngredients reports each
+    item's weight, which gives per-gram values; items without one are skipped.
     """
-    s = ing_text.strip().lower()
-    s = re.sub(r'\s+', ' ', s)
-
-    # try to catch patterns like '1/2', '2.5', '100g', etc.
-    m = re.match(
-        r'^(\d+(?:\.\d+)?|\d+/\d+)\s*(g|gram|grams|kg|kilogram|ml|tbsp|tbsp\.|tsp|cup|cups)?\s*(.*)$', s)
-    if m:
-        qty = m.group(1)
-        unit = m.group(2)
-        name = m.group(3).strip() or s
-        try:
-            if '/' in qty:
-                a, b = qty.split('/')
-                qty_val = float(a) / float(b)
-            else:
-                qty_val = float(qty)
-        except:
-            qty_val = None
-
-        if unit:
-            unit = unit.replace('.', '')
-            if unit in ("g", "gram", "grams"):
-                return qty_val, name
-            if unit in ("kg", "kilogram"):
-                return qty_val * 1000, name
-            if unit in ("ml",):
-                return qty_val, name
-            if unit in ("tbsp",):
-                return qty_val * 15, name
-            if unit in ("tsp",):
-                return qty_val * 5, name
-            if unit in ("cup", "cups"):
-                return qty_val * 240, name
-        if qty_val is not None:
-            return qty_val, name
-
-    # numeric prefix without unit
-    m2 = re.match(r'^(\d+(?:\.\d+)?)\s+(.*)$', s)
-    if m2:
-        try:
-            val = float(m2.group(1))
-            name = m2.group(2).strip()
-            # assume grams for a bare number (best effort)
-            return val, name
-        except:
-            pass
+    rows = []
+    for (_, _, name), item in zip(cands, items):
+        weight = ((item.get("nutrition") or {}).get("weightPerServing") or {})
+        grams = weight.get("amount") or 0
+        if name and weight.get("unit") == "g" and grams > 0:
+            per_g = items_vector([item]) / grams
+            if per_g.any():
+                rows.append((name, per_g, item.get("id")))
+    return rows
+
+
+async def _fetch_per_gram(name):
+    """Search one ingredient and fetch its per-gram vector; None when any step fails."""
+    sresp = await spoonacular.get("/food/ingredients/search",
+                                  params={"query": name, "number": 1})
+    if sresp.status_code in BREAKER_FAILURE_STATUSES:
+        # a partial total must not be cached as the meal's answer
+        raise UpstreamError(f"ingredient search failed: {sresp.status_code}")
+    if sresp.status_code != 200:
+        log.warning("ingredient_search_failed", ingredient=name, status=sresp.status_code,
+                    body=sresp.text[:200])
+        return None
+    sdata = sresp.json()
+    results = sdata.get("results") or []
+    if len(results) == 0:
+        log.info("ingredient_not_found", ingredient=name)
+        return None
+    ing_id = results[0].get("id")
+    if not ing_id:
+        log.info("ingredient_without_id", ingredient=name)
+        return None
+
+    # fetch a fixed 100 g reference so the result can be stored per gram
+    iresp = await spoonacular.get(f"/food/ingredients/{ing_id}/information",
+                                  params={"amount": 100, "unit": "grams"})
+    if iresp.status_code in BREAKER_FAILURE_STATUSES:
+        raise UpstreamError(f"ingredient info failed: {iresp.status_code}")
+    if iresp.status_code != 200:
+        log.warning("ingredient_info_failed", ingredient=name, status=iresp.status_code,
+                    body=iresp.text[:200])
+        return None
+    idata = iresp.json()
+    per_g = nutrient_vector(idata.get("nutrition", {}).get("nutrients", []) or []) / 100.0
+    if nutrition_store is not None and per_g.any():
+        await _in_thread(nutrition_store.put, name, per_g, ing_id)
+    return per_g
+
+
+async def _per_gram_nutrition(name):
+    # concurrent lookups of one ingredient (across meals and requests) share a fetch
+    return await ingredient_flight.do(canonical_name(name), lambda: _fetch_per_gram(name))
+
+
+async def _lookup_per_gram(names):
+    """
+    Per-ingredient lookups for `names`, run concurrently (bounded by the
+    semaphore, paced by the client's token bucket). Returns (per-gram
+    vectors found, exceptions by name).
+    """
+    semaphore = asyncio.Semaphore(NUTRITION_FANOUT_CONCURRENCY)
 
-    # fallback: no qty
-    return None, s
+    async def bounded_lookup(name):
+        async with semaphore:
+            return await _per_gram_nutrition(name)
 
+    results = await asyncio.gather(*[bounded_lookup(n) for n in names], return_exceptions=True)
+    found, errors = {}, {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            errors[name] = result
+        elif result is not None:
+            found[name] = result
+    return found, errors
 
-@app.post("/nutrition")
-def track_nutrition(req: NutritionRequest):
-    meal_text = (req.meal or "").strip()
-    if not meal_text:
-        raise HTTPException(status_code=400, detail="Meal text required.")
 
-    if not SPOONACULAR_API_KEY:
-        raise HTTPException(
-            status_code=500, detail="SPOONACULAR_API_KEY not set on server")
+async def _upstream_nutrition(meal_text):
+    """
+    Meal totals from Spoonacular. Per-gram values come from one
+    parseIngredients call, then per-ingredient lookups for whatever it
+    could not weigh; amounts always come from the local parser, exactly
+    as for meals answered from the store.
+    """
+    cands = _parse_candidates(meal_text)
+    per_g = {}
 
+    # Attempt 1: parseIngredients (preferred), one line per parsed candidate
+    payload = {"ingredientList": "\n".join(cand for cand, _, _ in cands), "servings": 1}
     try:
-        # Attempt 1: parseIngredients (preferred)
-        parse_url = "https://api.spoonacular.com/recipes/parseIngredients"
-        ingredient_list_payload = meal_text.replace(",", "\n")
-        payload = {"ingredientList": ingredient_list_payload, "servings": 1}
-        resp = requests.post(parse_url, params={
-                             "apiKey": SPOONACULAR_API_KEY}, data=payload, timeout=15)
-        print("parseIngredients status:", resp.status_code)
+        resp = await spoonacular.post("/recipes/parseIngredients", data=payload, timeout=15)
+    except (CircuitOpenError, UpstreamError) as ex:
+        # the per-ingredient routes have their own breakers; try them instead
+        resp = None
+        parsed = None
+        log.info("parse_ingredients_skipped", error=str(ex))
+    if resp is not None:
         try:
             parsed = resp.json()
         except Exception as ex:
             parsed = None
-            print("parseIngredients json decode error:", ex, resp.text)
+            log.warning("parse_ingredients_bad_json", status=resp.status_code, error=str(ex),
+                        body=resp.text[:200])
+
+    if isinstance(parsed, list) and len(parsed) == len(cands):
+        rows = _parsed_per_gram(cands, parsed)
+        if nutrition_store is not None and rows:
+            # stored under the local parser's names, so the next lookup is local
+            await _in_thread(nutrition_store.put_many, rows)
+        per_g = {name: vec for name, vec, _ in rows}
+        log.info("nutrition_source", source="parseIngredients", items=len(parsed), weighed=len(per_g))
+    elif isinstance(parsed, list) and parsed:
+        log.info("parse_ingredients_mismatch", lines=len(cands), items=len(parsed))
+    else:
+        log.info("parse_ingredients_empty", status=getattr(resp, "status_code", None))
+
+    # Fallback: search each remaining ingredient and fetch per-gram nutrition
+    remaining = [name for name in dict.fromkeys(name for _, _, name in cands) if name not in per_g]
+    if remaining:
+        found, errors = await _lookup_per_gram(remaining)
+        if errors:
+            # a partial total must not be cached as the meal's answer
+            raise next(iter(errors.values()))
+        per_g.update(found)
+        log.info("nutrition_source", source="ingredient_lookup", items=len(remaining))
+
+    total, _ = _totals(cands, per_g)
+    if total.any():
+        return {"nutrition": to_dict(total)}
+
+    # final fallback: return zeros (wrapped)
+    log.warning("nutrition_not_found", items=len(cands))
+    return {"nutrition": {"calories": 0, "protein_g": 0, "carbs_g": 0, "fat_g": 0, "fiber_g": 0}}
 
-        if isinstance(parsed, list) and len(parsed) > 0:
-            total = _sum_nutrients_from_spoonacular_items(parsed)
-            if any(v > 0 for v in total.values()):
-                print("Using parseIngredients totals:", total)
-                return {"nutrition": {k: round(v, 1) for k, v in total.items()}}
-            else:
-                print(
-                    "parseIngredients returned items but nutrients are zero; falling back.")
-        else:
-            print("parseIngredients returned empty/invalid:", parsed)
-
-        # Fallback: search each ingredient and fetch per-gram nutrition
-        candidates = [c.strip()
-                      for c in re.split(r'[,\n]+', meal_text) if c.strip()]
-        fallback_total = {"calories": 0.0, "protein_g": 0.0,
-                          "carbs_g": 0.0, "fat_g": 0.0, "fiber_g": 0.0}
-
-        for cand in candidates:
-            grams, name = _parse_quantity_and_name(cand)
-            if grams is None or grams <= 0:
-                grams = 100.0  # default fallback weight
-
-            print(
-                f"Fallback lookup for '{cand}' -> name='{name}' amount={grams}g")
-
-            search_url = "https://api.spoonacular.com/food/ingredients/search"
-            sresp = requests.get(search_url, params={
-                                 "apiKey": SPOONACULAR_API_KEY, "query": name, "number": 1}, timeout=10)
-            print("ingredient search status:", sresp.status_code)
-            if sresp.status_code != 200:
-                print("ingredient search failed:",
-                      sresp.status_code, sresp.text)
-                continue
-            sdata = sresp.json()
-            results = sdata.get("results") or []
-            if len(results) == 0:
-                print("no search result for", name)
-                continue
-            ing_id = results[0].get("id")
-            if not ing_id:
-                print("no id for", name)
-                continue
 
-            info_url = f"https://api.spoonacular.com/food/ingredients/{ing_id}/information"
-            iresp = requests.get(info_url, params={
-                                 "apiKey": SPOONACULAR_API_KEY, "amount": grams, "unit": "grams"}, timeout=10)
-            print("ingredient info status:", iresp.status_code)
-            if iresp.status_code != 200:
-                print("ingredient info failed:", iresp.status_code, iresp.text)
-                continue
-            idata = iresp.json()
-            nutrients = idata.get("nutrition", {}).get("nutrients", []) or []
-            per_item = {"calories": 0.0, "protein_g": 0.0,
-                        "carbs_g": 0.0, "fat_g": 0.0, "fiber_g": 0.0}
-            for n in nutrients:
-                nm = n.get("name", "").lower()
-                amt = n.get("amount", 0) or 0
-                if "calories" in nm:
-                    per_item["calories"] += amt
-                elif "protein" in nm:
-                    per_item["protein_g"] += amt
-                elif "carbohydrates" in nm:
-                    per_item["carbs_g"] += amt
-                elif nm == "fat":
-                    per_item["fat_g"] += amt
-                elif "fiber" in nm:
-                    per_item["fiber_g"] += amt
-
-            print(f"ingredient '{name}' -> {per_item}")
-            fallback_total = _aggregate_dicts(fallback_total, per_item)
-            time.sleep(0.12)  # polite pause for rate limits
-
-        if any(v > 0 for v in fallback_total.values()):
-            print("Returning fallback totals:", fallback_total)
-            return {"nutrition": {k: round(v, 1) for k, v in fallback_total.items()}}
-
-        # final fallback: return zeros (wrapped)
-        print("No nutrient info found. Returning zeros.")
-        return {"nutrition": {"calories": 0, "protein_g": 0, "carbs_g": 0, "fat_g": 0, "fiber_g": 0}}
+@app.post("/nutrition")
+async def track_nutrition(req: NutritionRequest):
+    meal_text = (req.meal or "").strip()
+    if not meal_text:
+        raise HTTPException(status_code=400, detail="Meal text required.")
+
+    if nutrition_store is not None:
+        local_total, missing = await _in_thread(_local_nutrition, meal_text)
+        if NUTRITION_OFFLINE or not missing:
+            return {"nutrition": to_dict(local_total), "missing": missing}
+    elif NUTRITION_OFFLINE:
+        raise HTTPException(
+            status_code=500, detail="NUTRITION_OFFLINE needs a nutrition store")
 
+    if not SPOONACULAR_API_KEY:
+        raise HTTPException(
+            status_code=500, detail="SPOONACULAR_API_KEY not set on server")
+
+    try:
+        # cached per meal text; stale results are served while refreshing
+        key = " ".join(meal_text.lower().split())
+        result, _ = await get_or_fetch(
+            nutrition_cache, nutrition_flight, key,
+            lambda: _upstream_nutrition(meal_text),
+            max_stale=NUTRITION_CACHE_MAX_STALE, log=log)
+        return result
+
+    except (CircuitOpenError, UpstreamError) as e:
+        # upstream is failing: answer what the local store knows (zeros without a store)
+        log.warning("nutrition_degraded", error=str(e))
+        local_total, missing = await _in_thread(_local_nutrition, meal_text)
+        return {"nutrition": to_dict(local_total), "missing": missing, "degraded": True}
     except HTTPException:
         raise
     except Exception as e:
-        print("Unexpected error in /nutrition:", str(e))
+        log.error("nutrition_failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/nutrition/batch")
+async def track_nutrition_batch(req: NutritionBatchRequest):
+    """
+    Per-meal and total macros for a whole log (a day or a week of meals).
+
+    Every line is parsed once, each distinct ingredient is looked up once
+    (local store first, then Spoonacular for the rest) and all meals are
+    totalled in one vectorized pass. Unlike /nutrition this never calls
+    parseIngredients, so numbers always come from per-ingredient data.
+    Ingredients whose lookup failed are listed in "errors" and counted as
+    missing, and the response is marked degraded.
+    """
+    meals = [(m or "").strip() for m in req.meals]
+    if not meals:
+        raise HTTPException(status_code=400, detail="At least one meal required.")
+    if len(meals) > NUTRITION_BATCH_MAX_MEALS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {NUTRITION_BATCH_MAX_MEALS} meals per request.")
+    if NUTRITION_OFFLINE and nutrition_store is None:
+        raise HTTPException(
+            status_code=500, detail="NUTRITION_OFFLINE needs a nutrition store")
+
+    parsed = [_parse_candidates(m) for m in meals]
+    names = list(dict.fromkeys(name for cands in parsed for _, _, name in cands))
+    per_g = await _in_thread(_stored_per_gram, names)
+    to_fetch = [name for name in names if name not in per_g]
+
+    errors = {}
+    if to_fetch and not NUTRITION_OFFLINE:
+        if not SPOONACULAR_API_KEY:
+            raise HTTPException(
+                status_code=500, detail="SPOONACULAR_API_KEY not set on server")
+        found, failed = await _lookup_per_gram(to_fetch)
+        per_g.update(found)
+        for name, error in failed.items():
+            # one failed lookup never fails the batch: keep what was
+            # found and report the rest as missing, with the reason
+            if isinstance(error, (CircuitOpenError, UpstreamError)):
+                log.warning("nutrition_batch_degraded", ingredient=name, error=str(error))
+            else:
+                log.error("nutrition_batch_failed", ingredient=name, error=str(error))
+            errors[name] = str(error) or type(error).__name__
+
+    slot = {name: i for i, name in enumerate(names)}
+    matrix = np.array([per_g.get(name, zeros()) for name in names]).reshape(len(names), N_NUTRIENTS)
+    totals = meal_totals(
+        matrix,
+        np.array([m for m, cands in enumerate(parsed) for _ in cands], dtype=np.intp),
+        np.array([slot[name] for cands in parsed for _, _, name in cands], dtype=np.intp),
+        np.array([grams for cands in parsed for _, grams, _ in cands], dtype=np.float64),
+        len(meals))
+
+    missing = [name for name in names if name not in per_g]
+    missing_set = set(missing)
+    result = {
+        "meals": [{"meal": meal, "nutrition": to_dict(totals[i]),
+                   "missing": list(dict.fromkeys(n for _, _, n in parsed[i] if n in missing_set))}
+                  for i, meal in enumerate(meals)],
+        "total": to_dict(totals.sum(axis=0)),
+        "missing": missing,
+        "distinct_ingredients": len(names),
+        "upstream_lookups": len(to_fetch) if not NUTRITION_OFFLINE else 0,
+    }
+    if errors:
+        result["degraded"] = True
+        result["errors"] = errors
+    return result
+
+
+@app.get("/recipe-generator/cache")
+def recipe_cache_stats():
+    return {**recipe_cache.stats(), "single_flight_shared": recipe_flight.shared}
+
+
+@app.get("/upstream/breakers")
+def upstream_breakers():
+    return {route: b.stats() for route, b in spoonacular.breakers.items()}
+
+
+@app.get("/meal-catalog")
+def meal_catalog_stats():
+    return meal_catalog.stats()
+
+
+@app.get("/nutrition/store")
+def nutrition_store_stats():
+    if nutrition_store is None:
+        return {"enabled": False}
+    return {"enabled": True, "offline": NUTRITION_OFFLINE, **nutrition_store.stats()}
+
+
 @app.post("/meal-schedule")
 def meal_schedule(req: MealScheduleRequest):
     try:
@@ -400,6 +1338,154 @@ def meal_schedule(req: MealScheduleRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/meal-plan")
+def meal_plan(req: MealPlanRequest):
+    if not 1 <= req.days <= MEAL_PLAN_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be 1-{MEAL_PLAN_MAX_DAYS}")
+    try:
+        return generate_plan(req.preferences, days=req.days, meals_per_day=req.meals_per_day,
+                             repeat_window=req.repeat_window, targets=req.targets, seed=req.seed)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/")
 def root():
     return {"message": "FastAPI service running for urgency & pet comfort predictions"}
+
+
+@app.get("/pet_tables")
+def pet_tables():
+    if PET_LOOKUP_TABLES == "off":
+        return {"enabled": False}
+    if not models.is_loaded("pet_tables"):
+        return {"enabled": True, "ready": False}
+    tables = models.get("pet_tables")
+    return {"enabled": True, "ready": True,
+            "tables": {name: t.report for name, t in tables.items()}}
+
+
+@app.get("/ready")
+def ready():
+    status = models.status()
+    if models.is_ready():
+        return {"ready": True, "models": status}
+    return JSONResponse(status_code=503, content={"ready": False, "models": status})
+
+
+# Which models answer each endpoint, for reporting active versions
+ENDPOINT_MODELS = {
+    "/predict_urgency": ["urgency"],
+    "/predict_urgency_batch": ["urgency"],
+    "/notes": ["urgency"],
+    "/predict_pet_comfort": ["pet_comfort", "pet_tables"],
+    "/ws/pet_comfort": ["pet_comfort"],
+    "/stream/pet_comfort": ["pet_comfort"],
+    "/predict_pet_health": ["pet_health", "pet_tables"],
+    "/recommend_pet_diet": ["pet_diet", "pet_tables"],
+    "/predict_pet_health_batch": ["pet_health", "pet_tables"],
+    "/recommend_pet_diet_batch": ["pet_diet", "pet_tables"],
+}
+
+
+def _check_admin(token):
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled; set MODEL_ADMIN_TOKEN")
+    if token is None or not hmac.compare_digest(token.encode(), MODEL_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _registered(name):
+    if name not in models.status():
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+
+
+@app.get("/models")
+def list_models():
+    status = models.status()
+    endpoints = {
+        endpoint: {name: models.version(name) for name in names if name in status}
+        for endpoint, names in ENDPOINT_MODELS.items()
+    }
+    return {"models": status, "endpoints": endpoints, "watch_seconds": MODEL_WATCH_SECONDS}
+
+
+@app.post("/models/{name}/reload")
+async def reload_model(name: str, req: Optional[ModelReloadRequest] = None,
+                       x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    _registered(name)
+    try:
+        version = await asyncio.wrap_future(models.reload(name, req.version if req else None))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Reload of '{name}' rejected: {e}")
+    if version is None and models.status()[name].get("reload_state") == "loading":
+        raise HTTPException(status_code=409, detail=f"A reload of '{name}' is already running")
+    return {"model": name, "version": models.version(name), "status": models.status()[name]}
+
+
+@app.post("/models/{name}/rollback")
+def rollback_model(name: str, x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    _registered(name)
+    try:
+        version = models.rollback(name)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"model": name, "version": version, "status": models.status()[name]}
+
+
+@metrics.collector
+def _cache_metrics():
+    caches = {
+        "recipe": recipe_cache.stats(),
+        "nutrition": nutrition_cache.stats(),
+        "embedding": embedding_cache_stats(),
+        "nutrition_store": nutrition_store.stats() if nutrition_store is not None else None,
+    }
+    for stats in caches.values():
+        if stats is not None:
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+            stats.setdefault("entries", stats.get("ingredients"))
+    yield render_stats("cache_hits_total", "Cache hits", "counter", "cache", caches, "hits")
+    yield render_stats("cache_misses_total", "Cache misses", "counter", "cache", caches, "misses")
+    yield render_stats("cache_hit_ratio", "Cache hits / lookups since start", "gauge", "cache", caches, "hit_ratio")
+    yield render_stats("cache_entries", "Entries held by each cache", "gauge", "cache", caches, "entries")
+
+
+@metrics.collector
+def _service_metrics():
+    breakers = {route: b.stats() for route, b in spoonacular.breakers.items()}
+    yield ("upstream_requests_in_flight", "gauge", "Spoonacular calls awaiting a response",
+           [({}, spoonacular.in_flight)])
+    yield ("upstream_breaker_open", "gauge", "1 while a route's circuit breaker is not closed",
+           [({"route": r}, int(s["state"] != "closed")) for r, s in breakers.items()])
+    yield render_stats("upstream_breaker_trips_total", "Circuit breaker trips", "counter",
+                       "route", breakers, "trips")
+    status = models.status()
+    yield ("model_ready", "gauge", "1 when the model is loaded",
+           [({"model": m}, int(s["state"] == "ready")) for m, s in status.items()])
+    yield render_stats("model_version", "Active artifact version", "gauge", "model", status, "version")
+    yield ("urgency_batches_total", "counter", "Micro-batches scored",
+           [({}, urgency_batcher.batches_run)])
+    yield ("urgency_batch_items_total", "counter", "Notes scored in micro-batches",
+           [({}, urgency_batcher.items_run)])
+    notes = note_index.stats()
+    yield ("note_index_notes", "gauge", "Notes in the similarity index", [({}, notes["notes"])])
+    yield ("note_index_queries_total", "counter", "Note similarity queries", [({}, notes["queries"])])
+    stream = comfort_stream.stats()
+    yield ("pet_stream_connections", "gauge", "Open pet comfort streams", [({}, stream["connections"])])
+    yield ("pet_stream_pets", "gauge", "Pets with a live comfort window", [({}, stream["pets"])])
+    yield ("pet_stream_readings_total", "counter", "Sensor readings by outcome",
+           [({"result": "accepted"}, stream["readings"]), ({"result": "rejected"}, stream["rejected"])])
+    yield ("pet_stream_batches_total", "counter", "Comfort micro-batches scored", [({}, stream["batches"])])
+    yield ("pet_stream_changes_total", "counter", "Comfort level changes sent", [({}, stream["changes"])])
+    log_stats = log.stats()
+    yield ("log_events_total", "counter", "Log events by outcome",
+           [({"result": r}, log_stats[r]) for r in ("written", "sampled_out", "dropped")])
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
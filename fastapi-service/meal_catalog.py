@@ -0,0 +1,270 @@
+# meal_catalog.py
+import json
+import mmap
+import os
+from collections.abc import Sequence
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from event_log import NULL_LOG
+from meal_scheduler import MACRO_KEYS, MEAL_MACROS, VEG_MEALS_DB
+
+MAGIC = b"MEALCAT1"
+ALIGN = 64
+
+
+def normalize_ingredient(name: str) -> str:
+    return " ".join(str(name).lower().split())
+
+
+class MealView(Sequence):
+    """Read-only sequence of meal dicts over some catalog rows, built on access."""
+
+    def __init__(self, catalog: "MealCatalog", rows: np.ndarray):
+        self.catalog = catalog
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.catalog.meal(int(r)) for r in self.rows[i]]
+        return self.catalog.meal(int(self.rows[i]))
+
+
+class MealCatalog:
+    """
+    Columnar meal catalog with interned ingredient ids.
+
+    Meals, ingredient names and an ingredient -> meals inverted index are
+    stored as flat arrays (CSR offsets + values, UTF-8 blobs for strings).
+    `open` memory-maps a catalog file read-only, so opening is a header
+    parse and every worker shares the same page-cache pages instead of
+    holding its own copy. `from_db` builds the same arrays in memory from
+    a VEG_MEALS_DB-style dict.
+
+    File layout: MAGIC, uint32 header length, JSON header
+    ({"arrays": {name: [dtype, shape, offset]}, "categories": [...], ...}),
+    then each array at a 64-byte aligned offset.
+    """
+
+    ARRAYS = ("meal_offsets", "meal_ingredients", "meal_category", "macros",
+              "name_offsets", "name_blob", "ingredient_offsets", "ingredient_blob",
+              "posting_offsets", "postings")
+
+    def __init__(self, arrays: Dict[str, np.ndarray], categories: List[str],
+                 path: Optional[str] = None, mm: Optional[mmap.mmap] = None):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.categories = list(categories)
+        self.path = path
+        self._mmap = mm
+        self._ingredient_names: Optional[List[str]] = None
+        self._category_rows: Dict[str, np.ndarray] = {}
+
+    # --- building -----------------------------------------------------
+
+    @classmethod
+    def from_db(cls, db: Mapping[str, Sequence] = VEG_MEALS_DB) -> "MealCatalog":
+        categories = list(db)
+        ids: Dict[str, int] = {}
+        meal_offsets, meal_ingredients, meal_category, macros, names = [0], [], [], [], []
+        for c, category in enumerate(categories):
+            for meal in db[category]:
+                row = dict.fromkeys(ids.setdefault(normalize_ingredient(ing), len(ids))
+                                    for ing in meal["ingredients"])
+                meal_ingredients += row
+                meal_offsets.append(len(meal_ingredients))
+                meal_category.append(c)
+                names.append(meal["name"])
+                known = meal.get("macros") or MEAL_MACROS.get(meal["name"])
+                if isinstance(known, Mapping):
+                    known = [known.get(k, 0) for k in MACRO_KEYS]
+                macros.append(known if known is not None else [np.nan] * len(MACRO_KEYS))
+
+        meal_offsets = np.array(meal_offsets, dtype=np.uint32)
+        meal_ingredients = np.array(meal_ingredients, dtype=np.uint32)
+        # inverted index: meals of ingredient i are postings[posting_offsets[i]:posting_offsets[i + 1]]
+        owners = np.repeat(np.arange(len(names), dtype=np.uint32), np.diff(meal_offsets))
+        order = np.argsort(meal_ingredients, kind="stable")
+        posting_offsets = np.zeros(len(ids) + 1, dtype=np.uint32)
+        posting_offsets[1:] = np.cumsum(np.bincount(meal_ingredients, minlength=len(ids)))
+        name_offsets, name_blob = _pack_strings(names)
+        ingredient_offsets, ingredient_blob = _pack_strings(list(ids))
+        return cls({
+            "meal_offsets": meal_offsets,
+            "meal_ingredients": meal_ingredients,
+            "meal_category": np.array(meal_category, dtype=np.uint16),
+            "macros": np.array(macros, dtype=np.float32).reshape(len(names), len(MACRO_KEYS)),
+            "name_offsets": name_offsets,
+            "name_blob": name_blob,
+            "ingredient_offsets": ingredient_offsets,
+            "ingredient_blob": ingredient_blob,
+            "posting_offsets": posting_offsets,
+            "postings": owners[order],
+        }, categories)
+
+    def save(self, path: str):
+        header = {"version": 1, "meals": len(self), "ingredients": self.n_ingredients,
+                  "categories": self.categories, "macro_keys": list(MACRO_KEYS), "arrays": {}}
+        offset = 0
+        for name in self.ARRAYS:
+            arr = np.ascontiguousarray(getattr(self, name))
+            header["arrays"][name] = [arr.dtype.str, list(arr.shape), offset]
+            offset += -(-arr.nbytes // ALIGN) * ALIGN
+        blob = json.dumps(header).encode("utf-8")
+        start = -(-(len(MAGIC) + 4 + len(blob)) // ALIGN) * ALIGN
+
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + np.uint32(len(blob)).tobytes() + blob)
+            for name in self.ARRAYS:
+                f.seek(start + header["arrays"][name][2])
+                f.write(np.ascontiguousarray(getattr(self, name)).tobytes())
+            f.truncate(start + offset)
+        os.replace(tmp, path)  # readers never see a half-written catalog
+
+    # --- loading ------------------------------------------------------
+
+    @classmethod
+    def open(cls, path: str) -> "MealCatalog":
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a meal catalog")
+        size = int(np.frombuffer(mm, dtype=np.uint32, count=1, offset=len(MAGIC))[0])
+        header = json.loads(mm[len(MAGIC) + 4:len(MAGIC) + 4 + size])
+        if header.get("macro_keys") != list(MACRO_KEYS):
+            raise ValueError(f"{path} has macros {header.get('macro_keys')}, expected {list(MACRO_KEYS)}")
+        start = -(-(len(MAGIC) + 4 + size) // ALIGN) * ALIGN
+        arrays = {}
+        for name, (dtype, shape, offset) in header["arrays"].items():
+            count = int(np.prod(shape))
+            arrays[name] = np.frombuffer(mm, dtype=dtype, count=count,
+                                         offset=start + offset).reshape(shape)
+        return cls(arrays, header["categories"], path=path, mm=mm)
+
+    # --- access -------------------------------------------------------
+
+    def __len__(self):
+        return len(self.meal_offsets) - 1
+
+    @property
+    def n_ingredients(self) -> int:
+        return len(self.ingredient_offsets) - 1
+
+    @property
+    def ingredient_names(self) -> List[str]:
+        # decoded once, on first use; the vocabulary is far smaller than the meal list
+        if self._ingredient_names is None:
+            self._ingredient_names = _unpack_strings(self.ingredient_offsets, self.ingredient_blob)
+        return self._ingredient_names
+
+    def ingredient_ids(self, row: int) -> np.ndarray:
+        return self.meal_ingredients[self.meal_offsets[row]:self.meal_offsets[row + 1]]
+
+    def meals_with(self, ingredient_id: int) -> np.ndarray:
+        return self.postings[self.posting_offsets[ingredient_id]:self.posting_offsets[ingredient_id + 1]]
+
+    def name(self, row: int) -> str:
+        return bytes(self.name_blob[self.name_offsets[row]:self.name_offsets[row + 1]]).decode("utf-8")
+
+    def category(self, row: int) -> str:
+        return self.categories[self.meal_category[row]]
+
+    def meal(self, row: int) -> Dict:
+        names = self.ingredient_names
+        macros = self.macros[row]
+        return {
+            "name": self.name(row),
+            "ingredients": [names[i] for i in self.ingredient_ids(row)],
+            "macros": None if np.isnan(macros).any() else dict(zip(MACRO_KEYS, macros.tolist())),
+        }
+
+    def category_rows(self, category: str) -> np.ndarray:
+        if category not in self._category_rows:
+            code = self.categories.index(category)
+            self._category_rows[category] = np.flatnonzero(self.meal_category == code)
+        return self._category_rows[category]
+
+    def by_category(self) -> Dict[str, MealView]:
+        """{category: lazy sequence of meal dicts}, a drop-in for VEG_MEALS_DB."""
+        return {c: MealView(self, self.category_rows(c)) for c in self.categories}
+
+    def stats(self) -> Dict:
+        return {
+            "source": self.path or "built-in",
+            "memory_mapped": self._mmap is not None,
+            "meals": len(self),
+            "ingredients": self.n_ingredients,
+            "categories": self.categories,
+            "bytes": sum(getattr(self, name).nbytes for name in self.ARRAYS),
+        }
+
+
+def _pack_strings(strings: List[str]):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _unpack_strings(offsets: np.ndarray, blob: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def load_catalog(path: Optional[str], log=None) -> MealCatalog:
+    """The catalog file at `path` if there is one, else the built-in VEG_MEALS_DB."""
+    if path and os.path.exists(path):
+        return MealCatalog.open(path)
+    if path:
+        (log or NULL_LOG).warning("meal_catalog_missing", path=path, using="builtin")
+    return MealCatalog.from_db(VEG_MEALS_DB)
+
+
+def _read_source(path: str) -> Dict[str, List[Dict]]:
+    """VEG_MEALS_DB-shaped JSON, or CSV with name, category, ingredients ("a|b|c") and optional macros."""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    import csv
+
+    db: Dict[str, List[Dict]] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            meal = {"name": r["name"], "ingredients": [i for i in r["ingredients"].split("|") if i.strip()]}
+            if all(r.get(k) not in (None, "") for k in MACRO_KEYS):
+                meal["macros"] = {k: float(r[k]) for k in MACRO_KEYS}
+            db.setdefault(r.get("category") or "vegetarian", []).append(meal)
+    return db
+
+
+if __name__ == "__main__":
+    # python meal_catalog.py build meals.json|meals.csv|builtin meals.mealcat
+    # python meal_catalog.py info meals.mealcat
+    import sys
+    import time
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ("build", "info"):
+        print("usage: python meal_catalog.py build <meals.json|meals.csv|builtin> <out.mealcat>\n"
+              "       python meal_catalog.py info <catalog.mealcat>")
+        sys.exit(1)
+    if sys.argv[1] == "build":
+        if len(sys.argv) < 4:
+            print("build needs a source and an output path")
+            sys.exit(1)
+        source = VEG_MEALS_DB if sys.argv[2] == "builtin" else _read_source(sys.argv[2])
+        start = time.perf_counter()
+        catalog = MealCatalog.from_db(source)
+        catalog.save(sys.argv[3])
+        print(f"Wrote {len(catalog)} meals / {catalog.n_ingredients} ingredients to {sys.argv[3]} "
+              f"({os.path.getsize(sys.argv[3]) / 1e6:.2f} MB) in {time.perf_counter() - start:.2f}s")
+    else:
+        start = time.perf_counter()
+        catalog = MealCatalog.open(sys.argv[2])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(json.dumps({**catalog.stats(), "open_ms": round(elapsed_ms, 2)}, indent=2))
@@ -1,7 +1,11 @@
 # meal_scheduler.py
 import random
-from datetime import datetime
-from typing import List, Dict
+import zlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
 
 # Large vegetarian meals database
 VEG_MEALS_DB = {
@@ -94,19 +98,85 @@ VEG_MEALS_DB = {
 }
 
 
+MACRO_KEYS = ("calories", "protein_g", "carbs_g", "fat_g")
+
+# Rough per-serving estimates (calories, protein_g, carbs_g, fat_g) used for
+# macro targets; a catalog meal may carry its own "macros" dict instead
+MEAL_MACROS = {
+    "Oatmeal with Fruits": (380, 12, 60, 11),
+    "Quinoa Salad": (420, 12, 50, 19),
+    "Grilled Veggies with Tofu": (350, 20, 18, 22),
+    "Greek Yogurt with Berries": (250, 17, 35, 5),
+    "Lentil Soup": (330, 18, 52, 5),
+    "Veggie Stir Fry": (260, 9, 34, 10),
+    "Chickpea Curry": (450, 17, 60, 16),
+    "Paneer Tikka": (420, 24, 14, 30),
+    "Spinach Soup": (220, 6, 14, 16),
+    "Mushroom Risotto": (520, 14, 72, 18),
+    "Stuffed Zucchini Boats": (300, 15, 20, 18),
+    "Sweet Potato Curry": (430, 6, 52, 23),
+    "Vegetable Paella": (480, 11, 88, 9),
+    "Caprese Salad": (320, 15, 8, 25),
+    "Veggie Burger": (520, 20, 70, 17),
+    "Cabbage Soup": (150, 5, 28, 3),
+    "Falafel Wrap": (550, 18, 70, 22),
+    "Vegetable Lasagna": (540, 26, 56, 23),
+    "Butternut Squash Soup": (280, 5, 32, 16),
+    "Avocado Toast": (380, 9, 38, 22),
+    "Zucchini Noodles with Pesto": (320, 11, 12, 26),
+    "Tofu & Veggie Stir Fry": (310, 21, 16, 18),
+    "Cauliflower Rice Bowl": (210, 8, 28, 8),
+    "Eggplant Parmesan": (420, 22, 24, 26),
+    "Avocado Salad": (350, 6, 16, 31),
+    "Mushroom Lettuce Wraps": (180, 9, 14, 10),
+    "Paneer Salad": (390, 21, 10, 30),
+    "Broccoli Soup": (260, 8, 16, 19),
+    "Stuffed Bell Peppers": (330, 11, 46, 11),
+    "Cabbage Stir Fry": (170, 4, 20, 9),
+    "Protein Smoothie": (520, 40, 52, 18),
+    "Tofu Quinoa Bowl": (480, 28, 45, 21),
+    "Paneer & Spinach Stir Fry": (450, 26, 10, 35),
+    "Chickpea & Veggie Bowl": (420, 17, 52, 16),
+    "Lentil & Veggie Salad": (400, 20, 48, 15),
+    "Greek Yogurt Parfait": (360, 24, 30, 16),
+    "Edamame Salad": (330, 19, 16, 22),
+    "Peanut Butter Oatmeal": (560, 22, 66, 24),
+    "Cottage Cheese Salad": (300, 26, 14, 16),
+    "Seitan Stir Fry": (420, 45, 28, 14),
+}
+# the meals every planner reads; use_meal_db swaps in an external catalog
+_meal_db: Mapping[str, Sequence[Dict]] = VEG_MEALS_DB
+
+
+def meal_db() -> Mapping[str, Sequence[Dict]]:
+    return _meal_db
+
+
+def use_meal_db(db: Mapping[str, Sequence[Dict]]):
+    """Plan from `db` ({category: meals}, e.g. MealCatalog.by_category()) instead of VEG_MEALS_DB."""
+    global _meal_db
+    _meal_db = db
+    _preference_catalog.cache_clear()
+
+
+def _preference(preference: str) -> str:
+    preference = preference.lower()
+    if preference in _meal_db:
+        return preference
+    return "vegetarian" if "vegetarian" in _meal_db else next(iter(_meal_db))
+
+
 def generate_daily_schedule(preference: str = "vegetarian", meals_per_day: int = 3) -> Dict:
     """
     Returns today's meal schedule and shopping list
     """
-    preference = preference.lower()
-    if preference not in VEG_MEALS_DB:
-        preference = "vegetarian"
+    preference = _preference(preference)
 
     # Get today's day name, e.g., "Wednesday"
     today = datetime.today().strftime("%A")
 
-    daily_meals = random.sample(VEG_MEALS_DB[preference], k=min(
-        meals_per_day, len(VEG_MEALS_DB[preference])))
+    daily_meals = random.sample(_meal_db[preference], k=min(
+        meals_per_day, len(_meal_db[preference])))
 
     schedule = {
         today: [
@@ -122,3 +192,247 @@ def generate_daily_schedule(preference: str = "vegetarian", meals_per_day: int =
                 ing, 0) + 1  # count occurrence
 
     return {"schedule": schedule, "shopping_list": shopping_list}
+
+
+class CompiledCatalog:
+    """
+    A meal list prepared for planning: ingredients interned to ids, an
+    inverted ingredient -> meals index (both as CSR offsets + values) and
+    a (meals x 4) macro matrix. Compile once and reuse it for every
+    household. `from_meal_catalog` builds one from a MealCatalog's columns
+    without decoding its meals; only the meals a plan picks become dicts.
+    """
+
+    def __init__(self, meals: Sequence[Dict]):
+        if not meals:
+            raise ValueError("catalog has no meals")
+        self._meals = list(meals)
+        ids: Dict[str, int] = {}
+        offsets, flat = [0], []
+        macros = np.full((len(self._meals), len(MACRO_KEYS)), np.nan)
+        for i, m in enumerate(self._meals):
+            flat += dict.fromkeys(ids.setdefault(ing, len(ids)) for ing in m["ingredients"])
+            offsets.append(len(flat))
+            known = m.get("macros") or MEAL_MACROS.get(m["name"])
+            if isinstance(known, dict):
+                known = [known.get(k, 0) for k in MACRO_KEYS]
+            if known is not None:
+                macros[i] = known
+        meal_offsets = np.array(offsets, dtype=np.int64)
+        meal_ingredients = np.array(flat, dtype=np.intp)
+        owners = np.repeat(np.arange(len(self._meals), dtype=np.intp), np.diff(meal_offsets))
+        posting_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        posting_offsets[1:] = np.cumsum(np.bincount(meal_ingredients, minlength=len(ids)))
+        self._index(meal_offsets, meal_ingredients, posting_offsets,
+                    owners[np.argsort(meal_ingredients, kind="stable")], list(ids), macros)
+
+    @classmethod
+    def from_meal_catalog(cls, catalog, rows: Optional[np.ndarray] = None) -> "CompiledCatalog":
+        """
+        Plan over `rows` of a MealCatalog (all of them by default). The
+        catalog's ingredient ids, postings and macros are used as they are
+        (sliced to `rows`), so a memory-mapped catalog is not copied meal
+        by meal into every worker.
+        """
+        self = cls.__new__(cls)
+        self._meals = None
+        self._source = catalog
+        n_ingredients = catalog.n_ingredients
+        if rows is not None and len(rows) == len(catalog) and np.array_equal(rows, np.arange(len(catalog))):
+            rows = None  # one category holds every meal: nothing to slice
+        if rows is None:
+            self._rows = None
+            meal_offsets, meal_ingredients = catalog.meal_offsets, catalog.meal_ingredients
+            posting_offsets, postings = catalog.posting_offsets, catalog.postings
+            macros = catalog.macros
+        else:
+            self._rows = rows = np.asarray(rows, dtype=np.intp)
+            starts = catalog.meal_offsets[rows].astype(np.int64)
+            sizes = catalog.meal_offsets[rows + 1].astype(np.int64) - starts
+            meal_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            meal_offsets[1:] = np.cumsum(sizes)
+            meal_ingredients = catalog.meal_ingredients[
+                np.repeat(starts - meal_offsets[:-1], sizes) + np.arange(meal_offsets[-1])]
+            # postings of meals outside `rows` are dropped; the rest are renumbered
+            local = np.full(len(catalog), -1, dtype=np.intp)
+            local[rows] = np.arange(len(rows))
+            owners = local[catalog.postings]
+            keep = owners >= 0
+            owner_ingredient = np.repeat(np.arange(n_ingredients), np.diff(catalog.posting_offsets))
+            posting_offsets = np.zeros(n_ingredients + 1, dtype=np.int64)
+            posting_offsets[1:] = np.cumsum(np.bincount(owner_ingredient[keep], minlength=n_ingredients))
+            postings = owners[keep]
+            macros = catalog.macros[rows]
+        if len(meal_offsets) < 2:
+            raise ValueError("catalog has no meals")
+        self._index(meal_offsets, meal_ingredients, posting_offsets, postings,
+                    catalog.ingredient_names, macros)
+        return self
+
+    def _index(self, meal_offsets, meal_ingredients, posting_offsets, postings, ingredients, macros):
+        self.meal_offsets = meal_offsets
+        self.meal_ingredients = meal_ingredients
+        self.posting_offsets = posting_offsets
+        self.postings = postings
+        self.ingredients: Sequence[str] = ingredients
+        self.sizes = np.diff(np.asarray(meal_offsets, dtype=np.int64)).astype(np.float64)
+        macros = np.asarray(macros, dtype=np.float64)
+        # meals without an estimate count as a typical meal of this catalog
+        fill = np.nanmedian(macros, axis=0) if not np.isnan(macros).all() else np.zeros(len(MACRO_KEYS))
+        self.macros = np.where(np.isnan(macros), fill, macros)
+
+    def ingredient_ids(self, meal: int) -> np.ndarray:
+        return self.meal_ingredients[self.meal_offsets[meal]:self.meal_offsets[meal + 1]]
+
+    def meals_with(self, ingredient: int) -> np.ndarray:
+        return self.postings[self.posting_offsets[ingredient]:self.posting_offsets[ingredient + 1]]
+
+    def meal(self, meal: int) -> Dict:
+        if self._meals is not None:
+            return self._meals[meal]
+        return self._source.meal(meal if self._rows is None else int(self._rows[meal]))
+
+    def __len__(self):
+        return len(self.meal_offsets) - 1
+
+
+def compile_meals(meals) -> CompiledCatalog:
+    """A CompiledCatalog for a list of meal dicts, a MealCatalog or one of its MealViews."""
+    from meal_catalog import MealCatalog, MealView  # meal_catalog imports this module
+
+    if isinstance(meals, MealCatalog):
+        return CompiledCatalog.from_meal_catalog(meals)
+    if isinstance(meals, MealView):
+        return CompiledCatalog.from_meal_catalog(meals.catalog, meals.rows)
+    return CompiledCatalog(meals)
+
+
+@lru_cache(maxsize=None)
+def _preference_catalog(preference: str) -> CompiledCatalog:
+    return compile_meals(_meal_db[preference])
+
+
+def generate_plan(preference: str = "vegetarian", days: int = 7, meals_per_day: int = 3,
+                  repeat_window: int = 3, targets: Optional[Dict[str, float]] = None,
+                  seed: Optional[int] = None, start_date: Optional[date] = None,
+                  catalog: Union[CompiledCatalog, Sequence[Dict], None] = None,
+                  overlap_weight: float = 1.0, macro_weight: float = 1.0,
+                  variety: float = 0.3) -> Dict:
+    """
+    Multi-day plan built greedily slot by slot. Each slot takes the
+    highest-scoring meal that was not served in the last `repeat_window`
+    days; the score rewards ingredients already on the shopping list
+    (a shorter list), penalizes distance from the share of the daily
+    `targets` ({"calories": ..., "protein_g": ...}) still to be filled,
+    and adds a little seeded noise (`variety`) so plans differ between
+    seeds. The same seed always gives the same plan. `catalog` (meal
+    dicts, a MealCatalog or a CompiledCatalog) overrides `preference`.
+    """
+    if catalog is None:
+        catalog = _preference_catalog(_preference(preference))
+    elif not isinstance(catalog, CompiledCatalog):
+        catalog = compile_meals(catalog)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    rng = np.random.default_rng(seed)
+    start_date = start_date or datetime.today().date()
+
+    n = len(catalog)
+    meals_per_day = max(1, min(int(meals_per_day), n))
+    window = max(1, int(repeat_window))
+    target = None
+    if targets:
+        target = np.array([float(targets.get(k, 0) or 0) for k in MACRO_KEYS])
+        scale = np.where(target > 0, target, np.inf)  # untargeted macros add no penalty
+    max_size = catalog.sizes.max()
+
+    last_used = np.full(n, -window, dtype=np.int64)
+    overlap = np.zeros(n)  # ingredients of each meal already on the list
+    on_list = np.zeros(len(catalog.ingredients), dtype=bool)
+    counts = np.zeros(len(catalog.ingredients), dtype=np.int64)
+    first_seen: List[int] = []
+
+    schedule, daily_macros = {}, {}
+    for day in range(int(days)):
+        day_total = np.zeros(len(MACRO_KEYS))
+        picks = []
+        for slot in range(meals_per_day):
+            blocked = day - last_used < window
+            if blocked.all():
+                # catalog too small for the window: only avoid same-day repeats
+                blocked = last_used == day
+            score = overlap_weight * (2 * overlap - catalog.sizes) / max_size
+            if target is not None:
+                ideal = (target - day_total) / (meals_per_day - slot)
+                score -= macro_weight * (np.abs(catalog.macros - ideal) / scale).mean(axis=1)
+            if variety:
+                score += variety * rng.random(n)
+            score[blocked] = -np.inf
+            m = int(np.argmax(score))
+
+            picks.append(m)
+            last_used[m] = day
+            day_total += catalog.macros[m]
+            for ing in catalog.ingredient_ids(m):
+                counts[ing] += 1
+                if not on_list[ing]:
+                    on_list[ing] = True
+                    first_seen.append(ing)
+                    overlap[catalog.meals_with(ing)] += 1
+
+        label = (start_date + timedelta(days=day)).isoformat()
+        meals = [catalog.meal(m) for m in picks]
+        schedule[label] = [{"meal": m["name"], "ingredients": m["ingredients"]} for m in meals]
+        daily_macros[label] = {k: round(float(v), 1) for k, v in zip(MACRO_KEYS, day_total)}
+
+    plan = {
+        "schedule": schedule,
+        "shopping_list": {catalog.ingredients[i]: int(counts[i]) for i in first_seen},
+        "daily_macros": daily_macros,
+        "seed": seed,
+    }
+    if targets:
+        plan["targets"] = dict(targets)
+    return plan
+
+
+def household_seed(seed: int, household_id) -> int:
+    """Per-household seed that does not depend on batch order."""
+    return int(np.random.SeedSequence([seed, zlib.crc32(str(household_id).encode())]).generate_state(1)[0])
+
+
+def generate_plans(households: Iterable[Dict], seed: int = 0, **defaults) -> Dict:
+    """
+    Plans for many households in one call, e.g. a nightly batch job. Each
+    household is a dict with an "id" plus any generate_plan argument
+    ("preference", "days", "targets", ...); `defaults` fill the rest.
+    """
+    plans = {}
+    for household in households:
+        options = {**defaults, **{k: v for k, v in household.items() if k != "id"}}
+        options.setdefault("seed", household_seed(seed, household["id"]))
+        plans[household["id"]] = generate_plan(**options)
+    return plans
+
+
+if __name__ == "__main__":
+    # python meal_scheduler.py households.jsonl plans.jsonl [--seed 0] [--days 7]
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("households", help="JSON lines, one household per line")
+    parser.add_argument("out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    with open(args.households, encoding="utf-8") as f:
+        households = [json.loads(line) for line in f if line.strip()]
+    start = time.perf_counter()
+    plans = generate_plans(households, seed=args.seed, days=args.days)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for household_id, plan in plans.items():
+            f.write(json.dumps({"id": household_id, **plan}) + "\n")
+    print(f"Planned {len(plans)} households in {time.perf_counter() - start:.2f}s -> {args.out}")
@@ -0,0 +1,330 @@
+# model_registry.py
+import importlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from event_log import NULL_LOG
+
+
+class ModelNotReady(Exception):
+    pass
+
+
+class ArtifactVersions:
+    """
+    The versions of one model on disk: `<directory>/model-vNNNN.pkl` (as
+    written by train_model.py). When the directory has none, `fallback`
+    (e.g. model.pkl) is the only version, numbered 0.
+    """
+
+    PATTERN = re.compile(r"^model-v(\d+)\.pkl$")
+
+    def __init__(self, directory: str, fallback: Optional[str] = None):
+        self.directory = directory
+        self.fallback = fallback
+
+    def available(self) -> Dict[int, str]:
+        versions = {}
+        if os.path.isdir(self.directory):
+            for entry in os.listdir(self.directory):
+                m = self.PATTERN.match(entry)
+                if m:
+                    versions[int(m.group(1))] = os.path.join(self.directory, entry)
+        if not versions and self.fallback and os.path.exists(self.fallback):
+            versions[0] = self.fallback
+        return versions
+
+    def latest(self) -> Optional[int]:
+        versions = self.available()
+        return max(versions) if versions else None
+
+
+class ModelRegistry:
+    """
+    Loads model artifacts in a thread pool, either all at once in the
+    background (`load_all`) or on first use (`get`), and records per-model
+    load state and timings.
+
+    `warm_imports` are imported once, serially, before any artifact is
+    unpickled: importing packages such as sklearn from several threads at
+    the same time can fail with partially initialized module errors.
+
+    Models registered with `versions` can be replaced while serving:
+    `reload` loads a version in the background, runs the model's
+    `validate` smoke check on it and only then swaps it in, so requests
+    never see a half-loaded model and in-flight ones finish on the object
+    they already hold. The replaced model is kept for an instant
+    `rollback`. `watch` polls for new versions and reloads them; versions
+    that fail validation or were rolled back are not retried
+    automatically. Models listed in another's `depends_on` trigger its
+    reload when they change.
+
+    Loads, swaps, rejections and rollbacks are reported to `log` (an
+    EventLog).
+    """
+
+    def __init__(self, max_workers: int = 4, warm_imports: Iterable[str] = (), log=None):
+        self._loaders: Dict[str, Callable[..., Any]] = {}
+        self._versions: Dict[str, ArtifactVersions] = {}
+        self._validators: Dict[str, Callable[[Any], None]] = {}
+        self._dependents: Dict[str, list] = {}
+        self._futures: Dict[str, Future] = {}
+        self._status: Dict[str, Dict] = {}
+        self._active: Dict[str, tuple] = {}    # name -> (version, model)
+        self._previous: Dict[str, tuple] = {}
+        self._rejected: Dict[str, Dict[int, str]] = {}
+        self._reloading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._import_lock = threading.Lock()
+        self._warm_imports = list(warm_imports)
+        self.log = log or NULL_LOG
+        self._imported = False
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="model-loader")
+
+    def register(self, name: str, loader: Callable[..., Any],
+                 versions: Optional[ArtifactVersions] = None,
+                 validate: Optional[Callable[[Any], None]] = None,
+                 depends_on: Iterable[str] = ()):
+        """`loader()` builds the model; with `versions` it is called as `loader(path)`."""
+        self._loaders[name] = loader
+        if versions is not None:
+            self._versions[name] = versions
+        if validate is not None:
+            self._validators[name] = validate
+        for dependency in depends_on:
+            self._dependents.setdefault(dependency, []).append(name)
+        self._rejected[name] = {}
+        self._reloading[name] = threading.Lock()
+        self._status[name] = {"state": "pending", "load_seconds": None, "error": None,
+                              "version": None, "previous_version": None, "loaded_at": None}
+
+    def _import_once(self):
+        with self._import_lock:
+            if not self._imported:
+                for module in self._warm_imports:
+                    importlib.import_module(module)
+                self._imported = True
+
+    def _build(self, name: str, version: Optional[int], strict: bool = True):
+        self._import_once()
+        if name not in self._versions:
+            return None, self._loaders[name]()
+        available = self._versions[name].available()
+        if not available:
+            raise FileNotFoundError(f"no artifact for '{name}' in {self._versions[name].directory}")
+        version = max(available) if version is None else version
+        if version not in available:
+            raise FileNotFoundError(f"'{name}' has no version {version}")
+        model = self._loaders[name](available[version])
+        if name in self._validators:
+            try:
+                self._validators[name](model)
+            except Exception as e:
+                if strict:
+                    raise
+                # at startup a model that fails its smoke check still beats no model
+                self._status[name]["smoke_error"] = str(e)
+                self.log.warning("model_smoke_check_failed", model=name, version=version, error=str(e))
+            else:
+                self._status[name]["smoke_error"] = None
+        return version, model
+
+    def _swap(self, name: str, version: Optional[int], model: Any):
+        with self._lock:
+            if name in self._active:
+                self._previous[name] = self._active[name]
+            self._active[name] = (version, model)
+            previous = self._previous.get(name, (None, None))[0]
+        self._status[name].update(version=version, previous_version=previous,
+                                  loaded_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    def _load(self, name: str):
+        self._status[name]["state"] = "loading"
+        start = time.perf_counter()
+        try:
+            version, obj = self._build(name, None, strict=False)
+        except Exception as e:
+            self._status[name].update(state="failed", error=str(e),
+                                      load_seconds=round(time.perf_counter() - start, 3))
+            raise
+        if name not in self._active:  # unless a reload got there first
+            self._swap(name, version, obj)
+        self._status[name].update(state="ready",
+                                  load_seconds=round(time.perf_counter() - start, 3))
+        # lifecycle events are rare: never sampled out
+        self.log.event("model_loaded", sample_rate=1.0, model=name, version=version,
+                       seconds=self._status[name]["load_seconds"])
+        return obj
+
+    def _future(self, name: str) -> Future:
+        with self._lock:
+            fut = self._futures.get(name)
+            if fut is None:
+                if name not in self._loaders:
+                    raise KeyError(name)
+                fut = self._executor.submit(self._load, name)
+                self._futures[name] = fut
+            return fut
+
+    def load_all(self):
+        """Start loading every registered model without blocking."""
+        for name in self._loaders:
+            self._future(name)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Load every registered model and block until each has finished (or failed)."""
+        self.load_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in list(self._loaders):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                self._future(name).result(timeout=remaining)
+            except Exception:
+                pass  # recorded in status()
+        return self.is_ready()
+
+    def after_fork(self):
+        """
+        Call in a forked child: threads do not survive fork, so the loader
+        pool and the watcher are recreated. Loaded models are kept and
+        shared with the parent copy-on-write. Loads the parent had started
+        but not finished would never complete here, so they are started
+        again in the child; unfinished reloads are dropped.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self._executor._max_workers,
+                                            thread_name_prefix="model-loader")
+        self._lock = threading.Lock()
+        self._import_lock = threading.Lock()
+        self._reloading = {name: threading.Lock() for name in self._reloading}
+        self._watcher = None
+        self._stop = threading.Event()
+        unfinished = [name for name, f in self._futures.items() if not f.done()]
+        self._futures = {name: f for name, f in self._futures.items() if f.done()}
+        for name, status in self._status.items():
+            if status.get("reload_state") == "loading":
+                status["reload_state"] = None
+        for name in unfinished:
+            self._status[name]["state"] = "pending"
+            self._future(name)
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Return the active model, starting and waiting for its first load if needed."""
+        active = self._active.get(name)
+        if active is not None:
+            return active[1]
+        try:
+            self._future(name).result(timeout=timeout)
+        except Exception as e:
+            raise ModelNotReady(f"Model '{name}' is not available: {e}") from e
+        return self._active[name][1]
+
+    # --- hot reload ---------------------------------------------------
+
+    def _reload(self, name: str, version: Optional[int]) -> Optional[int]:
+        if not self._reloading[name].acquire(blocking=False):
+            return None  # a reload of this model is already running
+        try:
+            start = time.perf_counter()
+            self._status[name]["reload_state"] = "loading"
+            try:
+                new_version, model = self._build(name, version)
+            except Exception as e:
+                failed = version if version is not None else (
+                    self._versions[name].latest() if name in self._versions else None)
+                if failed is not None and not isinstance(e, FileNotFoundError):
+                    self._rejected[name][failed] = str(e)
+                self._status[name].update(reload_state="rejected", reload_error=str(e))
+                self.log.warning("model_reload_rejected", model=name, version=failed, error=str(e))
+                raise
+            self._rejected[name].pop(new_version, None)
+            self._swap(name, new_version, model)
+            self._status[name].update(state="ready", error=None,
+                                      reload_state="swapped", reload_error=None,
+                                      reload_seconds=round(time.perf_counter() - start, 3))
+            self.log.event("model_swapped", sample_rate=1.0, model=name, version=new_version,
+                           seconds=self._status[name]["reload_seconds"])
+        finally:
+            self._reloading[name].release()
+        for dependent in self._dependents.get(name, []):
+            if dependent in self._active:
+                self.reload(dependent)
+        return new_version
+
+    def reload(self, name: str, version: Optional[int] = None) -> Future:
+        """Load `version` (default: newest) in the background, validate it, then swap it in."""
+        if name not in self._loaders:
+            raise KeyError(name)
+        return self._executor.submit(self._reload, name, version)
+
+    def rollback(self, name: str) -> Optional[int]:
+        """Swap the previously active version back in; the rolled-back one is not redeployed by `watch`."""
+        with self._lock:
+            if name not in self._previous:
+                raise ValueError(f"'{name}' has no previous version to roll back to")
+            current = self._active[name]
+            self._active[name], self._previous[name] = self._previous[name], current
+        if current[0] is not None:
+            self._rejected[name][current[0]] = "rolled back"
+        self._status[name].update(version=self._active[name][0], previous_version=current[0],
+                                  loaded_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        self.log.event("model_rolled_back", sample_rate=1.0, model=name,
+                       version=self._active[name][0], from_version=current[0])
+        for dependent in self._dependents.get(name, []):
+            if dependent in self._active:
+                self.reload(dependent)
+        return self._active[name][0]
+
+    def check_for_updates(self):
+        """Reload every loaded, versioned model whose newest version is not active or rejected."""
+        for name, versions in self._versions.items():
+            if name not in self._active:
+                continue
+            latest = versions.latest()
+            if latest is not None and latest != self._active[name][0] and latest not in self._rejected[name]:
+                self.reload(name, latest)
+
+    def watch(self, interval: float):
+        """Poll for new artifact versions every `interval` seconds in a daemon thread."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    self.log.error("model_watch_failed", error=str(e))
+
+        self._watcher = threading.Thread(target=loop, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # --- status -------------------------------------------------------
+
+    def version(self, name: str) -> Optional[int]:
+        active = self._active.get(name)
+        return active[0] if active else None
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._active
+
+    def is_ready(self) -> bool:
+        return all(s["state"] == "ready" for s in self._status.values())
+
+    def status(self) -> Dict[str, Dict]:
+        out = {}
+        for name, s in self._status.items():
+            out[name] = dict(s)
+            if name in self._versions:
+                out[name]["available_versions"] = sorted(self._versions[name].available())
+                out[name]["rejected_versions"] = dict(self._rejected[name])
+        return out
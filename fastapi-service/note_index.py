@@ -0,0 +1,455 @@
+# note_index.py
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """float32 unit rows, so a dot product is the cosine similarity."""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def _merge_top_k(best_scores, best_rows, scores, rows, k):
+    """Row-wise top-k of two (q, *) candidate sets, best first."""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    rows = np.concatenate([best_rows, rows], axis=1)
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        rows = np.take_along_axis(rows, part, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+
+class IVFIndex:
+    """
+    Approximate search over a NoteIndex: rows are grouped by their nearest
+    of `n_lists` k-means centroids, and a query only scores the rows of
+    its `n_probe` nearest groups. Inserted rows join their nearest group
+    without retraining; the owner retrains after the data doubles.
+    Training assigns every row to a group, which costs about
+    rows * n_lists * dim multiply-adds (seconds per million rows).
+    """
+
+    def __init__(self, n_lists: int, n_probe: int, train_rows: int = 50_000,
+                 iterations: int = 6, seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_rows = train_rows
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+        self._arrays: Dict[int, np.ndarray] = {}
+        self.trained_on = 0
+
+    def train(self, vectors: np.ndarray, rows: np.ndarray):
+        """Spherical k-means on a sample of `rows`, then assign every row."""
+        rng = np.random.default_rng(self.seed)
+        n_lists = max(1, min(self.n_lists, len(rows)))
+        sample = rows if len(rows) <= self.train_rows else rng.choice(rows, self.train_rows, replace=False)
+        data = vectors[np.sort(sample)]
+        centroids = data[rng.choice(len(data), n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = self._nearest(centroids, data)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            # an empty list takes a random point instead of collapsing
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+        self.lists = [[] for _ in range(n_lists)]
+        self._arrays = {}
+        self.add(vectors[rows], rows)
+        self.trained_on = len(rows)
+
+    @staticmethod
+    def _nearest(centroids, data, block: int = 65536):
+        out = np.empty(len(data), dtype=np.int64)
+        for start in range(0, len(data), block):
+            out[start:start + block] = np.argmax(data[start:start + block] @ centroids.T, axis=1)
+        return out
+
+    def add(self, vectors: np.ndarray, rows: Sequence[int]):
+        for row, lst in zip(np.asarray(rows).tolist(), self._nearest(self.centroids, vectors).tolist()):
+            self.lists[lst].append(row)
+            self._arrays.pop(lst, None)
+
+    def candidates(self, query: np.ndarray, n_probe: Optional[int] = None) -> np.ndarray:
+        """Rows in the groups nearest to one query vector (may include deleted rows)."""
+        n_probe = min(n_probe or self.n_probe, len(self.lists))
+        scores = self.centroids @ query
+        probes = np.argpartition(-scores, n_probe - 1)[:n_probe]
+        arrays = []
+        for lst in probes.tolist():
+            arr = self._arrays.get(lst)
+            if arr is None:
+                arr = self._arrays[lst] = np.fromiter(self.lists[lst], dtype=np.int64,
+                                                      count=len(self.lists[lst]))
+            arrays.append(arr)
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+
+class NoteLog:
+    """
+    SQLite log of note inserts, deletes and clears, shared by every worker
+    process. Each NoteIndex keeps its own in-memory copy and replays the
+    operations appended after the last one it applied, so a note inserted
+    through one worker is found through every other, and nothing has to
+    be saved at shutdown. Vectors are stored as normalized float32 bytes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ops (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "op TEXT NOT NULL, note_id TEXT, text TEXT, vector BLOB, space TEXT)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ops_note_id ON ops (note_id, seq)")
+
+    def reopen(self):
+        """New connection for a forked child; SQLite connections must not cross fork()."""
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+
+    def append_add(self, ids: Sequence[str], vectors: np.ndarray, texts: Sequence[Optional[str]],
+                   space: Optional[str]):
+        rows = [("add", note_id, text, vector.tobytes(), space)
+                for note_id, text, vector in zip(ids, texts, vectors)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO ops (op, note_id, text, vector, space) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def append_remove(self, ids: Iterable[str]):
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO ops (op, note_id) VALUES ('remove', ?)",
+                                   [(note_id,) for note_id in ids])
+
+    def append_clear(self):
+        # nothing before a clear is needed any more, even by a process that is behind
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ops")
+            self._conn.execute("INSERT INTO ops (op) VALUES ('clear')")
+
+    def read_after(self, seq: int, limit: int = 10_000) -> List[tuple]:
+        """Up to `limit` (seq, op, note_id, text, vector, space) rows after `seq`, in order."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, op, note_id, text, vector, space FROM ops WHERE seq > ? "
+                "ORDER BY seq LIMIT ?", (seq, limit)).fetchall()
+
+    def compact(self) -> int:
+        """Drop operations a later one on the same note supersedes; returns how many."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM ops WHERE note_id IS NOT NULL AND seq < "
+                "(SELECT MAX(seq) FROM ops AS later WHERE later.note_id = ops.note_id)").rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ops").fetchone()[0]
+
+
+class NoteIndex:
+    """
+    Cosine-similarity index over note embeddings.
+
+    Vectors are kept as normalized float32 rows of one matrix that grows
+    geometrically. Exact search scores `block_rows` rows per matrix product
+    and keeps a running top-k, so memory stays flat at any size. Deleted
+    rows are masked and their slots reused by later inserts. Re-inserting
+    an id replaces its vector. With mode="ivf" (or "auto" once the index
+    holds `ivf_min_rows` notes), queries go through an IVFIndex instead.
+    `space` names the embedder the vectors came from; vectors from another
+    embedder are not comparable.
+
+    With a NoteLog, changes are written to the log first and every read
+    replays what other processes logged since (`sync`); see `open`.
+    """
+
+    def __init__(self, dim: Optional[int] = None, space: Optional[str] = None,
+                 mode: str = "auto", block_rows: int = 65536, ivf_min_rows: int = 200_000,
+                 n_lists: Optional[int] = None, n_probe: int = 16, initial_capacity: int = 1024,
+                 log: Optional[NoteLog] = None):
+        if mode not in ("exact", "ivf", "auto"):
+            raise ValueError(f"unknown index mode {mode!r}")
+        self.dim = dim
+        self.space = space
+        self.mode = mode
+        self.block_rows = max(1, int(block_rows))
+        self.ivf_min_rows = ivf_min_rows
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self._initial_capacity = max(1, int(initial_capacity))
+        self._vectors: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._texts: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._size = 0  # rows in use, including deleted ones
+        self._ivf: Optional[IVFIndex] = None
+        self._lock = threading.RLock()
+        self._log = log
+        self._seq = 0  # last log operation applied
+        self.inserts = 0
+        self.deletes = 0
+        self.queries = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, note_id):
+        return note_id in self._rows
+
+    def _grow(self, needed: int):
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if needed <= capacity:
+            return
+        new = max(needed, capacity * 2, self._initial_capacity)
+        vectors = np.zeros((new, self.dim), dtype=np.float32)
+        alive = np.zeros(new, dtype=bool)
+        if self._vectors is not None:
+            vectors[:self._size] = self._vectors[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+        self._vectors, self._alive = vectors, alive
+
+    @classmethod
+    def open(cls, path: str, **options) -> "NoteIndex":
+        """An index backed by the NoteLog at `path`, with everything logged so far applied."""
+        log = NoteLog(path)
+        log.compact()
+        index = cls(log=log, **options)
+        index.sync()
+        return index
+
+    def after_fork(self):
+        """Call in a forked child: new locks and log connection; the loaded notes are kept."""
+        self._lock = threading.RLock()
+        if self._log is not None:
+            self._log.reopen()
+
+    def add(self, ids: Sequence[str], vectors, texts: Optional[Sequence[Optional[str]]] = None):
+        """Insert or replace notes by id."""
+        vectors = normalize_rows(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors differ in length")
+        texts = list(texts) if texts is not None else [None] * len(ids)
+        with self._lock:
+            self.sync()
+            if self.dim is not None and vectors.shape[1] != self.dim:
+                raise ValueError(f"expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+            if self._log is not None:
+                self._log.append_add(ids, vectors, texts, self.space)
+                self.sync()
+            else:
+                self._insert(ids, vectors, texts)
+            self.inserts += len(ids)
+
+    def remove(self, ids: Iterable[str]) -> int:
+        with self._lock:
+            self.sync()
+            ids = [note_id for note_id in dict.fromkeys(ids) if note_id in self._rows]
+            if self._log is not None and ids:
+                self._log.append_remove(ids)
+                self.sync()
+            else:
+                self._delete(ids)
+            self.deletes += len(ids)
+        return len(ids)
+
+    def clear(self):
+        """Drop every note (and the dimension and embedder space)."""
+        with self._lock:
+            if self._log is not None:
+                self._log.append_clear()
+                self.sync()
+            else:
+                self._reset()
+
+    def sync(self):
+        """Apply the operations logged (by any process) since the last sync."""
+        if self._log is None:
+            return
+        with self._lock:
+            while True:
+                ops = self._log.read_after(self._seq)
+                if not ops:
+                    return
+                run = []  # consecutive adds are applied together
+                for seq, op, note_id, text, vector, space in ops:
+                    if op == "add":
+                        if space is not None:
+                            self.space = space
+                        run.append((note_id, text, np.frombuffer(vector, dtype=np.float32)))
+                        continue
+                    self._apply_adds(run)
+                    run = []
+                    if op == "remove":
+                        self._delete([note_id])
+                    elif op == "clear":
+                        self._reset()
+                self._apply_adds(run)
+                self._seq = ops[-1][0]
+
+    def _apply_adds(self, run):
+        if run:
+            ids, texts, vectors = zip(*run)
+            self._insert(ids, np.vstack(vectors), texts)
+
+    def _insert(self, ids, vectors, texts):
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        new_ids = sum(1 for note_id in set(ids) if note_id not in self._rows)
+        self._grow(self._size + max(0, new_ids - len(self._free)))
+        rows = []
+        for note_id, text in zip(ids, texts):
+            row = self._rows.get(note_id)
+            if row is None:
+                row = self._free.pop() if self._free else self._size
+                if row == self._size:
+                    self._size += 1
+                    self._ids.append(None)
+                    self._texts.append(None)
+                self._rows[note_id] = row
+            self._ids[row] = note_id
+            self._texts[row] = text
+            rows.append(row)
+        self._vectors[rows] = vectors
+        self._alive[rows] = True
+        if self._ivf is not None:
+            # a replaced or reused row may now sit in two groups; it is always
+            # scored with its current vector, and retraining drops the stale entry
+            self._ivf.add(vectors, rows)
+        self._maybe_train()
+
+    def _delete(self, ids):
+        for note_id in ids:
+            row = self._rows.pop(note_id, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            self._ids[row] = None
+            self._texts[row] = None
+            self._free.append(row)
+
+    def _reset(self):
+        self.dim = self.space = None
+        self._vectors = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids, self._texts = [], []
+        self._rows, self._free = {}, []
+        self._size = 0
+        self._ivf = None
+
+    def get_vector(self, note_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self.sync()
+            row = self._rows.get(note_id)
+            return None if row is None else self._vectors[row].copy()
+
+    def text(self, note_id: str) -> Optional[str]:
+        row = self._rows.get(note_id)
+        return None if row is None else self._texts[row]
+
+    def _use_ivf(self) -> bool:
+        return self.mode == "ivf" or (self.mode == "auto" and len(self) >= self.ivf_min_rows)
+
+    def _maybe_train(self):
+        if not self._use_ivf() or len(self) == 0:
+            return
+        if self._ivf is None or len(self) >= 2 * self._ivf.trained_on:
+            n_lists = self.n_lists or int(max(1, np.sqrt(len(self))))
+            ivf = IVFIndex(n_lists, self.n_probe)
+            ivf.train(self._vectors, np.flatnonzero(self._alive[:self._size]))
+            self._ivf = ivf
+
+    def search(self, queries, k: int = 10, min_score: float = -1.0,
+               exclude: Optional[Sequence[Optional[str]]] = None,
+               exact: Optional[bool] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Top-k (id, cosine similarity) per query vector, best first, keeping
+        only scores >= min_score. `exclude[i]` drops that id from query i's
+        results (a note is always its own nearest neighbour).
+        """
+        queries = normalize_rows(queries)
+        with self._lock:
+            self.sync()
+            self.queries += len(queries)
+            if not len(self) or k <= 0:
+                return [[] for _ in queries]
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"expected {self.dim}-dimensional vectors, got {queries.shape[1]}")
+            # one extra so an excluded id does not cost a result
+            want = k + 1 if exclude is not None else k
+            use_ivf = self._ivf is not None and (exact is False or (exact is None and self._use_ivf()))
+            if use_ivf:
+                found = [self._search_ivf(q, want) for q in queries]
+            else:
+                found = list(zip(*self._search_exact(queries, want)))
+            results = []
+            for i, (scores, rows) in enumerate(found):
+                skip = exclude[i] if exclude is not None else None
+                hits = [(self._ids[r], float(s)) for s, r in zip(scores.tolist(), rows.tolist())
+                        if s >= min_score and r >= 0 and self._ids[r] is not None and self._ids[r] != skip]
+                results.append(hits[:k])
+            return results
+
+    def _search_exact(self, queries, k):
+        q = len(queries)
+        best_scores = np.full((q, 0), -np.inf, dtype=np.float32)
+        best_rows = np.full((q, 0), -1, dtype=np.int64)
+        for start in range(0, self._size, self.block_rows):
+            stop = min(start + self.block_rows, self._size)
+            scores = queries @ self._vectors[start:stop].T
+            scores[:, ~self._alive[start:stop]] = -np.inf
+            take = min(k, stop - start)
+            part = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores, best_rows = _merge_top_k(best_scores, best_rows,
+                                                  np.take_along_axis(scores, part, axis=1),
+                                                  part + start, k)
+        return best_scores, best_rows
+
+    def _search_ivf(self, query, k):
+        rows = self._ivf.candidates(query)
+        rows = rows[self._alive[rows]]
+        if not len(rows):
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        rows = np.unique(rows)
+        scores = self._vectors[rows] @ query
+        if len(rows) > k:
+            part = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[part], scores[part]
+        order = np.argsort(-scores, kind="stable")
+        return scores[order], rows[order]
+
+    def stats(self) -> Dict:
+        self.sync()
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        return {
+            "notes": len(self),
+            "deleted_slots": len(self._free),
+            "dim": self.dim,
+            "space": self.space,
+            "mode": "ivf" if self._ivf is not None and self._use_ivf() else "exact",
+            "ivf_lists": len(self._ivf.lists) if self._ivf is not None else None,
+            "ivf_probe": self.n_probe if self._ivf is not None else None,
+            "matrix_mb": round(capacity * (self.dim or 0) * 4 / 1e6, 1),
+            "inserts": self.inserts,
+            "deletes": self.deletes,
+            "queries": self.queries,
+            "log": self._log.path if self._log is not None else None,
+            "log_seq": self._seq if self._log is not None else None,
+        }
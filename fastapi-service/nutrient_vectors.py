@@ -0,0 +1,68 @@
+# nutrient_vectors.py
+from typing import Dict, Iterable, List, Mapping, Union
+
+import numpy as np
+
+# fixed slot order of every nutrient vector
+NUTRIENT_KEYS = ("calories", "protein_g", "carbs_g", "fat_g", "fiber_g")
+N_NUTRIENTS = len(NUTRIENT_KEYS)
+
+# Spoonacular nutrient name (lower case) -> slot; anything else is ignored
+NUTRIENT_SLOTS: Dict[str, int] = {
+    "calories": 0, "energy": 0,
+    "protein": 1,
+    "carbohydrates": 2, "carbohydrate": 2,
+    "fat": 3, "total fat": 3,
+    "fiber": 4, "dietary fiber": 4,
+}
+
+
+def zeros() -> np.ndarray:
+    return np.zeros(N_NUTRIENTS)
+
+
+def as_vector(values: Union[Mapping[str, float], Iterable[float]]) -> np.ndarray:
+    """A nutrient vector from a {key: amount} mapping or a sequence in slot order."""
+    if isinstance(values, Mapping):
+        return np.array([float(values.get(k, 0) or 0) for k in NUTRIENT_KEYS])
+    return np.asarray(values, dtype=np.float64).reshape(N_NUTRIENTS)
+
+
+def nutrient_vector(nutrients: List[Mapping]) -> np.ndarray:
+    """Sum one Spoonacular `nutrients` list into a vector."""
+    return items_vector([{"nutrition": {"nutrients": nutrients}}])
+
+
+def items_vector(items: Iterable[Mapping]) -> np.ndarray:
+    """
+    Sum the nutrients of many Spoonacular items at once: every entry is
+    mapped to its slot and the amounts are added with one bincount.
+    """
+    slots, amounts = [], []
+    for item in items:
+        for n in ((item.get("nutrition") or {}).get("nutrients") or []):
+            slot = NUTRIENT_SLOTS.get(str(n.get("name", "")).lower())
+            if slot is not None:
+                slots.append(slot)
+                amounts.append(n.get("amount", 0) or 0)
+    if not slots:
+        return zeros()
+    return np.bincount(slots, weights=amounts, minlength=N_NUTRIENTS).astype(np.float64)
+
+
+def to_dict(vector: np.ndarray, ndigits: int = 1) -> Dict[str, float]:
+    """The response shape: {"calories": ..., "protein_g": ..., ...}, rounded."""
+    return {k: round(float(v), ndigits) for k, v in zip(NUTRIENT_KEYS, vector)}
+
+
+def meal_totals(per_gram: np.ndarray, meal_index: np.ndarray, ingredient_index: np.ndarray,
+                grams: np.ndarray, n_meals: int) -> np.ndarray:
+    """
+    Totals for many meals in one pass. Row i of the flattened ingredient
+    list belongs to meal `meal_index[i]`, uses per-gram row
+    `ingredient_index[i]` and weighs `grams[i]`; returns (n_meals, N_NUTRIENTS).
+    """
+    totals = np.zeros((n_meals, N_NUTRIENTS))
+    if len(meal_index):
+        np.add.at(totals, meal_index, per_gram[ingredient_index] * grams[:, None])
+    return totals
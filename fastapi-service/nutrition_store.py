@@ -0,0 +1,122 @@
+# nutrition_store.py
+import csv
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from nutrient_vectors import NUTRIENT_KEYS, as_vector
+
+
+def canonical_name(name: str) -> str:
+    """'  Olive Oil, ' -> 'olive oil'"""
+    s = re.sub(r"[^a-z0-9 ]+", " ", str(name).lower())
+    return " ".join(s.split())
+
+
+class NutritionStore:
+    """
+    SQLite-backed per-gram nutrient vectors keyed by canonical ingredient
+    name. Values are stored per gram, so any amount is a linear scale;
+    reads return NumPy vectors in NUTRIENT_KEYS order.
+    """
+
+    def __init__(self, path: str = "nutrition_store.sqlite3"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        columns = ", ".join(f"{k} REAL NOT NULL" for k in NUTRIENT_KEYS)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS ingredients ("
+                f"name TEXT PRIMARY KEY, spoonacular_id INTEGER, {columns}, updated_at REAL)")
+
+    def reopen(self):
+        """New connection for a forked child; SQLite connections must not cross fork()."""
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """Per-gram nutrient vector for an ingredient, or None if it is not stored."""
+        return self.get_many([name]).get(name)
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Per-gram vectors for every stored name, fetched together; absent names are left out."""
+        keys: Dict[str, List[str]] = {}
+        for name in names:
+            keys.setdefault(canonical_name(name), []).append(name)
+        distinct, rows = list(keys), []
+        with self._lock:
+            # chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(distinct), 500):
+                chunk = distinct[i:i + 500]
+                rows += self._conn.execute(
+                    f"SELECT name, {', '.join(NUTRIENT_KEYS)} FROM ingredients "
+                    f"WHERE name IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+        found = {}
+        for key, *values in rows:
+            for name in keys[key]:
+                found[name] = np.array(values, dtype=np.float64)
+        self.hits += len(rows)
+        self.misses += len(keys) - len(rows)
+        return found
+
+    def put(self, name: str, per_gram, spoonacular_id: Optional[int] = None):
+        self.put_many([(name, per_gram, spoonacular_id)])
+
+    def put_many(self, rows: Iterable):
+        """rows of (name, per-gram vector or {key: amount}, spoonacular id or None)."""
+        values = [(canonical_name(name), ing_id, *as_vector(per_gram).tolist(), time.time())
+                  for name, per_gram, ing_id in rows if canonical_name(name)]
+        placeholders = ", ".join("?" * (len(NUTRIENT_KEYS) + 3))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO ingredients (name, spoonacular_id, {', '.join(NUTRIENT_KEYS)}, "
+                f"updated_at) VALUES ({placeholders})", values)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ingredients").fetchone()[0]
+
+    def export_csv(self, path: str) -> int:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name, spoonacular_id, {', '.join(NUTRIENT_KEYS)} FROM ingredients "
+                f"ORDER BY name").fetchall()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(("name", "spoonacular_id") + NUTRIENT_KEYS)
+            writer.writerows(rows)
+        return len(rows)
+
+    def import_csv(self, path: str) -> int:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [(r["name"], {k: r.get(k) for k in NUTRIENT_KEYS},
+                     int(r["spoonacular_id"]) if r.get("spoonacular_id") else None)
+                    for r in csv.DictReader(f)]
+        self.put_many(rows)
+        return len(rows)
+
+    def stats(self) -> Dict:
+        return {"path": self.path, "ingredients": len(self), "hits": self.hits, "misses": self.misses}
+
+
+if __name__ == "__main__":
+    # python nutrition_store.py export nutrition.csv [store path]
+    # python nutrition_store.py import nutrition.csv [store path]
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ("import", "export"):
+        print("usage: python nutrition_store.py import|export <csv> [store path]")
+        sys.exit(1)
+    store = NutritionStore(sys.argv[3] if len(sys.argv) > 3 else "nutrition_store.sqlite3")
+    if sys.argv[1] == "export":
+        print(f"Exported {store.export_csv(sys.argv[2])} ingredients to {sys.argv[2]}")
+    else:
+        print(f"Imported {store.import_csv(sys.argv[2])} ingredients into {store.path}")
@@ -0,0 +1,117 @@
+# pantry_matcher.py
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ingredient_parser import parse_line
+from meal_catalog import MealCatalog
+from meal_scheduler import VEG_MEALS_DB
+from nutrition_store import canonical_name
+
+RANK_BY = ("missing", "coverage")
+
+
+@lru_cache(maxsize=65536)
+def ingredient_key(name: str) -> str:
+    """Matching key: canonical name with a naive singular ("tomatoes" -> "tomato")."""
+    s = canonical_name(name)
+    s = re.sub(r"ies\b", "y", s)
+    s = re.sub(r"(?<=o)es\b", "", s)
+    return re.sub(r"(?<![su])s\b", "", s)
+
+
+class PantryIndex:
+    """
+    "What can I cook with what I have" over a MealCatalog.
+
+    The catalog's inverted index (ingredient id -> meal ids) scores a
+    pantry by touching only the meals that share an ingredient with it,
+    so a query costs the size of those posting lists rather than the
+    catalog. The pantry becomes a bitset over ingredient ids, which gives
+    the missing ingredients of the few meals that are returned. Nothing
+    per meal is copied out of the catalog, so a memory-mapped catalog
+    stays shared between workers.
+    """
+
+    def __init__(self, catalog: MealCatalog):
+        self.catalog = catalog
+        self.sizes = np.diff(catalog.meal_offsets.astype(np.int64))
+        self._ids: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def from_meal_db(cls, db: Dict[str, List[Dict]] = VEG_MEALS_DB) -> "PantryIndex":
+        return cls(MealCatalog.from_db(db))
+
+    def __len__(self):
+        return len(self.catalog)
+
+    @property
+    def ids(self) -> Dict[str, List[int]]:
+        """Matching key -> catalog ingredient ids ("tomato" and "tomatoes" share a key)."""
+        if self._ids is None:
+            ids: Dict[str, List[int]] = {}
+            for i, name in enumerate(self.catalog.ingredient_names):
+                ids.setdefault(ingredient_key.__wrapped__(name), []).append(i)
+            self._ids = ids
+        return self._ids
+
+    def pantry_bits(self, pantry: Iterable[str]) -> Tuple[np.ndarray, List[int]]:
+        """(bitset over ingredient ids, ingredient ids) of the pantry items the catalog knows."""
+        # "2 tomatoes" and "tomato" are the same pantry item
+        keys = {ingredient_key(parse_line(item).name) for item in pantry}
+        ids = sorted(i for k in keys for i in self.ids.get(k, ()))
+        bits = np.zeros(self.catalog.n_ingredients, dtype=bool)
+        bits[ids] = True
+        return bits, ids
+
+    def _missing(self, meal: int, bits: np.ndarray) -> List[str]:
+        names = self.catalog.ingredient_names
+        return [names[i] for i in self.catalog.ingredient_ids(meal) if not bits[i]]
+
+    def match(self, pantry: Iterable[str], top_k: int = 10, category: Optional[str] = None,
+              max_missing: Optional[int] = None, min_coverage: float = 0.0,
+              rank_by: str = "missing") -> List[Dict]:
+        """
+        Meals sharing at least one ingredient with the pantry, best first.
+        rank_by="missing" orders by fewest missing ingredients, then
+        coverage; "coverage" orders by the share of the meal's ingredients
+        in the pantry, then fewest missing. Ties keep catalog order.
+        """
+        if rank_by not in RANK_BY:
+            raise ValueError(f"rank_by must be one of {RANK_BY}")
+        if category and category not in self.catalog.categories:
+            return []
+        bits, ids = self.pantry_bits(pantry)
+        if not ids:
+            return []
+        hits = np.concatenate([self.catalog.meals_with(i) for i in ids])
+        candidates, matched = np.unique(hits, return_counts=True)
+
+        keep = np.ones(len(candidates), dtype=bool)
+        if category:
+            keep &= self.catalog.meal_category[candidates] == self.catalog.categories.index(category)
+        missing = self.sizes[candidates] - matched
+        coverage = matched / self.sizes[candidates]
+        if max_missing is not None:
+            keep &= missing <= max_missing
+        if min_coverage:
+            keep &= coverage >= min_coverage
+        candidates, matched, missing, coverage = (a[keep] for a in (candidates, matched, missing, coverage))
+
+        keys = (candidates, -coverage, missing) if rank_by == "missing" else (candidates, missing, -coverage)
+        order = np.lexsort(keys)[:max(0, int(top_k))]
+        results = []
+        for j in order:
+            m = int(candidates[j])
+            meal = self.catalog.meal(m)
+            results.append({
+                "name": meal["name"],
+                "category": self.catalog.category(m),
+                "ingredients": meal["ingredients"],
+                "matched": int(matched[j]),
+                "missing": self._missing(m, bits),
+                "coverage": round(float(coverage[j]), 3),
+            })
+        return results
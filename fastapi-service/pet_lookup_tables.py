@@ -0,0 +1,202 @@
+# pet_lookup_tables.py
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class Axis:
+    """
+    One input dimension of a lookup table: either a fixed set of categories
+    or a numeric grid `start, start + step, ..., stop`. Numeric inputs are
+    snapped to the nearest grid point; values outside [start, stop] are
+    out of grid.
+    """
+
+    def __init__(self, name: str, categories: Optional[Sequence] = None,
+                 start: float = None, stop: float = None, step: float = None):
+        self.name = name
+        if categories is not None:
+            self.values = np.asarray(list(categories), dtype=object)
+            self._positions = {v: i for i, v in enumerate(categories)}
+        else:
+            n = int(round((stop - start) / step)) + 1
+            self.values = start + step * np.arange(n)
+            self.start, self.stop, self.step = start, stop, step
+            self._positions = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def index(self, x) -> Optional[int]:
+        if self._positions is not None:
+            return self._positions.get(x)
+        if x is None or not (self.start <= x <= self.stop):
+            return None
+        return int(round((x - self.start) / self.step))
+
+    def indices(self, column) -> np.ndarray:
+        """Vectorized `index`: grid positions of a column, -1 where out of grid."""
+        if self._positions is not None:
+            uniques, inverse = np.unique(np.asarray(column), return_inverse=True)
+            positions = np.array([self._positions.get(u, -1) for u in uniques.tolist()], dtype=np.int64)
+            return positions[inverse.reshape(-1)]
+        x = np.asarray(column, dtype=np.float64)
+        inside = (self.start <= x) & (x <= self.stop)
+        return np.where(inside, np.rint((np.where(inside, x, self.start) - self.start) / self.step), -1).astype(np.int64)
+
+    def sample(self, rng, n):
+        if self._positions is not None:
+            return self.values[rng.integers(0, len(self.values), n)]
+        if self.step == 1 and float(self.start).is_integer():
+            return rng.integers(int(self.start), int(self.stop) + 1, n)
+        return rng.uniform(self.start, self.stop, n)
+
+
+class PredictionTable:
+    """
+    Dense array of model outputs over the cartesian product of `axes`.
+    `featurize` turns per-axis input columns into the model's feature matrix.
+    Classifier outputs are stored as small integer codes into `classes`.
+    """
+
+    def __init__(self, axes: List[Axis], featurize: Callable, model):
+        self.axes = axes
+        self.shape = tuple(len(a) for a in axes)
+        self.featurize = featurize
+        self.model = model
+
+        idx = np.indices(self.shape).reshape(len(axes), -1)
+        columns = [a.values[i] for a, i in zip(axes, idx)]
+        preds = np.asarray(model.predict(featurize(*columns)))
+        if preds.dtype.kind in "fc":
+            self.classes = None
+            self.table = preds.astype(np.float64).reshape(self.shape)
+        else:
+            self.classes, codes = np.unique(preds, return_inverse=True)
+            self.table = codes.astype(np.uint8).reshape(self.shape)
+        self.report: Dict = {"cells": int(self.table.size), "bytes": int(self.table.nbytes)}
+
+    def __getstate__(self):
+        # saved tables only need the grid; the model and featurizer stay behind
+        state = dict(self.__dict__)
+        state["featurize"] = None
+        state["model"] = None
+        return state
+
+    def lookup(self, *inputs):
+        """Table output for one request, or None when any input is out of grid."""
+        cell = []
+        for axis, x in zip(self.axes, inputs):
+            i = axis.index(x)
+            if i is None:
+                return None
+            cell.append(i)
+        value = self.table[tuple(cell)]
+        return self.classes[value] if self.classes is not None else value
+
+    def lookup_many(self, *columns):
+        """(outputs, hit mask) for whole input columns; outputs are only valid where hit."""
+        cells = [axis.indices(c) for axis, c in zip(self.axes, columns)]
+        hit = np.logical_and.reduce([c >= 0 for c in cells])
+        flat = np.ravel_multi_index([np.where(hit, c, 0) for c in cells], self.shape)
+        values = self.table.reshape(-1)[flat]
+        return (self.classes[values] if self.classes is not None else values), hit
+
+    def measure_error(self, n_samples: int = 20000, seed: int = 0) -> Dict:
+        """Compare table lookups against the live model on random in-grid inputs."""
+        rng = np.random.default_rng(seed)
+        columns = [a.sample(rng, n_samples) for a in self.axes]
+        live = np.asarray(self.model.predict(self.featurize(*columns)))
+        looked_up = np.array([self.lookup(*row) for row in zip(*columns)], dtype=live.dtype)
+        if self.classes is None:
+            err = np.abs(live - looked_up)
+            self.report.update(max_abs_error=round(float(err.max()), 4),
+                               mean_abs_error=round(float(err.mean()), 4))
+        else:
+            self.report.update(disagreement_rate=round(float(np.mean(live != looked_up)), 5))
+        self.report["error_samples"] = n_samples
+        return self.report
+
+
+def build_comfort_table(model, temp_step: float = 0.5, humidity_step: float = 1.0) -> PredictionTable:
+    # ranges follow generate_synthetic_data in train_pet_comfort_model.py
+    axes = [
+        Axis("temperature", start=10.0, stop=35.0, step=temp_step),
+        Axis("humidity", start=20.0, stop=90.0, step=humidity_step),
+        Axis("feeding_interval", start=0, stop=24, step=1),
+        Axis("activity_level", start=1, stop=10, step=1),
+    ]
+
+    def featurize(temperature, humidity, feeding_interval, activity_level):
+        return np.column_stack([temperature, humidity, feeding_interval,
+                                activity_level]).astype(np.float64)
+
+    return PredictionTable(axes, featurize, model)
+
+
+def build_health_table(package, max_food_amount: int = 20, max_activity: int = 240) -> PredictionTable:
+    encoder = package["encoder"]
+    symptoms, foods = encoder.categories_
+    axes = [
+        Axis("symptom", categories=list(symptoms)),
+        Axis("food_type", categories=list(foods)),
+        Axis("food_amount", start=0, stop=max_food_amount, step=1),
+        Axis("activity", start=0, stop=max_activity, step=1),
+    ]
+
+    def featurize(symptom, food_type, food_amount, activity):
+        X_cat = encoder.transform(np.column_stack([symptom, food_type]))
+        return np.hstack([X_cat, np.column_stack([food_amount, activity])]).astype(np.float64)
+
+    return PredictionTable(axes, featurize, package["model"])
+
+
+def build_diet_table(package, weight_step: float = 0.1, max_weight: float = 60.0) -> PredictionTable:
+    encoder = package["encoder"]
+    axes = [
+        Axis("breed", categories=list(encoder.categories_[0])),
+        Axis("weight", start=0.0, stop=max_weight, step=weight_step),
+        Axis("activity", start=1, stop=5, step=1),
+    ]
+
+    def featurize(breed, weight, activity):
+        X_cat = encoder.transform(np.column_stack([breed]))
+        return np.hstack([X_cat, np.column_stack([weight, activity])]).astype(np.float64)
+
+    return PredictionTable(axes, featurize, package["model"])
+
+
+if __name__ == "__main__":
+    # Print table sizes and error bounds for a grid setting, optionally saving
+    # the tables for PET_LOOKUP_TABLES=<path>:
+    #   python pet_lookup_tables.py --temp-step 0.5 --weight-step 0.1 --save pet_lookup_tables.pkl
+    import argparse
+    import time
+    import joblib
+    # import from the module so saved tables unpickle outside this script
+    from pet_lookup_tables import build_comfort_table, build_diet_table, build_health_table
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--temp-step", type=float, default=0.5)
+    parser.add_argument("--humidity-step", type=float, default=1.0)
+    parser.add_argument("--weight-step", type=float, default=0.1)
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--save", default=None)
+    args = parser.parse_args()
+
+    builders = {
+        "pet_comfort": lambda: build_comfort_table(joblib.load("pet_comfort_model.pkl"),
+                                                   args.temp_step, args.humidity_step),
+        "pet_health": lambda: build_health_table(joblib.load("pet_health_model.pkl")),
+        "pet_diet": lambda: build_diet_table(joblib.load("pet_diet_model.pkl"), args.weight_step),
+    }
+    tables = {}
+    for name, build in builders.items():
+        start = time.perf_counter()
+        tables[name] = build()
+        build_s = time.perf_counter() - start
+        report = tables[name].measure_error(args.samples)
+        print(name, {"build_seconds": round(build_s, 2), **report})
+    if args.save:
+        joblib.dump(tables, args.save)
+        print("Saved tables to", args.save)
@@ -0,0 +1,294 @@
+# pet_training.py
+# Shared data generation and training for the pet models:
+#   python pet_training.py comfort health diet                  # service-sized defaults
+#   python pet_training.py comfort --rows 20000000 --max-samples 0.05 --n-jobs -1 --workers 8
+# Synthetic rows are generated in vectorized chunks by --workers processes,
+# straight into a memory-mapped float32 feature matrix (--data-dir), so the
+# full dataset never has to fit in RAM; the forest is fitted on that matrix
+# with --n-jobs threads. Each run writes artifacts/<model>/model-vNNNN.pkl
+# with a .json of its data size, timings and model size, and (with
+# --promote, the default) replaces the pet_*_model.pkl the service loads.
+import argparse
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.preprocessing import OneHotEncoder
+
+from train_model import next_version, write_artifact
+
+SYMPTOMS = ["none", "lethargy", "vomiting", "loss_of_appetite",
+            "excessive_thirst", "diarrhea", "coughing", "sneezing"]
+SYMPTOM_P = [0.4, 0.1, 0.05, 0.05, 0.15, 0.05, 0.1, 0.1]
+FOOD_TYPES = ["dry_kibble", "wet_food", "mixed", "raw_diet"]
+FOOD_P = [0.5, 0.25, 0.2, 0.05]
+BREEDS = ["labrador", "bulldog", "golden_retriever", "german_shepherd",
+          "persian_cat", "siamese_cat", "maine_coon", "ragdoll"]
+BREED_FACTOR = {"labrador": 5.5, "bulldog": 5, "golden_retriever": 5.5, "german_shepherd": 6,
+                "persian_cat": 4, "siamese_cat": 4.5, "maine_coon": 4.8, "ragdoll": 4.7}
+BREED_FOOD = {"labrador": "dry_kibble", "bulldog": "mixed", "golden_retriever": "dry_kibble",
+              "german_shepherd": "dry_kibble", "persian_cat": "wet_food", "siamese_cat": "dry_kibble",
+              "maine_coon": "wet_food", "ragdoll": "mixed"}
+
+
+def _one_hot(codes: np.ndarray, n: int) -> np.ndarray:
+    return np.eye(n, dtype=np.float32)[codes]
+
+
+def _sorted_codes(names: List[str], codes: np.ndarray):
+    """Re-code indices into `names` as indices into sorted(names), the order OneHotEncoder uses."""
+    order = np.argsort(np.argsort(names))
+    return order[codes]
+
+
+# Each generator turns a Generator and a row count into (float32 features, labels).
+# Classifier labels are integer codes into `classes`; rules match the original scripts.
+
+def comfort_rows(rng: np.random.Generator, n: int):
+    temperature = np.round(rng.uniform(10, 35, n), 1)
+    humidity = np.round(rng.uniform(20, 90, n), 1)
+    feeding_interval = rng.integers(2, 13, n)
+    activity_level = rng.integers(1, 11, n)
+    comfortable = ((18 <= temperature) & (temperature <= 25) & (40 <= humidity) & (humidity <= 60)
+                   & (feeding_interval <= 5) & (4 <= activity_level) & (activity_level <= 8))
+    uncomfortable = (temperature < 15) | (temperature > 30) | (feeding_interval > 8) | (activity_level < 3)
+    # classes: comfortable, neutral, uncomfortable
+    y = np.where(comfortable, 0, np.where(uncomfortable, 2, 1)).astype(np.uint8)
+    X = np.column_stack([temperature, humidity, feeding_interval, activity_level]).astype(np.float32)
+    return X, y
+
+
+def health_rows(rng: np.random.Generator, n: int):
+    symptom = rng.choice(len(SYMPTOMS), n, p=SYMPTOM_P)
+    food = rng.choice(len(FOOD_TYPES), n, p=FOOD_P)
+    food_amount = rng.integers(15, 200, n)
+    activity = rng.integers(0, 180, n)
+    name = np.array(SYMPTOMS)[symptom]
+    dehydration = (name == "excessive_thirst") & (activity < 20) & (food_amount < 60)
+    overfeeding = (food_amount > 150) & (activity < 60)
+    illness = np.isin(name, ["vomiting", "loss_of_appetite", "diarrhea", "lethargy"]) & (activity < 40)
+    # classes: normal, possible_dehydration, possible_illness, possible_overfeeding
+    y = np.select([dehydration, overfeeding, illness], [1, 3, 2], default=0).astype(np.uint8)
+    X = np.hstack([_one_hot(_sorted_codes(SYMPTOMS, symptom), len(SYMPTOMS)),
+                   _one_hot(_sorted_codes(FOOD_TYPES, food), len(FOOD_TYPES)),
+                   np.column_stack([food_amount, activity]).astype(np.float32)])
+    return X, y
+
+
+def diet_rows(rng: np.random.Generator, n: int):
+    breed = rng.integers(0, len(BREEDS), n)
+    weight = rng.uniform(2.5, 45, n)
+    activity = rng.integers(1, 6, n)
+    factor = np.array([BREED_FACTOR[b] for b in BREEDS])[breed]
+    portion = 20 + weight * factor + activity * 3
+    X = np.hstack([_one_hot(_sorted_codes(BREEDS, breed), len(BREEDS)),
+                   np.column_stack([weight, activity]).astype(np.float32)])
+    return X, portion.astype(np.float32)
+
+
+class PetModelSpec:
+    """How one pet model is generated, fitted and packaged for main.py."""
+
+    def __init__(self, name, artifact, output, generate, n_features, classes=None,
+                 rows=5000, params=None, feature_names=()):
+        self.name = name
+        self.artifact = artifact
+        self.output = output
+        self.generate = generate
+        self.n_features = n_features
+        self.classes = classes
+        self.rows = rows
+        self.params = params or {}
+        self.feature_names = list(feature_names)
+
+    @property
+    def is_classifier(self):
+        return self.classes is not None
+
+    def estimator(self, **overrides):
+        cls = RandomForestClassifier if self.is_classifier else RandomForestRegressor
+        return cls(**{**self.params, **overrides})
+
+    def package(self, model):
+        if self.name == "comfort":
+            return model
+        if self.name == "health":
+            encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+            encoder.fit(pd.DataFrame({"symptom": SYMPTOMS, "food_type": FOOD_TYPES * 2}))
+            return {"model": model, "encoder": encoder}
+        encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+        encoder.fit(pd.DataFrame({"breed": BREEDS}))
+        return {"model": model, "encoder": encoder, "food_map": dict(BREED_FOOD)}
+
+
+SPECS: Dict[str, PetModelSpec] = {
+    "comfort": PetModelSpec(
+        "comfort", "pet_comfort", "pet_comfort_model.pkl", comfort_rows, 4,
+        classes=["comfortable", "neutral", "uncomfortable"], rows=2000,
+        params={"n_estimators": 150},
+        feature_names=["temperature", "humidity", "feeding_interval", "activity_level"]),
+    "health": PetModelSpec(
+        "health", "pet_health", "pet_health_model.pkl", health_rows, len(SYMPTOMS) + len(FOOD_TYPES) + 2,
+        classes=["normal", "possible_dehydration", "possible_illness", "possible_overfeeding"],
+        rows=5000, params={"n_estimators": 200, "max_depth": 15},
+        feature_names=[f"symptom_{s}" for s in sorted(SYMPTOMS)] + [f"food_type_{f}" for f in sorted(FOOD_TYPES)]
+        + ["food_amount", "activity"]),
+    "diet": PetModelSpec(
+        "diet", "pet_diet", "pet_diet_model.pkl", diet_rows, len(BREEDS) + 2,
+        rows=5000, params={"n_estimators": 200, "max_depth": 15},
+        feature_names=[f"breed_{b}" for b in sorted(BREEDS)] + ["weight", "activity"]),
+}
+
+
+def _chunk_seeds(seed: int, n_chunks: int):
+    # one independent stream per chunk: the data depend on (seed, chunk size), not on --workers
+    return np.random.SeedSequence(seed).spawn(n_chunks)
+
+
+def _fill_chunk(name, x_path, y_path, shape, y_dtype, start, stop, seed_seq):
+    X_out = np.memmap(x_path, dtype=np.float32, mode="r+", shape=shape)
+    y_out = np.memmap(y_path, dtype=y_dtype, mode="r+", shape=(shape[0],))
+    X, y = SPECS[name].generate(np.random.default_rng(seed_seq), stop - start)
+    X_out[start:stop] = X
+    y_out[start:stop] = y
+    X_out.flush()
+    y_out.flush()
+    return stop - start
+
+
+def generate_dataset(spec: PetModelSpec, rows: int, seed: int, chunk_rows: int = 1_000_000,
+                     workers: int = 1, data_dir: Optional[str] = None):
+    """(X, y) as read-only memmaps of `rows` rows, filled chunk by chunk by `workers` processes."""
+    data_dir = data_dir or tempfile.mkdtemp(prefix=f"pet_{spec.name}_")
+    os.makedirs(data_dir, exist_ok=True)
+    x_path = os.path.join(data_dir, f"{spec.name}-{seed}-X.f32")
+    y_path = os.path.join(data_dir, f"{spec.name}-{seed}-y.bin")
+    y_dtype = np.uint8 if spec.is_classifier else np.float32
+    shape = (rows, spec.n_features)
+    np.memmap(x_path, dtype=np.float32, mode="w+", shape=shape).flush()
+    np.memmap(y_path, dtype=y_dtype, mode="w+", shape=(rows,)).flush()
+
+    bounds = list(range(0, rows, chunk_rows)) + [rows]
+    tasks = [(spec.name, x_path, y_path, shape, y_dtype, a, b, s)
+             for (a, b), s in zip(zip(bounds, bounds[1:]), _chunk_seeds(seed, len(bounds) - 1))]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_fill_chunk, *zip(*tasks)))
+    else:
+        for task in tasks:
+            _fill_chunk(*task)
+    X = np.memmap(x_path, dtype=np.float32, mode="r", shape=shape)
+    y = np.memmap(y_path, dtype=y_dtype, mode="r", shape=(rows,))
+    return X, y, data_dir
+
+
+def _relabel(model, classes):
+    # fitted on uint8 codes (1 byte per row instead of a string); expose the names
+    names = np.array(classes, dtype=object)
+    model.classes_ = names[model.classes_.astype(int)]
+    for tree in model.estimators_:
+        tree.classes_ = model.classes_
+
+
+def train(spec: PetModelSpec, rows: Optional[int] = None, test_rows: Optional[int] = None,
+          seed: int = 42, chunk_rows: int = 1_000_000, workers: int = 1, n_jobs: int = -1,
+          max_samples: Optional[float] = None, data_dir: Optional[str] = None,
+          keep_data: bool = False, **params):
+    """Generate, fit and evaluate one model; returns (package, metadata)."""
+    rows = rows or spec.rows
+    test_rows = test_rows if test_rows is not None else min(max(rows // 4, 1), 200_000)
+    started = time.perf_counter()
+    X, y, data_dir_used = generate_dataset(spec, rows, seed, chunk_rows, workers, data_dir)
+    X_test, y_test = spec.generate(np.random.default_rng([seed, 1]), test_rows)
+    generate_s = time.perf_counter() - started
+    print(f"[{spec.name}] generated {rows:,} + {test_rows:,} test rows in {generate_s:.2f}s "
+          f"({rows / max(generate_s, 1e-9):,.0f} rows/s, {X.nbytes / 1e6:,.1f} MB features)")
+
+    model = spec.estimator(random_state=seed, n_jobs=n_jobs, max_samples=max_samples, **params)
+    start = time.perf_counter()
+    model.fit(X, y)
+    fit_s = time.perf_counter() - start
+    if spec.is_classifier:
+        _relabel(model, spec.classes)
+        score = float(np.mean(model.predict(X_test) == np.array(spec.classes, dtype=object)[y_test]))
+    else:
+        score = float(model.score(X_test, y_test))
+    model.n_jobs = 1  # serving predicts one row at a time; threads would only add overhead
+    print(f"[{spec.name}] fitted {model.n_estimators} trees in {fit_s:.2f}s; "
+          f"test {'accuracy' if spec.is_classifier else 'R²'} {score:.4f}")
+
+    package = spec.package(model)
+    model_bytes = len(pickle.dumps(package, protocol=pickle.HIGHEST_PROTOCOL))
+    if not keep_data and data_dir is None:
+        del X, y
+        shutil.rmtree(data_dir_used, ignore_errors=True)
+    metadata = {
+        "model": spec.artifact,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "rows": rows,
+        "test_rows": test_rows,
+        "chunk_rows": chunk_rows,
+        "features": spec.feature_names,
+        "data_bytes": rows * (spec.n_features * 4 + (1 if spec.is_classifier else 4)),
+        "params": {k: v for k, v in model.get_params().items() if not callable(v)},
+        "generate_seconds": round(generate_s, 3),
+        "fit_seconds": round(fit_s, 3),
+        "n_jobs": n_jobs,
+        "workers": workers,
+        "nodes": int(sum(t.tree_.node_count for t in model.estimators_)),
+        "model_bytes": model_bytes,
+        "accuracy" if spec.is_classifier else "r2": round(score, 4),
+    }
+    return package, metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("models", nargs="*", help=f"any of {', '.join(SPECS)} (default: all)")
+    parser.add_argument("--rows", type=int, help="training rows (default: the model's usual size)")
+    parser.add_argument("--test-rows", type=int)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="processes generating chunks")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="threads fitting trees (-1: all cores)")
+    parser.add_argument("--n-estimators", type=int)
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--max-samples", type=float, help="bootstrap fraction per tree (large datasets)")
+    parser.add_argument("--data-dir", help="keep the generated memmaps here (default: temporary)")
+    parser.add_argument("--artifact-dir", default="artifacts")
+    parser.add_argument("--no-promote", dest="promote", action="store_false",
+                        help="do not replace the pet_*_model.pkl the service loads")
+    args = parser.parse_args(argv)
+    unknown = [m for m in args.models if m not in SPECS]
+    if unknown:
+        parser.error(f"unknown model(s) {', '.join(unknown)}; choose from {', '.join(SPECS)}")
+
+    overrides = {k: v for k, v in (("n_estimators", args.n_estimators), ("max_depth", args.max_depth))
+                 if v is not None}
+    summary = []
+    for name in dict.fromkeys(args.models or SPECS):
+        spec = SPECS[name]
+        package, metadata = train(spec, rows=args.rows, test_rows=args.test_rows, seed=args.seed,
+                                  chunk_rows=args.chunk_rows, workers=args.workers, n_jobs=args.n_jobs,
+                                  max_samples=args.max_samples, data_dir=args.data_dir, **overrides)
+        artifact_dir = os.path.join(args.artifact_dir, spec.artifact)
+        version = next_version(artifact_dir)
+        metadata["version"] = version
+        path = write_artifact(artifact_dir, version, package, metadata,
+                              promote_to=spec.output if args.promote else None)
+        print(f"[{name}] saved v{version} as {path}" + (f" and {spec.output}" if args.promote else ""))
+        summary.append({k: metadata.get(k) for k in ("model", "version", "rows", "generate_seconds",
+                                                     "fit_seconds", "nodes", "model_bytes", "accuracy", "r2")})
+    print(pd.DataFrame(summary).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# rate_limiter.py
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second refill up to `burst`.
+    Waiters are served in arrival order, so the long-run request rate never
+    exceeds `rate` no matter how many coroutines call `acquire` at once.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                self.waits += 1
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
@@ -0,0 +1,136 @@
+# response_cache.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from event_log import NULL_LOG
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries are fresh for `ttl` seconds.
+    Expired entries are not returned by `get` but are kept (until LRU
+    eviction) so callers can still `peek` at a stale value.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def peek(self, key: Hashable) -> Tuple[Optional[Any], Optional[float]]:
+        """(value, age in seconds) regardless of freshness; (None, None) if absent."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None, None
+            self._data.move_to_end(key)
+            stored_at, value = item
+            return value, time.monotonic() - stored_at
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value, age = self.peek(key)
+        if value is None or age > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def after_fork(self):
+        """Call in a forked child; the entries are kept as this process's own copy."""
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one in-flight task;
+    every caller awaits the same result (or exception).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        # shield: a cancelled caller must not cancel the fetch others wait on
+        return await asyncio.shield(task)
+
+
+_refresh_tasks = set()
+
+
+async def get_or_fetch(cache: TTLCache, flight: SingleFlight, key: Hashable,
+                       fetch: Callable[[], Awaitable[Any]], max_stale: float = 0.0,
+                       log=None) -> Tuple[Any, str]:
+    """
+    Stale-while-revalidate lookup. Returns (value, state) where state is
+    "fresh", "stale" or "miss".
+
+    An entry past its TTL but within `max_stale` more seconds is returned
+    at once while one background refresh replaces it. If a fetch fails and
+    any older copy exists, that copy is served instead of the error.
+    Failed background refreshes are reported to `log` (an EventLog).
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value, "fresh"
+
+    async def refresh():
+        fresh = await flight.do(key, fetch)
+        cache.set(key, fresh)
+        return fresh
+
+    async def refresh_quietly():
+        try:
+            await refresh()
+        except Exception as e:
+            (log or NULL_LOG).warning("background_refresh_failed", key=str(key), error=str(e))
+
+    stale, age = cache.peek(key)
+    if stale is not None and age <= cache.ttl + max_stale:
+        task = asyncio.get_running_loop().create_task(refresh_quietly())
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+        return stale, "stale"
+    try:
+        return await refresh(), "miss"
+    except Exception:
+        if stale is not None:
+            return stale, "stale"
+        raise
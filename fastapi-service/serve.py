@@ -0,0 +1,93 @@
+# serve.py
+# Preload-then-fork server: models are loaded once in the parent, then N
+# uvicorn workers are forked off one listening socket and share the loaded
+# weights copy-on-write instead of each loading its own copy.
+#   python serve.py --workers 4 --port 8000
+#   MODEL_SHARING=mmap python serve.py --workers 16   # pet model reloads stay shared too
+#
+# State after the fork (see main._after_fork_in_child):
+#   - models: shared copy-on-write; hot reloads happen per worker
+#   - EMBEDDING_STORE_PATH, NUTRITION_STORE_PATH, NOTE_INDEX_PATH: shared
+#     through their files, each worker sees the others' writes
+#   - response and embedding LRU caches, circuit breakers, comfort stream
+#     windows and the Spoonacular rate limiter (SPOONACULAR_RPS is per
+#     worker): per worker. NOTE_INDEX_PATH=off likewise leaves each worker
+#     with its own unsaved note index.
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+
+def _fork_worker(app, sock, args):
+    pid = os.fork()
+    if pid:
+        return pid
+    import uvicorn
+
+    # the parent's signal handlers must not run in the worker
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=args.log_level, access_log=args.access_log)
+    uvicorn.Server(config).run(sockets=[sock])
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--load-timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    os.environ["MODEL_LOADING"] = "lazy"  # loaded below, before forking
+    import main as service
+
+    ready = service.models.wait_all(timeout=args.load_timeout)
+    print(f"Models loaded in {time.perf_counter() - started:.2f}s (ready={ready})")
+    # keep the collector from writing to (and so un-sharing) every preloaded object
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = {_fork_worker(service.app, sock, args) for _ in range(args.workers)}
+    print(f"Serving on {args.host}:{args.port} with {len(workers)} workers: {sorted(workers)}")
+
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            # replace a crashed worker from the already loaded parent
+            print(f"Worker {pid} exited ({status}); restarting")
+            workers.add(_fork_worker(service.app, sock, args))
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# shared_artifacts.py
+import os
+from typing import Any, Callable, Optional
+
+import joblib
+
+from tree_compiler import CompiledForest, compile_or_keep
+
+SUFFIX = ".mmap"
+
+
+def shareable_forest(model):
+    """
+    A CompiledForest without its sklearn fallback, so every array in it can
+    be memory-mapped (sklearn copies tree nodes into private memory when it
+    unpickles them). Models that do not compile are returned unchanged.
+    """
+    compiled = model if isinstance(model, CompiledForest) else compile_or_keep(model)
+    if isinstance(compiled, CompiledForest):
+        compiled.fallback = None
+    return compiled
+
+
+def export_shared(path: str, prepare: Optional[Callable[[Any], Any]] = None,
+                  out: Optional[str] = None) -> str:
+    """Write `path` (after `prepare`) as an uncompressed joblib file whose arrays can be mapped."""
+    package = joblib.load(path)
+    if prepare is not None:
+        package = prepare(package)
+    out = out or path + SUFFIX
+    # several workers may export at once; each writes its own file and the last rename wins
+    tmp = f"{out}.{os.getpid()}.tmp"
+    joblib.dump(package, tmp)
+    os.replace(tmp, out)
+    return out
+
+
+def load_shared(path: str, prepare: Optional[Callable[[Any], Any]] = None):
+    """
+    Load the model at `path` with its NumPy arrays memory-mapped read-only
+    from `<path>.mmap`, exporting that file first if it is missing or older
+    than `path`. Every process mapping the file shares the same page-cache
+    pages, so N workers hold one physical copy of the arrays.
+    """
+    out = path + SUFFIX
+    if not os.path.exists(out) or os.path.getmtime(out) < os.path.getmtime(path):
+        export_shared(path, prepare, out)
+    return joblib.load(out, mmap_mode="r")
+
+
+if __name__ == "__main__":
+    # python shared_artifacts.py pet_comfort_model.pkl pet_health_model.pkl ...
+    # exports ahead of time, so workers never race to build the .mmap files
+    import sys
+
+    for artifact in sys.argv[1:]:
+        package = joblib.load(artifact)
+        if isinstance(package, dict) and "model" in package:
+            prepare = lambda p: {**p, "model": shareable_forest(p["model"])}
+        elif hasattr(package, "estimators_"):
+            prepare = shareable_forest
+        else:
+            prepare = None
+        print("Wrote", export_shared(artifact, prepare))
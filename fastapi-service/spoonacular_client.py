@@ -0,0 +1,133 @@
+# spoonacular_client.py
+import asyncio
+import random
+import re
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from rate_limiter import TokenBucket
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# 402 is Spoonacular's "daily quota used up"
+BREAKER_FAILURE_STATUSES = RETRY_STATUSES | {402}
+
+
+class UpstreamError(Exception):
+    """
+    Spoonacular answered with a server, rate-limit or quota error, or could
+    not be reached (connect/read timeouts and other transport errors that
+    outlast the retries).
+    """
+
+
+class SpoonacularClient:
+    """
+    Shared async HTTP client for the Spoonacular API.
+
+    One connection pool with keep-alive is reused by every request, the
+    number of open connections is capped (all calls go to one host, so the
+    pool limit is the per-host limit), and every call gets the same timeout
+    policy. Transport errors and 429/5xx responses are retried with
+    exponential backoff and jitter; a transport error that outlasts the
+    retries is raised as UpstreamError. When `rate_limiter` is set, every
+    attempt (retries included) takes a token first, keeping the client
+    within the API quota.
+
+    Each upstream route (path with numeric ids collapsed, e.g.
+    /recipes/{id}/information) has its own circuit breaker built from
+    `breaker_options`; an open breaker raises CircuitOpenError at once.
+
+    `observe(route, seconds, outcome)` is called after every attempt with
+    the status code, "error" (transport error) or "circuit_open";
+    `in_flight` counts attempts awaiting a response.
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: str = "https://api.spoonacular.com",
+                 timeout: float = 10.0, connect_timeout: float = 3.0,
+                 max_connections: int = 20, max_keepalive: int = 10,
+                 retries: int = 2, backoff: float = 0.25,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 breaker_options: Optional[Dict] = None,
+                 observe: Optional[Callable[[str, float, str], None]] = None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=30.0)
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.rate_limiter = rate_limiter
+        self.breaker_options = breaker_options or {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.observe = observe
+        self.in_flight = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout,
+                                             limits=self.limits)
+        return self._client
+
+    def breaker(self, path: str) -> CircuitBreaker:
+        route = re.sub(r"/\d+(?=/|$)", "/{id}", path)
+        if route not in self.breakers:
+            self.breakers[route] = CircuitBreaker(route, **self.breaker_options)
+        return self.breakers[route]
+
+    async def request(self, method: str, path: str, params: Optional[Dict] = None,
+                      data: Optional[Dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+        params = dict(params or {})
+        params["apiKey"] = self.api_key
+        kwargs = {"params": params, "data": data}
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=self.timeout.connect)
+        breaker = self.breaker(path)
+
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            # each attempt goes through the breaker on its own, so rate-limit
+            # waits and backoff sleeps never count as upstream latency
+            start = time.perf_counter()
+            outcome = "error"
+            self.in_flight += 1
+            try:
+                resp = await breaker.call(
+                    lambda: self.client.request(method, path, **kwargs),
+                    is_failure=lambda r: r.status_code in BREAKER_FAILURE_STATUSES)
+                outcome = str(resp.status_code)
+            except CircuitOpenError:
+                outcome = "circuit_open"
+                raise
+            except httpx.TransportError as e:
+                if last:
+                    raise UpstreamError(f"{method} {breaker.name} failed: {type(e).__name__}: {e}") from e
+            else:
+                if resp.status_code not in RETRY_STATUSES or last:
+                    return resp
+            finally:
+                self.in_flight -= 1
+                if self.observe is not None:
+                    self.observe(breaker.name, time.perf_counter() - start, outcome)
+            delay = self.backoff * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+
+    async def get(self, path: str, params: Optional[Dict] = None,
+                  timeout: Optional[float] = None) -> httpx.Response:
+        return await self.request("GET", path, params=params, timeout=timeout)
+
+    async def post(self, path: str, params: Optional[Dict] = None, data: Optional[Dict] = None,
+                   timeout: Optional[float] = None) -> httpx.Response:
+        return await self.request("POST", path, params=params, data=data, timeout=timeout)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
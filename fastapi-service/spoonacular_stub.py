@@ -0,0 +1,166 @@
+# spoonacular_stub.py
+# Local stand-in for the Spoonacular API, for load tests and offline runs:
+#   python spoonacular_stub.py replay --port 8090 --latency-ms 120 --jitter-ms 60 --error-rate 0.02
+#   SPOONACULAR_BASE_URL=http://127.0.0.1:8090 uvicorn main:app
+# Record real responses to replay later (proxies to Spoonacular, key from SPOONACULAR_API_KEY):
+#   python spoonacular_stub.py record --port 8090 --fixtures recorded.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spoonacular_fixtures.json")
+
+
+def route_of(path: str) -> str:
+    # same collapsing as SpoonacularClient.breaker(): /recipes/123/information -> /recipes/{id}/information
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path)
+
+
+def _params_key(params: Dict) -> str:
+    return json.dumps({k: v for k, v in sorted(params.items()) if k != "apiKey"})
+
+
+class Replay:
+    """Recorded responses by exact (method, path, params), falling back to the route's first response."""
+
+    def __init__(self, responses: List[Dict]):
+        self.exact: Dict = {}
+        self.by_route: Dict = {}
+        for r in responses:
+            if r.get("params") is not None and r.get("path"):
+                self.exact[(r["method"], r["path"], _params_key(r["params"]))] = r
+            self.by_route.setdefault((r["method"], r.get("route") or route_of(r["path"])), r)
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["responses"])
+
+    def find(self, method: str, path: str, params: Dict) -> Optional[Dict]:
+        hit = self.exact.get((method, path, _params_key(params)))
+        return hit or self.by_route.get((method, route_of(path)))
+
+
+def build_app(replay: Optional[Replay], latency_ms: float = 0.0, jitter_ms: float = 0.0,
+              error_rate: float = 0.0, error_status: int = 503, seed: Optional[int] = None,
+              record_to: Optional[str] = None, upstream: str = "https://api.spoonacular.com"):
+    """
+    Every call waits `latency_ms` plus up to `jitter_ms`, then fails with
+    `error_status` with probability `error_rate`, else answers from
+    `replay` (404 when nothing matches). With `record_to`, calls are
+    proxied to `upstream` and the responses appended to that file.
+    GET /__stub/stats reports calls per route; POST /__stub/config changes
+    latency_ms, jitter_ms, error_rate and error_status while running.
+    """
+    config = {"latency_ms": latency_ms, "jitter_ms": jitter_ms,
+              "error_rate": error_rate, "error_status": error_status}
+    rng = random.Random(seed)
+    calls: Dict[str, Dict[str, int]] = {}
+    recorded: List[Dict] = []
+    lock = threading.Lock()
+    client = None
+
+    async def handle(request: Request):
+        nonlocal client
+        method, path = request.method, request.url.path
+        params = dict(request.query_params)
+        form = None
+        if method == "POST":
+            # the client posts urlencoded forms; parsed here to avoid needing python-multipart
+            form = dict(parse_qsl((await request.body()).decode("utf-8")))
+            params.update(form)
+        delay = config["latency_ms"] + rng.uniform(0, config["jitter_ms"])
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+
+        counts = calls.setdefault(f"{method} {route_of(path)}", {"calls": 0, "errors": 0})
+        counts["calls"] += 1
+        if rng.random() < config["error_rate"]:
+            counts["errors"] += 1
+            return JSONResponse({"status": "failure", "message": "injected error"},
+                                status_code=config["error_status"])
+
+        if record_to:
+            import httpx
+
+            if client is None:
+                client = httpx.AsyncClient(base_url=upstream, timeout=30)
+            query = dict(request.query_params)
+            query["apiKey"] = os.getenv("SPOONACULAR_API_KEY", "")
+            resp = await client.request(method, path, params=query, data=form)
+            try:
+                body = resp.json()
+            except ValueError:
+                body = resp.text
+            with lock:
+                recorded.append({"method": method, "path": path, "route": route_of(path),
+                                 "params": {k: v for k, v in params.items() if k != "apiKey"},
+                                 "status": resp.status_code, "body": body})
+                with open(record_to + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump({"responses": recorded}, f, indent=1)
+                os.replace(record_to + ".tmp", record_to)
+            return JSONResponse(body, status_code=resp.status_code)
+
+        hit = replay.find(method, path, params) if replay is not None else None
+        if hit is None:
+            return JSONResponse({"status": "failure", "message": f"no fixture for {method} {path}"},
+                                status_code=404)
+        return JSONResponse(hit["body"], status_code=hit.get("status", 200))
+
+    async def stats(request: Request):
+        return JSONResponse({"config": config, "calls": calls})
+
+    async def set_config(request: Request):
+        update = await request.json()
+        config.update({k: type(config[k])(v) for k, v in update.items() if k in config})
+        return JSONResponse(config)
+
+    async def reset(request: Request):
+        calls.clear()
+        return Response(status_code=204)
+
+    return Starlette(routes=[
+        Route("/__stub/stats", stats, methods=["GET"]),
+        Route("/__stub/config", set_config, methods=["POST"]),
+        Route("/__stub/reset", reset, methods=["POST"]),
+        Route("/{path:path}", handle, methods=["GET", "POST"]),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=("replay", "record"), nargs="?", default="replay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    if args.mode == "record":
+        app = build_app(None, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status,
+                        args.seed, record_to=args.fixtures)
+    else:
+        app = build_app(Replay.load(args.fixtures), args.latency_ms, args.jitter_ms,
+                        args.error_rate, args.error_status, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
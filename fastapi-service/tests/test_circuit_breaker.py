@@ -0,0 +1,80 @@
+# tests/test_circuit_breaker.py
+import asyncio
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_opens_after_consecutive_failures_and_fails_fast(clock):
+    breaker = CircuitBreaker("r", failure_threshold=3, reset_timeout=10)
+    breaker.record(False, 0.1)
+    breaker.record(True, 0.1)  # a success resets the count
+    for _ in range(2):
+        breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker._before_call()
+    assert breaker.rejected == 1 and breaker.trips == 1
+
+
+def test_half_open_probe_closes_or_reopens(clock):
+    breaker = CircuitBreaker("r", failure_threshold=1, reset_timeout=10)
+    breaker.record(False, 0.1)
+    clock.now += 10
+    breaker._before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker._before_call()  # only one probe at a time
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN and breaker.trips == 2
+
+    clock.now += 10
+    breaker._before_call()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_slow_successes_count_as_failures(clock):
+    breaker = CircuitBreaker("r", failure_threshold=2, latency_threshold=1.0)
+    breaker.record(True, 2.0)
+    breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_call_uses_is_failure_and_reraises_errors(clock):
+    breaker = CircuitBreaker("r", failure_threshold=2)
+
+    async def ok():
+        return 500
+
+    async def boom():
+        raise RuntimeError("down")
+
+    async def run():
+        assert await breaker.call(ok, is_failure=lambda r: r >= 500) == 500
+        with pytest.raises(RuntimeError):
+            await breaker.call(boom)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(ok)
+
+    asyncio.run(run())
+    assert breaker.failures == 2
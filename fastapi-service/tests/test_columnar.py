@@ -0,0 +1,63 @@
+# tests/test_columnar.py
+import io
+import json
+import re
+
+import numpy as np
+import pytest
+
+from columnar import (JSON, NPZ, ColumnError, numeric_column, payload_format, read_columns,
+                      write_columns)
+
+
+def npz(**arrays):
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def test_payload_format_from_content_type():
+    assert payload_format("application/x-npz; charset=binary") == NPZ
+    assert payload_format("application/json") == JSON
+    assert payload_format(None) == JSON
+
+
+def test_json_and_npz_read_the_same_columns():
+    from_json = read_columns(json.dumps({"breed": ["pug", "lab"], "weight": [8, 30.5],
+                                         "extra": [1]}).encode(), JSON, ["breed", "weight"])
+    from_npz = read_columns(npz(breed=np.array(["pug", "lab"]), weight=np.array([8, 30.5])),
+                            NPZ, ["breed", "weight"])
+    assert list(from_json) == ["breed", "weight"]
+    for name in from_json:
+        np.testing.assert_array_equal(from_json[name], from_npz[name])
+
+
+@pytest.mark.parametrize("body, content_type, message", [
+    (b"{not json", JSON, "invalid JSON"),
+    (b"[1, 2]", JSON, "expected an object"),
+    (b'{"breed": ["pug"]}', JSON, "missing column(s): weight"),
+    (b'{"breed": [["pug"]], "weight": [1]}', JSON, "one-dimensional"),
+    (b'{"breed": ["pug", "lab"], "weight": [1]}', JSON, "same length"),
+    (b'{"breed": ["a", "b", "c"], "weight": [1, 2, 3]}', JSON, "at most 2 rows"),
+    (b"not an archive", NPZ, "unreadable npz"),
+    (npz(breed=np.array(["pug"], dtype=object), weight=np.array([1])), NPZ, "unreadable npz"),
+])
+def test_bad_payloads_raise_column_errors(body, content_type, message):
+    with pytest.raises(ColumnError, match=re.escape(message)):
+        read_columns(body, content_type, ["breed", "weight"], max_rows=2)
+
+
+def test_numeric_column():
+    columns = {"weight": np.array(["8", "30.5"]), "breed": np.array(["pug", "lab"])}
+    np.testing.assert_array_equal(numeric_column(columns, "weight"), [8.0, 30.5])
+    with pytest.raises(ColumnError, match="breed must be numeric"):
+        numeric_column(columns, "breed")
+
+
+def test_write_columns_round_trips_in_both_formats():
+    result = {"portion": np.array([120.5, 300.0]), "food": np.array(["wet_food", "mixed"])}
+    assert json.loads(write_columns(result, JSON)) == {"portion": [120.5, 300.0],
+                                                       "food": ["wet_food", "mixed"]}
+    back = read_columns(write_columns(result, NPZ), NPZ, ["portion", "food"])
+    np.testing.assert_array_equal(back["portion"], result["portion"])
+    np.testing.assert_array_equal(back["food"], result["food"])
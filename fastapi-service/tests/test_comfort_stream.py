@@ -0,0 +1,127 @@
+# tests/test_comfort_stream.py
+import asyncio
+
+import numpy as np
+
+from comfort_stream import ChangeSink, ComfortStream, PetWindow
+
+
+def _threshold_model(X):
+    # comfortable below 25 degrees (averaged over the window), else uncomfortable
+    return ["comfortable" if t < 25 else "uncomfortable" for t in np.asarray(X)[:, 0]]
+
+
+def test_window_averages_and_slides():
+    w = PetWindow(size=2)
+    for i, t in enumerate([20.0, 22.0, 30.0]):
+        w.add(float(i), {"temperature": t, "humidity": 50.0, "feeding_interval": 4, "activity_level": 6}, 60)
+    assert w.ready()
+    assert w.features() == [26.0, 50.0, 4.0, 6.0]
+
+
+def test_window_drops_readings_older_than_max_age():
+    w = PetWindow(size=10)
+    full = {"humidity": 40.0, "feeding_interval": 4, "activity_level": 6}
+    w.add(0.0, {"temperature": 10.0, **full}, max_age=5)
+    w.add(10.0, {"temperature": 30.0, **full}, max_age=5)
+    assert w.features()[0] == 30.0
+
+
+def test_temperature_only_stream_fills_humidity_from_last_value():
+    w = PetWindow(size=3)
+    w.add(0.0, {"temperature": 20.0}, 60)
+    assert not w.readings  # humidity never seen: nothing to average yet
+    w.add(1.0, {"humidity": 50.0, "feeding_interval": 4, "activity_level": 6}, 60)
+    for i, t in enumerate([22.0, 24.0, 26.0]):
+        w.add(2.0 + i, {"temperature": t}, 60)
+    assert w.ready()
+    assert len(w.readings) == 3
+    assert w.features() == [24.0, 50.0, 4.0, 6.0]
+
+
+def test_stream_emits_only_on_change_and_scores_temperature_only_devices():
+    async def run():
+        stream = ComfortStream(_threshold_model, window_size=1, max_wait_ms=1)
+        sink = ChangeSink()
+        assert stream.submit({"pet_id": "a", "temperature": 20, "humidity": 50,
+                              "feeding_interval": 4, "activity_level": 6}, sink) is None
+        await stream.flush()
+        first = await sink.take(0)
+        for t in (21, 22, 23):
+            stream.submit({"pet_id": "a", "temperature": t}, sink)
+            await stream.flush()
+        unchanged = await sink.take(0)
+        stream.submit({"pet_id": "a", "temperature": 31}, sink)
+        await stream.flush()
+        changed = await sink.take(0)
+        return first, unchanged, changed, stream.stats()
+
+    first, unchanged, changed, stats = asyncio.run(run())
+    assert [m["comfort_level"] for m in first] == ["comfortable"]
+    assert unchanged == []
+    assert changed[0]["comfort_level"] == "uncomfortable"
+    assert changed[0]["previous"] == "comfortable"
+    assert changed[0]["features"]["humidity"] == 50.0
+    assert stats["changes"] == 2
+
+
+def test_micro_batches_dirty_pets_into_one_predict():
+    calls = []
+
+    def model(X):
+        calls.append(len(X))
+        return _threshold_model(X)
+
+    async def run():
+        stream = ComfortStream(model, max_wait_ms=20)
+        sink = ChangeSink()
+        for i in range(50):
+            stream.submit({"pet_id": i, "temperature": 20, "humidity": 50,
+                           "feeding_interval": 4, "activity_level": 6}, sink)
+        await stream.flush()
+        return await sink.take(0)
+
+    messages = asyncio.run(run())
+    assert calls == [50]
+    assert len(messages) == 50
+
+
+def test_rejects_bad_readings():
+    async def run():
+        stream = ComfortStream(_threshold_model)
+        sink = ChangeSink()
+        return (stream.submit({"temperature": 20}, sink),
+                stream.submit({"pet_id": "a", "temperature": "warm"}, sink), stream.rejected)
+
+    missing, not_number, rejected = asyncio.run(run())
+    assert missing == "missing pet_id"
+    assert not_number == "readings must be numbers"
+    assert rejected == 2
+
+
+def test_predict_errors_reach_the_sink():
+    def broken(X):
+        raise RuntimeError("model not ready")
+
+    async def run():
+        stream = ComfortStream(broken, max_wait_ms=1)
+        sink = ChangeSink()
+        stream.submit({"pet_id": "a", "temperature": 20, "humidity": 50,
+                       "feeding_interval": 4, "activity_level": 6}, sink)
+        await stream.flush()
+        return await sink.take(0), stream.errors
+
+    messages, errors = asyncio.run(run())
+    assert messages == [{"pet_id": "a", "error": "model not ready"}]
+    assert errors == 1
+
+
+def test_coalescing_sink_keeps_newest_change_per_pet():
+    async def run():
+        sink = ChangeSink()
+        sink.put("a", {"level": 1})
+        sink.put("b", {"level": 1})
+        sink.put("a", {"level": 2})
+        return await sink.take(0)
+
+    assert asyncio.run(run()) == [{"level": 1}, {"level": 2}]
@@ -0,0 +1,39 @@
+# tests/test_embedder_backends.py
+import importlib.util
+
+import pytest
+
+from embedder_backends import build_embedder, versioned_onnx_path, weights_fingerprint
+
+
+def test_onnx_path_is_keyed_by_weights():
+    assert versioned_onnx_path("model_embedder.onnx", "abc123") == "model_embedder-abc123.onnx"
+    assert versioned_onnx_path("/tmp/graphs/emb", "abc123") == "/tmp/graphs/emb-abc123.onnx"
+
+
+def test_torch_backend_is_the_model_itself_and_unknown_backends_fail():
+    model = object()
+    assert build_embedder(model, "TORCH") is model
+    assert build_embedder(model, None) is model
+    with pytest.raises(ValueError):
+        build_embedder(model, "tensorrt")
+
+
+@pytest.mark.skipif(importlib.util.find_spec("onnxruntime") is not None,
+                    reason="onnxruntime is installed")
+def test_onnx_backend_explains_missing_onnxruntime():
+    with pytest.raises(ImportError, match="pip install onnxruntime"):
+        build_embedder(object(), "onnx")
+
+
+def test_weights_fingerprint_changes_with_the_weights():
+    torch = pytest.importorskip("torch")
+
+    class Transformer:
+        def __init__(self, value):
+            self.auto_model = torch.nn.Linear(4, 4)
+            torch.nn.init.constant_(self.auto_model.weight, value)
+
+    same = weights_fingerprint([Transformer(1.0)])
+    assert weights_fingerprint([Transformer(1.0)]) == same
+    assert weights_fingerprint([Transformer(2.0)]) != same
@@ -0,0 +1,116 @@
+# tests/test_embedding_cache.py
+import multiprocessing
+import zlib
+
+import numpy as np
+import pytest
+
+from embedding_cache import (CachedEmbedder, LRUEmbeddingCache, PersistentEmbeddingStore,
+                             normalize_text)
+
+
+class CountingEmbedder:
+    def __init__(self, dim=4):
+        self.dim = dim
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([_vector(t, self.dim) for t in texts], dtype=np.float32)
+
+
+def _vector(text, dim=4):
+    rng = np.random.default_rng(zlib.crc32(text.encode()))
+    return rng.standard_normal(dim).astype(np.float32)
+
+
+def test_normalize_text():
+    assert normalize_text("  Feed   the CAT \n") == "feed the cat"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUEmbeddingCache(max_entries=2)
+    cache.put("a", np.zeros(2))
+    cache.put("b", np.zeros(2))
+    cache.get("a")
+    cache.put("c", np.zeros(2))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_respects_byte_budget():
+    cache = LRUEmbeddingCache(max_entries=100, max_bytes=3 * 16)
+    for key in "abcd":
+        cache.put(key, np.zeros(4, dtype=np.float32))
+    assert len(cache) == 3
+    assert cache.stats()["bytes"] <= 48
+
+
+def test_cached_embedder_encodes_each_normalized_text_once():
+    embedder = CountingEmbedder()
+    cached = CachedEmbedder(embedder, LRUEmbeddingCache())
+    first = cached.encode(["Walk dog", "walk  DOG", "feed cat"])
+    second = cached.encode(["feed cat"])
+    assert embedder.calls == [["walk dog", "feed cat"]]
+    np.testing.assert_array_equal(first[0], first[1])
+    np.testing.assert_array_equal(first[2], second[0])
+
+
+def test_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "store")
+    store = PersistentEmbeddingStore(path, initial_capacity=2)
+    vectors = np.arange(20, dtype=np.float32).reshape(5, 4)
+    store.put_many([f"k{i}" for i in range(5)], vectors)
+    reopened = PersistentEmbeddingStore(path)
+    assert len(reopened) == 5
+    for i in range(5):
+        np.testing.assert_array_equal(reopened.get(f"k{i}"), vectors[i])
+    assert reopened.get("missing") is None
+
+
+def test_store_sees_keys_added_by_another_instance(tmp_path):
+    path = str(tmp_path / "store")
+    a = PersistentEmbeddingStore(path, initial_capacity=1)
+    b = PersistentEmbeddingStore(path, initial_capacity=1)
+    a.put_many(["x"], np.ones((1, 3)))
+    b.put_many(["y", "x"], np.full((2, 3), 2.0))  # "x" is already there
+    np.testing.assert_array_equal(b.get("x"), np.ones(3))
+    np.testing.assert_array_equal(a.get("y"), np.full(3, 2.0))
+    assert len(PersistentEmbeddingStore(path)) == 2
+
+
+def _write_keys(path, worker, n):
+    store = PersistentEmbeddingStore(path, initial_capacity=4)
+    for i in range(n):
+        key = f"w{worker}-{i}"
+        store.put_many([key], _vector(key)[None, :])
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_store_rows_stay_consistent_with_concurrent_writer_processes(tmp_path):
+    path = str(tmp_path / "store")
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_write_keys, args=(path, w, 40)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    store = PersistentEmbeddingStore(path)
+    assert len(store) == 160
+    for w in range(4):
+        for i in range(40):
+            key = f"w{w}-{i}"
+            np.testing.assert_array_equal(store.get(key), _vector(key))
+
+
+def test_cached_embedder_reads_through_store(tmp_path):
+    path = str(tmp_path / "store")
+    first = CachedEmbedder(CountingEmbedder(), LRUEmbeddingCache(), PersistentEmbeddingStore(path))
+    first.encode(["a note"])
+    embedder = CountingEmbedder()
+    second = CachedEmbedder(embedder, LRUEmbeddingCache(), PersistentEmbeddingStore(path))
+    second.encode(["A note"])
+    assert embedder.calls == []
+    assert second.stats()["store_hits"] == 1
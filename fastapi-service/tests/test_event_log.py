@@ -0,0 +1,50 @@
+# tests/test_event_log.py
+import io
+import json
+
+from event_log import NULL_LOG, EventLog
+
+
+def written(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_events_are_json_lines_filtered_by_level():
+    stream = io.StringIO()
+    log = EventLog(stream, level="info")
+    log.debug("hidden")
+    log.info("shown", items=3)
+    log.error("broken", error="boom")
+    log.flush()
+    events = written(stream)
+    assert [e["event"] for e in events] == ["shown", "broken"]
+    assert events[0]["items"] == 3 and events[1]["level"] == "error"
+
+
+def test_sampling_keeps_warnings_and_records_the_rate():
+    stream = io.StringIO()
+    log = EventLog(stream, sample_rate=0.0)
+    for _ in range(50):
+        log.info("routine")
+    log.warning("important")
+    log.event("lifecycle", sample_rate=1.0)
+    log.flush()
+    assert [e["event"] for e in written(stream)] == ["important", "lifecycle"]
+    assert log.stats()["sampled_out"] == 50
+
+
+def test_full_queue_drops_instead_of_blocking():
+    class Blocked(io.StringIO):
+        def write(self, s):
+            raise OSError("stdout gone")
+
+    log = EventLog(Blocked(), max_queue=1)
+    for _ in range(100):
+        log.error("burst")
+    log.flush()
+    assert log.stats()["dropped"] >= 99
+
+
+def test_null_log_accepts_everything():
+    NULL_LOG.event("x", level="error", sample_rate=1.0, a=1)
+    NULL_LOG.warning("x", a=1)
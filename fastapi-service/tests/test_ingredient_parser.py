@@ -0,0 +1,68 @@
+# tests/test_ingredient_parser.py
+import pytest
+
+from ingredient_parser import (density, parse_line, parse_many, parse_quantity_and_name,
+                               split_lines)
+
+
+@pytest.mark.parametrize("text, quantity, unit, grams, name", [
+    ("1 1/2 cups milk", 1.5, "cup", 1.5 * 240 * 1.03, "milk"),
+    ("½ tsp salt", 0.5, "tsp", 0.5 * 5 * 1.2, "salt"),
+    ("1½ tbsp olive oil", 1.5, "tbsp", 1.5 * 15 * 0.91, "olive oil"),
+    ("8 oz tofu", 8.0, "oz", 8 * 28.3495, "tofu"),
+    ("2 fl oz cream", 2.0, "fl oz", 2 * 29.5735, "cream"),
+    ("250g of Rice (uncooked)", 250.0, "g", 250.0, "rice"),
+    ("2-3 eggs", 2.5, "piece", 2.5 * 50, "eggs"),
+    ("1 c. flour", 1.0, "cup", 240 * 0.53, "flour"),
+    ("150 chicken breast", 150.0, None, 150.0, "chicken breast"),
+    ("1 cup diced onion", 1.0, "cup", 240 * 0.67, "onion"),
+    ("3 cloves garlic, minced", 3.0, "clove", 9.0, "garlic"),
+    ("2 chopped carrots", 2.0, "piece", 2 * 61.0, "carrots"),
+    ("1 can chickpeas", 1.0, "can", 400.0, "chickpeas"),
+    ("1 (15 oz) tin chickpeas, drained and rinsed", 1.0, "can", 400.0, "chickpeas"),
+    ("1 stick butter, softened", 1.0, "stick", 113.0, "butter"),
+    ("1 peeled and diced potato", 1.0, "piece", 173.0, "potato"),
+    ("2 large eggs", 2.0, "piece", 100.0, "eggs"),
+])
+def test_quantities_units_and_grams(text, quantity, unit, grams, name):
+    parsed = parse_line(text)
+    assert parsed.quantity == pytest.approx(quantity)
+    assert parsed.unit == unit
+    assert parsed.grams == pytest.approx(grams)
+    assert parsed.name == name
+
+
+def test_a_unit_prefix_of_the_name_is_not_a_unit():
+    assert parse_line("2 candied ginger").unit is None
+    assert parse_line("2 chopped carrots").unit == "piece"
+    assert parse_line("1 carrot").grams == pytest.approx(61.0)
+    assert parse_line("3 lemons").grams == pytest.approx(3 * 84.0)
+
+
+def test_lines_without_a_usable_quantity_keep_the_name():
+    assert parse_line("Spinach") == (None, None, None, "spinach")
+    assert parse_line("1/0 cup sugar") == (None, None, None, "1/0 cup sugar")
+    assert parse_quantity_and_name("spinach") == (None, "spinach")
+    assert parse_line("Fresh basil, chopped").name == "basil"
+    assert parse_line("salt to taste").name == "salt"
+
+
+def test_descriptor_variants_share_one_name():
+    lines = ["1 cup diced onion", "1 cup onion, diced", "1 cup finely chopped onion", "1 cup onion"]
+    assert {parse_line(line).name for line in lines} == {"onion"}
+
+
+def test_density_uses_the_longest_keyword():
+    assert density("coconut milk") == 0.97
+    assert density("light coconut  milk") == 0.97
+    assert density("tomatoes") == 0.76
+    assert density("mystery sauce") == 1.0
+
+
+def test_split_and_parse_many():
+    lines = split_lines("100 g oats,\n 1 banana, , 1 cup milk")
+    assert lines == ["100 g oats", "1 banana", "1 cup milk"]
+    assert [p.grams for p in parse_many(lines)] == pytest.approx([100.0, 118.0, 240 * 1.03])
+    # a piece that only describes the previous one is not an ingredient of its own
+    assert split_lines("3 cloves garlic, minced, 1 cup rice\nsalt, to taste") == [
+        "3 cloves garlic", "1 cup rice", "salt"]
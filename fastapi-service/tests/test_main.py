@@ -0,0 +1,161 @@
+# tests/test_main.py
+# Service-level behaviour that does not need the trained models.
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("method,path", [
+    ("post", "/models/urgency/reload"),
+    ("post", "/models/urgency/rollback"),
+    ("delete", "/notes"),
+])
+def test_admin_routes_fail_closed_without_a_token(client, monkeypatch, method, path):
+    monkeypatch.setattr(main, "MODEL_ADMIN_TOKEN", None)
+    assert getattr(client, method)(path).status_code == 403
+    assert getattr(client, method)(path, headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_admin_routes_check_the_token(client, monkeypatch):
+    monkeypatch.setattr(main, "MODEL_ADMIN_TOKEN", "s3cret")
+    assert client.delete("/notes", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.delete("/notes").status_code == 403
+    assert client.delete("/notes", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+
+def test_nutrition_batch_reports_failed_ingredients_per_item(client, monkeypatch):
+    async def per_gram(name):
+        if name == "rice":
+            raise RuntimeError("lookup exploded")
+        if name == "egg":
+            raise main.UpstreamError("GET /food/ingredients/search failed: ReadTimeout")
+        return main.zeros() + 0.01
+
+    monkeypatch.setattr(main, "SPOONACULAR_API_KEY", "key")
+    monkeypatch.setattr(main, "_per_gram_nutrition", per_gram)
+    resp = client.post("/nutrition/batch", json={"meals": ["100g chicken, 50g rice", "2 egg"]})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["degraded"] is True
+    assert set(body["errors"]) == {"rice", "egg"}
+    assert body["missing"] == ["rice", "egg"]
+    assert body["meals"][0]["missing"] == ["rice"]
+    assert body["meals"][0]["nutrition"]["calories"] > 0
+
+
+def test_nutrition_degrades_when_upstream_is_unreachable(client, monkeypatch):
+    async def unreachable(meal_text):
+        raise main.UpstreamError("POST /recipes/parseIngredients failed: ConnectError")
+
+    monkeypatch.setattr(main, "SPOONACULAR_API_KEY", "key")
+    monkeypatch.setattr(main, "_upstream_nutrition", unreachable)
+    resp = client.post("/nutrition", json={"meal": "100g oats"})
+    assert resp.status_code == 200
+    assert resp.json()["degraded"] is True
+
+
+def _spoonacular_mock(monkeypatch, handler):
+    import httpx
+
+    from response_cache import TTLCache
+
+    monkeypatch.setattr(main, "SPOONACULAR_API_KEY", "key")
+    monkeypatch.setattr(main, "nutrition_cache", TTLCache())
+    monkeypatch.setattr(main.spoonacular, "_client", httpx.AsyncClient(
+        base_url="http://upstream", transport=httpx.MockTransport(handler)))
+
+
+def _item(name, grams, calories):
+    return {"name": name, "id": 1, "nutrition": {
+        "nutrients": [{"name": "Calories", "amount": calories}, {"name": "Protein", "amount": calories / 10}],
+        "weightPerServing": {"amount": grams, "unit": "g"}}}
+
+
+def test_nutrition_uses_local_grams_for_upstream_and_store_answers(client, monkeypatch, tmp_path):
+    import httpx
+
+    from nutrition_store import NutritionStore
+
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        assert request.url.path == "/recipes/parseIngredients"
+        # Spoonacular weighs "2 eggs" differently from the local parser (100 g)
+        return httpx.Response(200, json=[_item("rice", 200, 260), _item("egg", 120, 180)])
+
+    _spoonacular_mock(monkeypatch, handler)
+    monkeypatch.setattr(main, "nutrition_store", NutritionStore(str(tmp_path / "store.sqlite3")))
+    upstream = client.post("/nutrition", json={"meal": "200g rice, 2 eggs"}).json()
+    assert upstream["nutrition"]["calories"] == pytest.approx(260 + 1.5 * 100)
+
+    # the per-gram values were stored under the parser's names: now answered locally
+    local = client.post("/nutrition", json={"meal": "200g rice, 2 eggs"}).json()
+    assert local["missing"] == [] and calls == ["/recipes/parseIngredients"]
+    assert local["nutrition"] == upstream["nutrition"]
+
+
+def test_nutrition_looks_up_what_parse_ingredients_cannot_weigh(client, monkeypatch):
+    import httpx
+
+    def handler(request):
+        path = request.url.path
+        if path == "/recipes/parseIngredients":
+            # one item for two lines: cannot be matched to the lines
+            return httpx.Response(200, json=[_item("rice", 100, 130)])
+        if path == "/food/ingredients/search":
+            return httpx.Response(200, json={"results": [{"id": 7}]})
+        return httpx.Response(200, json={"nutrition": {"nutrients": [{"name": "Calories", "amount": 200}]}})
+
+    _spoonacular_mock(monkeypatch, handler)
+    body = client.post("/nutrition", json={"meal": "50g oats, 150g kale"}).json()
+    assert body["nutrition"]["calories"] == pytest.approx(2.0 * 50 + 2.0 * 150)
+
+
+def test_nutrition_looks_up_each_ingredient_when_parse_ingredients_is_unreachable(client, monkeypatch):
+    import httpx
+
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == "/recipes/parseIngredients":
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/food/ingredients/search":
+            return httpx.Response(200, json={"results": [{"id": 7}]})
+        return httpx.Response(200, json={"nutrition": {"nutrients": [{"name": "Calories", "amount": 100}]}})
+
+    _spoonacular_mock(monkeypatch, handler)
+    monkeypatch.setattr(main.spoonacular, "retries", 0)
+    body = client.post("/nutrition", json={"meal": "50g oats, 150g kale"}).json()
+    assert "degraded" not in body
+    assert body["nutrition"]["calories"] == pytest.approx(1.0 * 50 + 1.0 * 150)
+    assert paths.count("/food/ingredients/search") == 2
+
+
+class ConstantEmbedder:
+    def encode(self, texts, **kwargs):
+        import numpy as np
+
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def test_urgency_package_is_not_exported_for_memory_mapping(monkeypatch, tmp_path):
+    import os
+
+    import joblib
+
+    path = str(tmp_path / "model-v0001.pkl")
+    joblib.dump({"classifier": "clf", "embedder": ConstantEmbedder(), "version": 1}, path)
+    monkeypatch.setattr(main, "MODEL_SHARING", "mmap")
+    monkeypatch.setattr(main, "_embedder_fingerprints", [])
+    package = main._load_urgency(path)
+    assert package["classifier"] == "clf" and package["version"] == 1
+    assert os.listdir(tmp_path) == ["model-v0001.pkl"]
@@ -0,0 +1,109 @@
+# tests/test_meal_catalog.py
+from datetime import date
+
+import numpy as np
+import pytest
+
+from meal_catalog import MealCatalog, _read_source, load_catalog
+from meal_scheduler import VEG_MEALS_DB, compile_meals, generate_plan
+
+DB = {
+    "dinner": [
+        {"name": "Soup", "ingredients": ["Onion", "onion", "Carrot"],
+         "macros": {"calories": 200, "protein_g": 5, "carbs_g": 30, "fat_g": 4}},
+        {"name": "Crème Brûlée", "ingredients": ["cream", "sugar"]},
+    ],
+    "lunch": [{"name": "Salad", "ingredients": ["carrot", "lettuce"]}],
+}
+
+
+def test_from_db_interns_ingredients_and_builds_postings():
+    catalog = MealCatalog.from_db(DB)
+    assert len(catalog) == 3 and catalog.n_ingredients == 5
+    assert catalog.ingredient_names == ["onion", "carrot", "cream", "sugar", "lettuce"]
+    assert catalog.meal(0) == {"name": "Soup", "ingredients": ["onion", "carrot"],
+                               "macros": {"calories": 200, "protein_g": 5, "carbs_g": 30, "fat_g": 4}}
+    assert catalog.meal(1)["macros"] is None and catalog.name(1) == "Crème Brûlée"
+    assert catalog.meals_with(1).tolist() == [0, 2]
+    assert catalog.category(2) == "lunch"
+
+
+def test_saved_catalog_opens_memory_mapped_and_identical(tmp_path):
+    built = MealCatalog.from_db(VEG_MEALS_DB)
+    path = str(tmp_path / "meals.mealcat")
+    built.save(path)
+    opened = MealCatalog.open(path)
+    assert opened.stats()["memory_mapped"] and opened.stats()["meals"] == len(built)
+    for name in MealCatalog.ARRAYS:
+        np.testing.assert_array_equal(getattr(opened, name), getattr(built, name))
+    assert [opened.meal(i) for i in range(len(opened))] == [built.meal(i) for i in range(len(built))]
+    assert not (tmp_path / "meals.mealcat.tmp").exists()
+
+
+def test_by_category_plans_like_the_builtin_db():
+    db = MealCatalog.from_db(VEG_MEALS_DB).by_category()
+    assert list(db) == list(VEG_MEALS_DB)
+    view = db["low-carb"]
+    assert len(view) == len(VEG_MEALS_DB["low-carb"])
+    assert [m["name"] for m in view[:2]] == [m["name"] for m in VEG_MEALS_DB["low-carb"][:2]]
+    assert (generate_plan("low-carb", days=3, seed=4, catalog=view)["schedule"]
+            == generate_plan("low-carb", days=3, seed=4)["schedule"])
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "not.mealcat"
+    path.write_bytes(b"NOTACATALOG" + bytes(64))
+    with pytest.raises(ValueError):
+        MealCatalog.open(str(path))
+
+
+def test_load_catalog_falls_back_to_the_builtin_meals(tmp_path):
+    events = []
+
+    class Log:
+        def warning(self, name, **fields):
+            events.append((name, fields["path"]))
+
+    missing = str(tmp_path / "missing.mealcat")
+    assert load_catalog(missing, log=Log()).stats()["source"] == "built-in"
+    assert events == [("meal_catalog_missing", missing)]
+    assert len(load_catalog(None)) == sum(len(m) for m in VEG_MEALS_DB.values())
+
+
+def test_csv_source(tmp_path):
+    path = tmp_path / "meals.csv"
+    path.write_text("name,category,ingredients,calories,protein_g,carbs_g,fat_g\n"
+                    "Toast,breakfast,bread|butter,300,8,40,12\n"
+                    "Tea,,tea|,,,,\n", encoding="utf-8")
+    db = _read_source(str(path))
+    assert db == {"breakfast": [{"name": "Toast", "ingredients": ["bread", "butter"],
+                                 "macros": {"calories": 300.0, "protein_g": 8.0,
+                                            "carbs_g": 40.0, "fat_g": 12.0}}],
+                  "vegetarian": [{"name": "Tea", "ingredients": ["tea"]}]}
+
+
+def test_planner_decodes_only_the_picked_meals(tmp_path, monkeypatch):
+    db = {"main": [{"name": f"meal {i}", "ingredients": [f"ing {i % 97}", f"ing {i % 13}", "salt"]}
+                   for i in range(3000)],
+          "side": [{"name": "Chips", "ingredients": ["potato", "salt"]}]}
+    path = str(tmp_path / "big.mealcat")
+    MealCatalog.from_db(db).save(path)
+    catalog = MealCatalog.open(path)
+    decoded = []
+    original = MealCatalog.meal
+    monkeypatch.setattr(MealCatalog, "meal", lambda self, row: decoded.append(row) or original(self, row))
+
+    compiled = compile_meals(catalog.by_category()["main"])
+    assert len(compiled) == 3000 and decoded == []
+    plan = generate_plan(days=3, meals_per_day=2, seed=1, catalog=compiled)
+    assert len(decoded) == 6
+    from_dicts = generate_plan(days=3, meals_per_day=2, seed=1, catalog=db["main"],
+                               start_date=date.fromisoformat(next(iter(plan["schedule"]))))
+    names = lambda p: [[m["meal"] for m in day] for day in p["schedule"].values()]
+    assert names(plan) == names(from_dicts)
+    assert plan["shopping_list"] == from_dicts["shopping_list"]
+
+    side = compile_meals(catalog.by_category()["side"])
+    assert side.meals_with(side.ingredients.index("salt")).tolist() == [0]
+    whole = compile_meals(catalog)
+    assert len(whole) == 3001 and whole.meal(3000)["name"] == "Chips"
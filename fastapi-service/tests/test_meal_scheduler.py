@@ -0,0 +1,80 @@
+# tests/test_meal_scheduler.py
+from datetime import date
+
+import pytest
+
+import meal_scheduler
+from meal_scheduler import (VEG_MEALS_DB, CompiledCatalog, generate_plan, generate_plans,
+                            household_seed, use_meal_db)
+
+
+def test_same_seed_same_plan():
+    first = generate_plan(days=5, seed=7, start_date=date(2026, 1, 1))
+    assert first == generate_plan(days=5, seed=7, start_date=date(2026, 1, 1))
+    assert first != generate_plan(days=5, seed=8, start_date=date(2026, 1, 1))
+    assert list(first["schedule"])[0] == "2026-01-01" and len(first["schedule"]) == 5
+
+
+def test_meals_are_not_repeated_within_the_window():
+    plan = generate_plan(days=7, meals_per_day=3, repeat_window=3, seed=1)
+    days = [[m["meal"] for m in meals] for meals in plan["schedule"].values()]
+    for i in range(len(days)):
+        recent = [name for d in days[max(0, i - 2):i + 1] for name in d]
+        assert len(recent) == len(set(recent))
+
+
+def test_shopping_list_counts_every_ingredient_use():
+    plan = generate_plan(days=3, seed=2)
+    used = [ing for meals in plan["schedule"].values() for m in meals for ing in m["ingredients"]]
+    assert plan["shopping_list"] == {ing: used.count(ing) for ing in dict.fromkeys(used)}
+
+
+def test_targets_pull_daily_macros_closer():
+    targets = {"calories": 1500, "protein_g": 110}
+    loose = generate_plan("high-protein", days=7, seed=3, macro_weight=0.0)
+    tight = generate_plan("high-protein", days=7, seed=3, targets=targets, macro_weight=5.0)
+
+    def protein_error(plan):
+        return sum(abs(d["protein_g"] - 110) for d in plan["daily_macros"].values())
+
+    assert protein_error(tight) < protein_error(loose)
+    assert tight["targets"] == targets and "targets" not in loose
+
+
+def test_small_catalog_only_avoids_same_day_repeats():
+    meals = [{"name": f"m{i}", "ingredients": [f"i{i}"]} for i in range(3)]
+    plan = generate_plan(days=4, meals_per_day=3, repeat_window=3, seed=0, catalog=meals)
+    for meals_of_day in plan["schedule"].values():
+        assert sorted(m["meal"] for m in meals_of_day) == ["m0", "m1", "m2"]
+    with pytest.raises(ValueError):
+        CompiledCatalog([])
+
+
+def test_catalog_fills_missing_macros_with_the_median():
+    catalog = CompiledCatalog([
+        {"name": "a", "ingredients": ["x", "x", "y"], "macros": {"calories": 100, "protein_g": 10}},
+        {"name": "b", "ingredients": ["y"], "macros": [300, 30, 0, 0]},
+        {"name": "c", "ingredients": ["z"]},
+    ])
+    assert catalog.ingredients == ["x", "y", "z"] and catalog.sizes.tolist() == [2, 1, 1]
+    assert catalog.meals_with(1).tolist() == [0, 1] and catalog.ingredient_ids(0).tolist() == [0, 1]
+    assert catalog.macros[2].tolist() == [200, 20, 0, 0]
+
+
+def test_household_plans_do_not_depend_on_batch_order():
+    households = [{"id": "a", "days": 2}, {"id": "b", "preference": "low-carb", "days": 2}]
+    forward = generate_plans(households, seed=5, start_date=date(2026, 1, 1))
+    backward = generate_plans(households[::-1], seed=5, start_date=date(2026, 1, 1))
+    assert forward == backward
+    assert forward["a"]["seed"] == household_seed(5, "a") != household_seed(5, "b")
+
+
+def test_use_meal_db_swaps_the_catalog():
+    db = {"custom": [{"name": "Soup", "ingredients": ["water"]}]}
+    try:
+        use_meal_db(db)
+        plan = generate_plan("unknown", days=1, seed=0)
+        assert plan["schedule"][next(iter(plan["schedule"]))][0]["meal"] == "Soup"
+    finally:
+        use_meal_db(VEG_MEALS_DB)
+    assert meal_scheduler.meal_db() is VEG_MEALS_DB
@@ -0,0 +1,92 @@
+# tests/test_metrics.py
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from metrics import MetricsMiddleware, MetricsRegistry, render_stats
+
+
+def test_counter_and_gauge_render_per_label_set():
+    registry = MetricsRegistry()
+    hits = registry.counter("cache_hits_total", "Cache hits", ["cache"])
+    depth = registry.gauge("queue_depth", "Queued items")
+    hits.inc(cache="recipes")
+    hits.inc(2, cache="recipes")
+    hits.inc(cache='say "hi"\n')
+    depth.set(4)
+    with depth.track():
+        assert 'queue_depth 5' in registry.render()
+    text = registry.render()
+    assert "# TYPE cache_hits_total counter" in text
+    assert 'cache_hits_total{cache="recipes"} 3' in text
+    assert 'cache_hits_total{cache="say \\"hi\\"\\n"} 1' in text
+    assert "queue_depth 4" in text
+
+
+def test_labels_must_match_the_declaration():
+    counter = MetricsRegistry().counter("c", "c", ["route"])
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.inc(route="/", method="GET")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 3.65" in lines and "latency_seconds_count 4" in lines
+
+
+def test_collectors_are_read_at_scrape_time_and_may_fail():
+    registry = MetricsRegistry()
+    stats = {"recipes": {"hits": 3}, "nutrition": None}
+
+    @registry.collector
+    def caches():
+        return [render_stats("cache_hits", "Hits", "counter", "cache", stats, "hits")]
+
+    @registry.collector
+    def broken():
+        raise RuntimeError("store closed")
+
+    text = registry.render()
+    assert 'cache_hits{cache="recipes"} 3' in text and "nutrition" not in text
+    assert "# collector broken failed: store closed" in text
+    stats["recipes"]["hits"] = 4
+    assert 'cache_hits{cache="recipes"} 4' in registry.render()
+
+
+def test_middleware_labels_requests_by_route_template():
+    registry = MetricsRegistry()
+    requests = registry.counter("http_requests_total", "Requests", ["method", "route", "status"])
+    latency = registry.histogram("http_request_seconds", "Latency", ["method", "route"])
+    in_flight = registry.gauge("http_requests_in_flight", "In flight")
+
+    def item(request):
+        return PlainTextResponse(request.path_params["name"])
+
+    def boom(request):
+        raise RuntimeError("boom")
+
+    app = Starlette(routes=[Route("/items/{name}", item), Route("/boom", boom),
+                            Route("/metrics", lambda r: PlainTextResponse(registry.render()))])
+    app.add_middleware(MetricsMiddleware, requests=requests, latency=latency, in_flight=in_flight)
+    client = TestClient(app, raise_server_exceptions=False)
+    client.get("/items/a")
+    client.get("/items/b")
+    client.get("/nowhere")
+    client.get("/boom")
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/items/{name}",status="200"} 2' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'http_requests_total{method="GET",route="/boom",status="500"} 1' in text
+    assert 'route="/metrics"' not in text
+    assert "http_requests_in_flight 0" in text
@@ -0,0 +1,141 @@
+# tests/test_model_registry.py
+import os
+import threading
+import time
+
+import pytest
+
+from model_registry import ArtifactVersions, ModelNotReady, ModelRegistry
+
+
+def write_versions(directory, *versions):
+    directory.mkdir(exist_ok=True)
+    for version in versions:
+        (directory / f"model-v{version:04d}.pkl").write_text(f"v{version}")
+    return ArtifactVersions(str(directory))
+
+
+def read_model(path):
+    with open(path) as f:
+        return f.read()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_artifact_versions_and_fallback(tmp_path):
+    fallback = tmp_path / "model.pkl"
+    fallback.write_text("old")
+    versions = ArtifactVersions(str(tmp_path / "missing"), str(fallback))
+    assert versions.available() == {0: str(fallback)}
+    versions = write_versions(tmp_path / "m", 1, 3)
+    assert versions.latest() == 3
+
+
+def test_lazy_get_loads_once_and_reports_failures():
+    calls = []
+    registry = ModelRegistry(max_workers=2)
+    registry.register("ok", lambda: calls.append(1) or "model")
+    registry.register("broken", lambda: 1 / 0)
+    assert registry.status()["ok"]["state"] == "pending"
+    assert registry.get("ok") == "model" and registry.get("ok") == "model"
+    assert calls == [1]
+    with pytest.raises(ModelNotReady):
+        registry.get("broken")
+    assert registry.status()["broken"]["state"] == "failed"
+    assert not registry.is_ready()
+
+
+def test_reload_validates_before_swapping_and_rolls_back(tmp_path):
+    versions = write_versions(tmp_path / "m", 1)
+
+    def validate(model):
+        if model == "v2":
+            raise ValueError("bad smoke test")
+
+    registry = ModelRegistry()
+    registry.register("m", read_model, versions=versions, validate=validate)
+    assert registry.get("m") == "v1"
+
+    write_versions(tmp_path / "m", 2)
+    with pytest.raises(ValueError):
+        registry.reload("m").result()
+    assert registry.get("m") == "v1"
+    assert registry.status()["m"]["rejected_versions"] == {2: "bad smoke test"}
+    registry.check_for_updates()  # a rejected version is not retried
+
+    write_versions(tmp_path / "m", 3)
+    registry.check_for_updates()
+    assert wait_until(lambda: registry.version("m") == 3)
+    assert registry.get("m") == "v3"
+    assert registry.rollback("m") == 1
+    assert registry.get("m") == "v1"
+    assert 3 in registry.status()["m"]["rejected_versions"]
+
+
+def test_unvalidated_startup_model_is_still_served(tmp_path):
+    registry = ModelRegistry()
+    registry.register("m", read_model, versions=write_versions(tmp_path / "m", 1),
+                      validate=lambda model: 1 / 0)
+    assert registry.get("m") == "v1"
+    assert registry.status()["m"]["smoke_error"]
+
+
+def test_load_running_at_fork_is_restarted_in_the_child():
+    parent = os.getpid()
+    release = threading.Event()
+
+    def loader():
+        if os.getpid() == parent:
+            release.wait()
+            return "parent"
+        return "child"
+
+    registry = ModelRegistry()
+    registry.register("m", loader)
+    registry.load_all()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            registry.after_fork()
+            # nothing calls get(): the child finishes the load on its own
+            code = 0 if wait_until(registry.is_ready) and registry.get("m") == "child" else 2
+        finally:
+            os._exit(code)
+    release.set()
+    assert os.waitpid(pid, 0)[1] == 0
+    assert registry.get("m", timeout=5) == "parent"
+
+
+def test_lifecycle_is_reported_to_the_log(tmp_path):
+    class Recorder:
+        def __init__(self):
+            self.events = []
+
+        def event(self, name, level="info", sample_rate=None, **fields):
+            self.events.append((name, level, fields))
+
+        def warning(self, name, **fields):
+            self.event(name, "warning", **fields)
+
+        def error(self, name, **fields):
+            self.event(name, "error", **fields)
+
+    log = Recorder()
+    registry = ModelRegistry(log=log)
+    registry.register("m", read_model, versions=write_versions(tmp_path / "m", 1),
+                      validate=lambda model: None if model == "v1" else 1 / 0)
+    registry.get("m")
+    write_versions(tmp_path / "m", 2)
+    with pytest.raises(ZeroDivisionError):
+        registry.reload("m").result()
+    names = [name for name, _, _ in log.events]
+    assert names == ["model_loaded", "model_reload_rejected"]
+    assert log.events[1][2]["version"] == 2
@@ -0,0 +1,123 @@
+# tests/test_note_index.py
+import os
+
+import numpy as np
+import pytest
+
+from note_index import NoteIndex, NoteLog, normalize_rows
+
+
+def vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def brute_force(data, query, k):
+    scores = normalize_rows(data) @ normalize_rows(query)[0]
+    order = np.argsort(-scores)[:k]
+    return [str(i) for i in order]
+
+
+def test_exact_search_matches_brute_force_across_blocks():
+    data = vectors(500)
+    index = NoteIndex(mode="exact", block_rows=64, initial_capacity=8)
+    index.add([str(i) for i in range(500)], data)
+    for q in vectors(5, seed=1):
+        hits = index.search(q, k=7)[0]
+        assert [note_id for note_id, _ in hits] == brute_force(data, q, 7)
+        assert all(a[1] >= b[1] for a, b in zip(hits, hits[1:]))
+
+
+def test_remove_replace_and_exclude():
+    data = vectors(10)
+    index = NoteIndex(mode="exact")
+    index.add([str(i) for i in range(10)], data, texts=[f"note {i}" for i in range(10)])
+    assert index.remove(["3", "3", "missing"]) == 1
+    assert "3" not in index and len(index) == 9
+    # the freed slot is reused
+    index.add(["new"], data[3:4])
+    assert index.stats()["deleted_slots"] == 0
+    assert index.search(data[3], k=1)[0][0][0] == "new"
+    assert index.search(data[3], k=1, exclude=["new"])[0][0][0] != "new"
+    # re-inserting an id replaces its vector and text
+    index.add(["0"], data[5:6], texts=["moved"])
+    assert len(index) == 10 and index.text("0") == "moved"
+    np.testing.assert_allclose(index.get_vector("0"), normalize_rows(data[5])[0], rtol=1e-6)
+
+
+def test_min_score_and_dimension_checks():
+    index = NoteIndex()
+    assert index.search(vectors(1)[0], k=3) == [[]]
+    index.add(["a", "b"], [[1, 0], [0, 1]])
+    assert index.search([1, 0], k=5, min_score=0.5) == [[("a", 1.0)]]
+    with pytest.raises(ValueError):
+        index.add(["c"], [[1, 0, 0]])
+    with pytest.raises(ValueError):
+        index.add(["c", "d"], [[1, 0]])
+
+
+def test_ivf_finds_near_duplicates():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((50, 32)).astype(np.float32)
+    data = centers[rng.integers(0, 50, 3000)] + 0.1 * rng.standard_normal((3000, 32)).astype(np.float32)
+    index = NoteIndex(mode="ivf", n_probe=4)
+    index.add([str(i) for i in range(3000)], data)
+    assert index.stats()["mode"] == "ivf"
+    queries = data[:50] + 0.01 * rng.standard_normal((50, 32)).astype(np.float32)
+    found = sum(index.search(q, k=1, exact=False)[0][0][0] == str(i) for i, q in enumerate(queries))
+    assert found >= 45
+
+
+def test_log_keeps_instances_in_sync(tmp_path):
+    path = str(tmp_path / "notes.sqlite3")
+    a = NoteIndex.open(path, mode="exact")
+    b = NoteIndex.open(path, mode="exact")
+    data = vectors(4)
+    a.space = "embedder-1"
+    a.add(["x", "y"], data[:2], texts=["first", "second"])
+    assert b.search(data[0], k=1)[0] == [("x", pytest.approx(1.0))]
+    assert b.text("y") == "second" and b.space == "embedder-1"
+    assert b.remove(["x"]) == 1
+    assert a.get_vector("x") is None
+    b.add(["z"], data[2:3])
+    a.clear()
+    assert b.stats()["notes"] == 0 and b.space is None and b.dim is None
+    a.add(["w"], vectors(1, dim=8))
+    assert b.get_vector("w").shape == (8,)
+
+
+def test_reopened_log_restores_notes_and_compacts(tmp_path):
+    path = str(tmp_path / "notes.sqlite3")
+    index = NoteIndex.open(path)
+    data = vectors(3)
+    index.add(["a", "b", "c"], data)
+    index.add(["a"], data[2:3])
+    index.remove(["b"])
+    assert len(NoteLog(path)) == 5
+
+    restored = NoteIndex.open(path)
+    assert sorted(restored._rows) == ["a", "c"]
+    np.testing.assert_allclose(restored.get_vector("a"), normalize_rows(data[2])[0], rtol=1e-6)
+    # only the newest operation per note is kept; the delete stays as a tombstone
+    assert len(NoteLog(path)) == 3
+
+
+def test_inserts_from_forked_processes_are_all_visible(tmp_path):
+    path = str(tmp_path / "notes.sqlite3")
+    index = NoteIndex.open(path, mode="exact")
+    index.add(["seed"], vectors(1))
+    pids = []
+    for worker in range(3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                index.after_fork()
+                for i in range(20):
+                    index.add([f"{worker}-{i}"], vectors(1, seed=worker * 100 + i))
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        assert os.waitpid(pid, 0)[1] == 0
+    assert len(NoteIndex.open(path)) == 61
+    index.sync()
+    assert len(index) == 61
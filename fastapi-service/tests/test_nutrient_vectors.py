@@ -0,0 +1,45 @@
+# tests/test_nutrient_vectors.py
+import numpy as np
+import pytest
+
+from nutrient_vectors import (NUTRIENT_KEYS, as_vector, items_vector, meal_totals,
+                              nutrient_vector, to_dict)
+
+
+def test_as_vector_from_mapping_and_sequence():
+    np.testing.assert_array_equal(as_vector({"protein_g": 3, "fat_g": None, "other": 9}),
+                                  [0, 3, 0, 0, 0])
+    np.testing.assert_array_equal(as_vector([1, 2, 3, 4, 5]), [1, 2, 3, 4, 5])
+    with pytest.raises(ValueError):
+        as_vector([1, 2, 3])
+
+
+def test_spoonacular_nutrients_map_to_slots():
+    nutrients = [{"name": "Calories", "amount": 100}, {"name": "Protein", "amount": 5},
+                 {"name": "Dietary Fiber", "amount": 2}, {"name": "Sodium", "amount": 400},
+                 {"name": "Fat", "amount": None}]
+    np.testing.assert_array_equal(nutrient_vector(nutrients), [100, 5, 0, 0, 2])
+    assert nutrient_vector([]).shape == (len(NUTRIENT_KEYS),)
+
+
+def test_items_vector_sums_across_items():
+    items = [{"nutrition": {"nutrients": [{"name": "Carbohydrates", "amount": 10}]}},
+             {"nutrition": None},
+             {"nutrition": {"nutrients": [{"name": "carbohydrates", "amount": 5},
+                                          {"name": "Total Fat", "amount": 1.5}]}}]
+    np.testing.assert_array_equal(items_vector(items), [0, 0, 15, 1.5, 0])
+
+
+def test_meal_totals_scales_and_groups_rows():
+    per_gram = np.array([[1.0, 0.1, 0, 0, 0], [4.0, 0, 1.0, 0, 0]])
+    totals = meal_totals(per_gram, meal_index=np.array([0, 0, 2]),
+                         ingredient_index=np.array([0, 1, 1]),
+                         grams=np.array([100.0, 10.0, 50.0]), n_meals=3)
+    np.testing.assert_allclose(totals, [[140, 10, 10, 0, 0], [0] * 5, [200, 0, 50, 0, 0]])
+    assert meal_totals(per_gram, np.array([], dtype=int), np.array([], dtype=int),
+                       np.array([]), 2).shape == (2, 5)
+
+
+def test_to_dict_rounds_in_slot_order():
+    assert to_dict(np.array([100.04, 2.26, 0, 0, 1])) == {
+        "calories": 100.0, "protein_g": 2.3, "carbs_g": 0.0, "fat_g": 0.0, "fiber_g": 1.0}
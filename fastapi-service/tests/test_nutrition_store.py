@@ -0,0 +1,53 @@
+# tests/test_nutrition_store.py
+import numpy as np
+
+from nutrition_store import NutritionStore, canonical_name
+
+
+def test_canonical_name():
+    assert canonical_name("  Olive Oil, ") == "olive oil"
+    assert canonical_name("Salt & Pepper") == "salt pepper"
+    assert canonical_name("!!") == ""
+
+
+def test_lookups_use_the_canonical_name(tmp_path):
+    store = NutritionStore(str(tmp_path / "n.sqlite3"))
+    store.put("Olive Oil", {"calories": 8.8, "fat_g": 1.0}, spoonacular_id=4053)
+    np.testing.assert_allclose(store.get("olive  oil!"), [8.8, 0, 0, 1.0, 0])
+    assert store.get("butter") is None
+    found = store.get_many(["Olive oil", "OLIVE OIL", "butter"])
+    assert set(found) == {"Olive oil", "OLIVE OIL"}
+    assert store.stats()["hits"] == 2 and store.stats()["misses"] == 2
+
+
+def test_put_many_replaces_and_skips_blank_names(tmp_path):
+    store = NutritionStore(str(tmp_path / "n.sqlite3"))
+    store.put_many([("rice", [1.3, 0.03, 0.28, 0.0, 0.004], None),
+                    ("  ", [1, 1, 1, 1, 1], None),
+                    ("Rice", [1.0, 0, 0, 0, 0], 20444)])
+    assert len(store) == 1
+    assert store.get("rice")[0] == 1.0
+
+
+def test_get_many_handles_more_names_than_one_query(tmp_path):
+    store = NutritionStore(str(tmp_path / "n.sqlite3"))
+    store.put_many([(f"item {i}", [i, 0, 0, 0, 0], None) for i in range(1200)])
+    found = store.get_many([f"item {i}" for i in range(1200)])
+    assert len(found) == 1200 and found["item 1199"][0] == 1199
+
+
+def test_csv_round_trip_and_reopen(tmp_path):
+    path = str(tmp_path / "n.sqlite3")
+    store = NutritionStore(path)
+    store.put("egg", {"calories": 1.43, "protein_g": 0.126}, spoonacular_id=1123)
+    store.put("flour", {"calories": 3.64, "carbs_g": 0.76})
+    csv_path = str(tmp_path / "n.csv")
+    assert store.export_csv(csv_path) == 2
+
+    other = NutritionStore(str(tmp_path / "other.sqlite3"))
+    assert other.import_csv(csv_path) == 2
+    np.testing.assert_allclose(other.get("egg"), store.get("egg"))
+    np.testing.assert_allclose(other.get("flour"), store.get("flour"))
+
+    store.reopen()
+    assert len(store) == 2 and NutritionStore(path).get("egg")[1] == 0.126
@@ -0,0 +1,59 @@
+# tests/test_pantry_matcher.py
+import pytest
+
+from meal_catalog import MealCatalog
+from pantry_matcher import PantryIndex, ingredient_key
+
+DB = {
+    "dinner": [
+        {"name": "Tomato Soup", "ingredients": ["tomatoes", "onion", "cream"]},
+        {"name": "Caprese", "ingredients": ["tomato", "mozzarella", "basil"]},
+        {"name": "Omelette", "ingredients": ["eggs", "cheese"]},
+    ],
+    "breakfast": [
+        {"name": "Berry Bowl", "ingredients": ["berries", "yogurt"]},
+        {"name": "Tomato Toast", "ingredients": ["bread", "tomato"]},
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PantryIndex(MealCatalog.from_db(DB))
+
+
+def test_ingredient_key_folds_simple_plurals():
+    assert ingredient_key("Tomatoes") == "tomato"
+    assert ingredient_key("berries") == "berry"
+    assert ingredient_key("eggs") == "egg"
+    assert ingredient_key("hummus") == "hummus" and ingredient_key("grass") == "grass"
+
+
+def test_rank_by_fewest_missing(index):
+    results = index.match(["2 tomatoes", "bread", "onions", "cream"])
+    # soup and toast are both complete; the tie keeps catalog order
+    assert [r["name"] for r in results] == ["Tomato Soup", "Tomato Toast", "Caprese"]
+    assert results[0]["missing"] == [] and results[0]["coverage"] == 1.0
+    assert results[2]["matched"] == 1 and results[2]["missing"] == ["mozzarella", "basil"]
+
+
+def test_rank_by_coverage_and_filters(index):
+    pantry = ["tomato", "basil", "mozzarella", "onion"]
+    assert index.match(pantry, rank_by="coverage")[0]["name"] == "Caprese"
+    assert [r["name"] for r in index.match(pantry, category="breakfast")] == ["Tomato Toast"]
+    assert [r["name"] for r in index.match(pantry, max_missing=0)] == ["Caprese"]
+    assert {r["name"] for r in index.match(pantry, min_coverage=0.6)} == {"Caprese", "Tomato Soup"}
+    assert len(index.match(pantry, top_k=1)) == 1
+
+
+def test_unknown_pantry_or_category_matches_nothing(index):
+    assert index.match(["durian"]) == []
+    assert index.match(["tomato"], category="dessert") == []
+    with pytest.raises(ValueError):
+        index.match(["tomato"], rank_by="price")
+
+
+def test_from_meal_db_indexes_the_builtin_meals():
+    index = PantryIndex.from_meal_db()
+    results = index.match(["oats", "banana", "milk", "almonds"], top_k=3)
+    assert results[0]["name"] == "Oatmeal with Fruits" and results[0]["missing"] == []
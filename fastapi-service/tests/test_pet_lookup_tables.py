@@ -0,0 +1,70 @@
+# tests/test_pet_lookup_tables.py
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from pet_lookup_tables import Axis, PredictionTable, build_comfort_table
+
+
+class SumModel:
+    """Regressor stand-in: the sum of its features."""
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64).sum(axis=1)
+
+
+def featurize(*columns):
+    return np.column_stack([np.asarray(c, dtype=np.float64) for c in columns])
+
+
+def test_numeric_axis_snaps_to_the_grid():
+    axis = Axis("t", start=10.0, stop=12.0, step=0.5)
+    assert len(axis) == 5
+    assert axis.index(10.74) == 1 and axis.index(10.76) == 2
+    assert axis.index(9.9) is None and axis.index(None) is None
+    np.testing.assert_array_equal(axis.indices([10.0, 11.9, 12.1, 9.0]), [0, 4, -1, -1])
+
+
+def test_category_axis():
+    axis = Axis("breed", categories=["lab", "pug"])
+    assert axis.index("pug") == 1 and axis.index("cat") is None
+    np.testing.assert_array_equal(axis.indices(["pug", "cat", "lab", "pug"]), [1, -1, 0, 1])
+
+
+def test_lookup_matches_the_model_on_grid_points():
+    axes = [Axis("a", start=0, stop=4, step=1), Axis("b", categories=[10, 20])]
+    table = PredictionTable(axes, featurize, SumModel())
+    assert table.table.shape == (5, 2) and table.classes is None
+    assert table.lookup(3, 20) == 23
+    assert table.lookup(5, 20) is None and table.lookup(1, 30) is None
+    values, hit = table.lookup_many([0, 4, 9], [10, 20, 10])
+    np.testing.assert_array_equal(hit, [True, True, False])
+    np.testing.assert_array_equal(values[hit], [10, 24])
+
+
+def test_classifier_tables_store_class_codes_and_pickle_without_the_model():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.uniform(10, 35, 2000), rng.uniform(20, 90, 2000),
+                         rng.integers(0, 25, 2000), rng.integers(1, 11, 2000)])
+    y = np.where(X[:, 0] > 28, "hot", np.where(X[:, 0] < 15, "cold", "ok"))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    table = build_comfort_table(model, temp_step=1.0, humidity_step=5.0)
+    assert table.table.dtype == np.uint8
+    assert set(table.classes) <= {"hot", "cold", "ok"}
+    assert table.lookup(30.0, 50.0, 8, 5) == model.predict([[30.0, 50.0, 8, 5]])[0]
+    report = table.measure_error(n_samples=500)
+    # off-grid samples snap to the nearest cell, so a few may disagree
+    assert report["disagreement_rate"] < 0.2
+
+    restored = pickle.loads(pickle.dumps(table))
+    assert restored.model is None and restored.featurize is None
+    assert restored.lookup(30.0, 50.0, 8, 5) == table.lookup(30.0, 50.0, 8, 5)
+
+
+def test_out_of_grid_lookup_many_marks_misses():
+    table = PredictionTable([Axis("x", start=0.0, stop=1.0, step=0.25)], featurize, SumModel())
+    values, hit = table.lookup_many(np.array([0.5, 2.0, -1.0]))
+    assert hit.tolist() == [True, False, False]
+    assert values[0] == pytest.approx(0.5)
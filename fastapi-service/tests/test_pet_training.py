@@ -0,0 +1,50 @@
+# tests/test_pet_training.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pet_training
+from pet_training import FOOD_TYPES, SPECS, SYMPTOMS, generate_dataset, health_rows, train
+from train_model import latest_artifact
+
+
+def test_data_do_not_depend_on_the_number_of_workers(tmp_path):
+    spec = SPECS["comfort"]
+    X1, y1, _ = generate_dataset(spec, 1000, seed=3, chunk_rows=300, data_dir=str(tmp_path / "a"))
+    X2, y2, _ = generate_dataset(spec, 1000, seed=3, chunk_rows=300, workers=2,
+                                 data_dir=str(tmp_path / "b"))
+    np.testing.assert_array_equal(X1, X2)
+    np.testing.assert_array_equal(y1, y2)
+    assert X1.dtype == np.float32 and y1.dtype == np.uint8 and not X1.flags.writeable
+
+
+def test_one_hot_columns_match_the_served_encoder():
+    X, _ = health_rows(np.random.default_rng(0), 200)
+    encoder = SPECS["health"].package(None)["encoder"]
+    symptom = np.array(encoder.categories_[0])[X[:, :len(SYMPTOMS)].argmax(axis=1)]
+    food = np.array(encoder.categories_[1])[X[:, len(SYMPTOMS):-2].argmax(axis=1)]
+    encoded = encoder.transform(pd.DataFrame({"symptom": symptom, "food_type": food}))
+    np.testing.assert_array_equal(encoded, X[:, :len(SYMPTOMS) + len(FOOD_TYPES)])
+
+
+def test_train_relabels_classes_and_cleans_up(monkeypatch, tmp_path):
+    monkeypatch.setattr(pet_training.tempfile, "mkdtemp", lambda prefix: str(tmp_path / prefix))
+    model, metadata = train(SPECS["comfort"], rows=2000, test_rows=500, n_jobs=1, n_estimators=10)
+    assert list(model.classes_) == ["comfortable", "neutral", "uncomfortable"]
+    assert model.predict([[22.0, 50.0, 3, 6]])[0] == "comfortable"
+    assert model.n_jobs == 1 and metadata["accuracy"] > 0.8
+    assert metadata["data_bytes"] == 2000 * (4 * 4 + 1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_main_writes_versioned_artifacts(tmp_path):
+    argv = ["diet", "--rows", "500", "--n-estimators", "5", "--n-jobs", "1",
+            "--artifact-dir", str(tmp_path), "--no-promote"]
+    pet_training.main(argv)
+    pet_training.main(argv)
+    version, metadata = latest_artifact(str(tmp_path / "pet_diet"))
+    assert version == 2 and metadata["version"] == 2 and "r2" in metadata
+    with pytest.raises(SystemExit):
+        pet_training.main(["ferret"])
@@ -0,0 +1,47 @@
+# tests/test_rate_limiter.py
+import asyncio
+import time
+
+import pytest
+
+from rate_limiter import TokenBucket
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    assert TokenBucket(0.5).capacity == 1.0
+
+
+def test_burst_is_free_then_paced():
+    bucket = TokenBucket(rate=50, burst=5)
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(5):
+            await bucket.acquire()
+        burst_s = time.perf_counter() - start
+        for _ in range(10):
+            await bucket.acquire()
+        return burst_s, time.perf_counter() - start
+
+    burst_s, total_s = asyncio.run(run())
+    assert burst_s < 0.05
+    # 10 tokens past the burst at 50/s
+    assert 0.18 <= total_s < 1.0
+    assert bucket.waits >= 10
+
+
+def test_concurrent_waiters_are_served_in_arrival_order():
+    bucket = TokenBucket(rate=100, burst=1)
+    order = []
+
+    async def worker(i):
+        await bucket.acquire()
+        order.append(i)
+
+    async def run():
+        await asyncio.gather(*[worker(i) for i in range(8)])
+
+    asyncio.run(run())
+    assert order == list(range(8))
@@ -0,0 +1,116 @@
+# tests/test_response_cache.py
+import asyncio
+
+import pytest
+
+import response_cache
+from response_cache import SingleFlight, TTLCache, get_or_fetch
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock.monotonic)
+    return clock
+
+
+class Upstream:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_entries_expire_but_stay_peekable(clock):
+    cache = TTLCache(max_entries=4, ttl=10)
+    cache.set("k", "v")
+    clock.now += 9
+    assert cache.get("k") == "v"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.peek("k") == ("v", 11)
+    assert cache.peek("other") == (None, None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = TTLCache(max_entries=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    assert len(cache) == 2 and cache.evictions == 1
+
+
+def test_single_flight_shares_one_call_and_its_error():
+    flight = SingleFlight()
+    upstream = Upstream("v", ValueError("down"))
+
+    async def run():
+        values = await asyncio.gather(*[flight.do("k", upstream.fetch) for _ in range(5)])
+        errors = await asyncio.gather(*[flight.do("k", upstream.fetch) for _ in range(3)],
+                                      return_exceptions=True)
+        return values, errors
+
+    values, errors = asyncio.run(run())
+    assert values == ["v"] * 5
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert upstream.calls == 2 and flight.shared == 6
+
+
+def test_get_or_fetch_fresh_stale_and_miss(clock):
+    cache, flight = TTLCache(ttl=10), SingleFlight()
+    upstream = Upstream("v1", "v2")
+
+    async def run():
+        states = [await get_or_fetch(cache, flight, "k", upstream.fetch, max_stale=5)]
+        states.append(await get_or_fetch(cache, flight, "k", upstream.fetch, max_stale=5))
+        clock.now += 12
+        states.append(await get_or_fetch(cache, flight, "k", upstream.fetch, max_stale=5))
+        await asyncio.gather(*response_cache._refresh_tasks)
+        states.append(await get_or_fetch(cache, flight, "k", upstream.fetch, max_stale=5))
+        return states
+
+    assert asyncio.run(run()) == [("v1", "miss"), ("v1", "fresh"), ("v1", "stale"), ("v2", "fresh")]
+    assert upstream.calls == 2
+
+
+def test_failed_fetch_serves_an_old_copy_or_raises(clock):
+    cache, flight = TTLCache(ttl=10), SingleFlight()
+    events = []
+
+    class Log:
+        def warning(self, name, **fields):
+            events.append(name)
+
+    async def run():
+        await get_or_fetch(cache, flight, "k", Upstream("v1").fetch)
+        clock.now += 100  # past ttl + max_stale: refetch in the foreground
+        old = await get_or_fetch(cache, flight, "k", Upstream(RuntimeError("down")).fetch)
+        cache.set("j", "old")  # within max_stale: the background refresh fails quietly
+        clock.now += 12
+        stale = await get_or_fetch(cache, flight, "j", Upstream(RuntimeError("down")).fetch,
+                                   max_stale=5, log=Log())
+        await asyncio.gather(*response_cache._refresh_tasks)
+        with pytest.raises(RuntimeError):
+            await get_or_fetch(cache, flight, "missing", Upstream(RuntimeError("down")).fetch)
+        return old, stale
+
+    assert asyncio.run(run()) == (("v1", "stale"), ("old", "stale"))
+    assert events == ["background_refresh_failed"]
@@ -0,0 +1,53 @@
+# tests/test_shared_artifacts.py
+import os
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from shared_artifacts import SUFFIX, load_shared, shareable_forest
+from tree_compiler import CompiledForest
+
+
+def fitted_forest():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(X, X[:, 0] > 0), X
+
+
+def test_shareable_forest_drops_the_fallback():
+    model, X = fitted_forest()
+    shared = shareable_forest(model)
+    assert isinstance(shared, CompiledForest) and shared.fallback is None
+    np.testing.assert_array_equal(shared.predict(X), model.predict(X))
+    assert shareable_forest(shared) is shared
+    assert shareable_forest("not a forest") == "not a forest"
+
+
+def test_load_shared_maps_arrays_read_only(tmp_path):
+    model, X = fitted_forest()
+    path = str(tmp_path / "model.pkl")
+    joblib.dump({"model": model}, path)
+    prepare = lambda p: {**p, "model": shareable_forest(p["model"])}
+
+    loaded = load_shared(path, prepare)
+    assert os.path.exists(path + SUFFIX)
+    forest = loaded["model"]
+    assert isinstance(forest.threshold, np.memmap) and not forest.threshold.flags.writeable
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+
+def test_load_shared_reexports_only_when_the_source_is_newer(tmp_path):
+    path = str(tmp_path / "table.pkl")
+    joblib.dump({"table": np.arange(10)}, path)
+    load_shared(path)
+    first = os.path.getmtime(path + SUFFIX)
+
+    calls = []
+    load_shared(path, prepare=lambda p: calls.append(p) or p)
+    assert calls == []
+
+    joblib.dump({"table": np.arange(20)}, path)
+    os.utime(path, (first + 10, first + 10))
+    assert len(load_shared(path)["table"]) == 20
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
@@ -0,0 +1,76 @@
+# tests/test_spoonacular_client.py
+import asyncio
+
+import httpx
+import pytest
+
+from circuit_breaker import CircuitOpenError
+from spoonacular_client import SpoonacularClient, UpstreamError
+
+
+def make_client(handler, **kwargs):
+    kwargs.setdefault("backoff", 0.0)
+    client = SpoonacularClient("key", base_url="http://upstream", **kwargs)
+    client._client = httpx.AsyncClient(base_url="http://upstream",
+                                       transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_retries_5xx_then_returns_the_response():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503 if len(calls) < 3 else 200, json={"ok": True})
+
+    client = make_client(handler, retries=2)
+    resp = asyncio.run(client.get("/recipes/12/information"))
+    assert resp.status_code == 200
+    assert len(calls) == 3
+    assert calls[0].url.params["apiKey"] == "key"
+
+
+def test_last_5xx_is_returned_not_raised():
+    client = make_client(lambda request: httpx.Response(502), retries=1)
+    assert asyncio.run(client.get("/food/ingredients/search")).status_code == 502
+
+
+@pytest.mark.parametrize("error", [httpx.ConnectError, httpx.ReadTimeout])
+def test_transport_errors_after_retries_raise_upstream_error(error):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise error("boom", request=request)
+
+    outcomes = []
+    client = make_client(handler, retries=2, observe=lambda route, s, outcome: outcomes.append(outcome))
+    with pytest.raises(UpstreamError) as info:
+        asyncio.run(client.get("/food/ingredients/search"))
+    assert isinstance(info.value.__cause__, error)
+    assert len(calls) == 3
+    assert outcomes == ["error"] * 3
+
+
+def test_open_breaker_fails_fast_per_route():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(500 if "search" in request.url.path else 200)
+
+    client = make_client(handler, retries=0, breaker_options={"failure_threshold": 2,
+                                                              "reset_timeout": 60})
+
+    async def run():
+        for _ in range(2):
+            await client.get("/food/ingredients/search")
+        with pytest.raises(CircuitOpenError):
+            await client.get("/food/ingredients/search")
+        # ids collapse into one route, and other routes are unaffected
+        assert (await client.get("/food/ingredients/1/information")).status_code == 200
+        assert (await client.get("/food/ingredients/2/information")).status_code == 200
+
+    asyncio.run(run())
+    assert calls.count("/food/ingredients/search") == 2
+    assert set(client.breakers) == {"/food/ingredients/search", "/food/ingredients/{id}/information"}
@@ -0,0 +1,51 @@
+# tests/test_spoonacular_stub.py
+from fastapi.testclient import TestClient
+
+from spoonacular_stub import FIXTURES, Replay, build_app, route_of
+
+RESPONSES = [
+    {"method": "GET", "route": "/recipes/complexSearch", "body": {"results": [], "source": "route"}},
+    {"method": "GET", "path": "/recipes/complexSearch", "params": {"query": "soup"},
+     "body": {"results": [{"id": 1}], "source": "exact"}},
+    {"method": "GET", "path": "/recipes/716429/information", "params": {}, "status": 200,
+     "body": {"id": 716429}},
+]
+
+
+def test_route_of_collapses_ids():
+    assert route_of("/recipes/716429/information") == "/recipes/{id}/information"
+    assert route_of("/food/ingredients/9266") == "/food/ingredients/{id}"
+    assert route_of("/recipes/complexSearch") == "/recipes/complexSearch"
+
+
+def test_replay_prefers_exact_params_and_ignores_the_api_key():
+    replay = Replay(RESPONSES)
+    assert replay.find("GET", "/recipes/complexSearch", {"query": "soup", "apiKey": "k"})["body"]["source"] == "exact"
+    assert replay.find("GET", "/recipes/complexSearch", {"query": "stew"})["body"]["source"] == "route"
+    assert replay.find("GET", "/recipes/1/information", {})["body"] == {"id": 716429}
+    assert replay.find("POST", "/recipes/parseIngredients", {}) is None
+
+
+def test_the_shipped_fixtures_cover_every_client_route():
+    replay = Replay.load(FIXTURES)
+    for method, path in [("GET", "/recipes/complexSearch"), ("GET", "/recipes/5/information"),
+                         ("POST", "/recipes/parseIngredients"), ("GET", "/food/ingredients/search"),
+                         ("GET", "/food/ingredients/7/information")]:
+        assert replay.find(method, path, {}) is not None, path
+
+
+def test_app_replays_injects_errors_and_counts_calls():
+    client = TestClient(build_app(Replay(RESPONSES), seed=0))
+    assert client.get("/recipes/complexSearch", params={"query": "soup"}).json()["source"] == "exact"
+    missing = client.post("/recipes/parseIngredients", data={"ingredientList": "1 egg"})
+    assert missing.status_code == 404
+
+    assert client.post("/__stub/config", json={"error_rate": 1, "error_status": "500",
+                                               "unknown": 1}).json()["error_rate"] == 1.0
+    assert client.get("/recipes/complexSearch").status_code == 500
+    stats = client.get("/__stub/stats").json()["calls"]
+    assert stats["GET /recipes/complexSearch"] == {"calls": 2, "errors": 1}
+    assert stats["POST /recipes/parseIngredients"] == {"calls": 1, "errors": 0}
+
+    assert client.post("/__stub/reset").status_code == 204
+    assert client.get("/__stub/stats").json()["calls"] == {}
@@ -0,0 +1,81 @@
+# tests/test_train_model.py
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_model
+from train_model import latest_artifact, next_version, write_artifact
+
+# a random-feature classifier on a tiny split may never predict a class
+pytestmark = pytest.mark.filterwarnings("ignore::sklearn.exceptions.UndefinedMetricWarning")
+
+
+class HashEmbedder:
+    """Deterministic stand-in for a SentenceTransformer."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return np.vstack([np.frombuffer(hashlib.sha256(t.encode()).digest(), dtype=np.uint8)
+                          .astype(np.float32) / 255.0 for t in texts])
+
+
+def write_notes(path, n):
+    labels = ["high", "low"]
+    pd.DataFrame({"text": [f"Note number {i}" for i in range(n)],
+                  "urgency": [labels[i % 2] for i in range(n)]}).to_csv(path, index=False)
+
+
+def test_metadata_is_written_after_the_model(tmp_path, monkeypatch):
+    def failing_dump(obj, path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(train_model.joblib, "dump", failing_dump)
+    with pytest.raises(OSError):
+        write_artifact(str(tmp_path), 1, {"classifier": None}, {"version": 1})
+    assert not any(name.endswith(".json") for name in os.listdir(tmp_path))
+    assert latest_artifact(str(tmp_path)) == (0, None)
+
+
+def test_latest_artifact_skips_metadata_without_a_model(tmp_path):
+    write_artifact(str(tmp_path), 1, {"classifier": "v1"}, {"version": 1})
+    with open(tmp_path / "model-v0002.json", "w") as f:
+        json.dump({"version": 2}, f)
+    assert latest_artifact(str(tmp_path)) == (1, {"version": 1})
+
+
+def test_next_version_counts_a_model_left_without_metadata(tmp_path):
+    assert next_version(str(tmp_path)) == 1
+    write_artifact(str(tmp_path), 1, {"classifier": "v1"}, {"version": 1})
+    # an interrupted write: the model is there (and may be served), its sidecar is not
+    joblib.dump({"classifier": "v2"}, tmp_path / "model-v0002.pkl")
+    (tmp_path / "model-v0003.pkl.tmp").write_bytes(b"")
+    assert latest_artifact(str(tmp_path))[0] == 1
+    assert next_version(str(tmp_path)) == 3
+
+
+def test_retraining_reuses_embeddings_and_versions_artifacts(tmp_path):
+    data, artifacts = str(tmp_path / "notes.csv"), str(tmp_path / "artifacts")
+    output = str(tmp_path / "model.pkl")
+    argv = ["--data", data, "--store", str(tmp_path / "store"), "--artifact-dir", artifacts,
+            "--output", output]
+    embedder = HashEmbedder()
+
+    write_notes(data, 40)
+    first = train_model.main(argv + ["--mode", "full"], embedder=embedder)
+    assert first["version"] == 1 and first["encoded_rows"] == 40
+
+    write_notes(data, 45)
+    second = train_model.main(argv + ["--mode", "partial"], embedder=embedder)
+    assert second["version"] == 2
+    assert second["new_rows"] == 5 and second["encoded_rows"] == 5
+    assert embedder.encoded == 45
+    assert latest_artifact(artifacts)[0] == 2
+    assert joblib.load(output)["version"] == 2
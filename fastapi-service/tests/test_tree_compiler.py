@@ -0,0 +1,67 @@
+# tests/test_tree_compiler.py
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from tree_compiler import CompiledForest, compile_forest, compile_or_keep
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4))
+    y = np.where(X[:, 0] + X[:, 1] * X[:, 2] > 0, "ok", np.where(X[:, 3] > 0.5, "hot", "cold"))
+    return X, y
+
+
+def test_classifier_predictions_are_identical(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+    compiled = compile_forest(model)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X))
+    assert compiled.apply(X[:3]).shape == (3, compiled.n_trees)
+    assert compiled.predict(X[0]).shape == (1,)
+    assert compiled.matches(model)
+
+
+def test_regressor_predictions_are_identical(data):
+    X, _ = data
+    target = X[:, 0] * 3 - X[:, 1]
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, target)
+    compiled = compile_forest(model)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    with pytest.raises(AttributeError):
+        compiled.predict_proba(X)
+
+
+def test_large_batches_go_to_the_fallback(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    compiled = compile_or_keep(model, fallback_rows=100)
+    assert isinstance(compiled, CompiledForest) and compiled.fallback is model
+
+    class Spy:
+        calls = 0
+
+        def predict(self, rows):
+            Spy.calls += 1
+            return model.predict(rows)
+
+    compiled.fallback = Spy()
+    compiled.predict(X[:99])
+    assert Spy.calls == 0
+    compiled.predict(X[:100])
+    assert Spy.calls == 1
+
+
+def test_compile_or_keep_falls_back_and_logs():
+    events = []
+
+    class Log:
+        def warning(self, name, **fields):
+            events.append(name)
+
+    model = object()
+    assert compile_or_keep(model, log=Log()) is model
+    assert events == ["forest_compile_failed"]
@@ -0,0 +1,95 @@
+# tests/test_urgency_batcher.py
+import asyncio
+import threading
+
+import pytest
+
+from urgency_batcher import MicroBatcher
+
+
+def test_concurrent_submits_share_one_call_in_order():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert batcher.stats()["avg_batch_size"] == 5
+
+
+def test_batches_are_capped_at_max_batch_size():
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=0)
+    assert asyncio.run(batcher.submit_many(list(range(10)))) == list(range(10))
+    assert max(sizes) <= 4 and sum(sizes) == 10
+
+
+def test_batch_errors_reach_every_caller_and_worker_survives():
+    def batch_fn(items):
+        if "bad" in items:
+            raise ValueError("model failed")
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=10)
+
+    async def run():
+        results = await asyncio.gather(batcher.submit("ok"), batcher.submit("bad"),
+                                       return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        assert await batcher.submit("next") == "next"
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("results", [["only one"], ["a", "b", "c"]])
+def test_wrong_number_of_results_fails_the_batch(results):
+    batcher = MicroBatcher(lambda items: results, max_batch_size=2, max_wait_ms=10)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True), 2)
+
+    out = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in out)
+
+
+def test_replacement_worker_serves_the_old_queue():
+    started, release = threading.Event(), threading.Event()
+
+    def batch_fn(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=0)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        first = loop.create_task(batcher.submit("in flight"))
+        await loop.run_in_executor(None, started.wait)
+        queued = [loop.create_task(batcher.submit(f"queued {i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        batcher._worker.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        later = await asyncio.wait_for(batcher.submit("later"), 2)
+        done = await asyncio.wait_for(asyncio.gather(*queued), 2)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return done, later
+
+    done, later = asyncio.run(run())
+    assert done == ["queued 0", "queued 1", "queued 2"]
+    assert later == "later"
@@ -1,36 +1,218 @@
 # train_model.py (notes)
+# Incremental retraining of the urgency classifier:
+#   python train_model.py                      # warm start from the latest artifact
+#   python train_model.py --mode full          # refit from scratch
+#   python train_model.py --mode partial       # SGD partial_fit on new/changed rows only
+#   python train_model.py --workers 4          # encode new rows across 4 processes
+# Embeddings are cached per row hash, so only new or edited notes are encoded.
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
-from sentence_transformers import SentenceTransformer
-import joblib
 
-# Load data
-df = pd.read_csv('notes_dataset.csv')
+from embedding_cache import PersistentEmbeddingStore, normalize_text
+
+ARTIFACT_DIR = "artifacts/urgency"
+
+
+def text_hash(embedder_name, text):
+    """Embedding cache key: the same note under the same embedder is encoded once."""
+    return hashlib.sha1(f"{embedder_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def row_hash(text, label):
+    """Training-set identity of a row; editing the text or the label makes it a new row."""
+    return hashlib.sha1(f"{normalize_text(text)}\0{label}".encode("utf-8")).hexdigest()
+
+
+def encode(model, texts, batch_size, workers):
+    if workers > 1:
+        pool = model.start_multi_process_pool(["cpu"] * workers)
+        try:
+            return model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            model.stop_multi_process_pool(pool)
+    return model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+def cached_embeddings(model, embedder_name, texts, store, batch_size=64, workers=1):
+    """Embeddings for `texts`; only texts missing from `store` are encoded (and then stored)."""
+    keys = [text_hash(embedder_name, t) for t in texts]
+    missing = {}
+    for key, text in zip(keys, texts):
+        if store.get(key) is None:
+            missing.setdefault(key, text)
+    if missing:
+        vectors = np.asarray(encode(model, list(missing.values()), batch_size, workers), dtype=np.float32)
+        store.put_many(list(missing), vectors)
+    return np.vstack([store.get(k) for k in keys]), len(missing)
+
+
+def latest_artifact(artifact_dir):
+    """(version, metadata) of the newest artifact, or (0, None)."""
+    versions = []
+    for path in glob.glob(os.path.join(artifact_dir, "model-v*.json")):
+        m = re.search(r"model-v(\d+)\.json$", path)
+        # skip metadata left without its model by an interrupted write
+        if m and os.path.exists(path[:-len(".json")] + ".pkl"):
+            versions.append(int(m.group(1)))
+    if not versions:
+        return 0, None
+    version = max(versions)
+    with open(os.path.join(artifact_dir, f"model-v{version:04d}.json")) as f:
+        return version, json.load(f)
+
+
+def next_version(artifact_dir):
+    """
+    Number for the next artifact: one past every model-vNNNN file, including
+    a .pkl an interrupted write left without its .json, which a server
+    watching the directory may already have loaded.
+    """
+    numbers = [int(m.group(1)) for m in (re.search(r"model-v(\d+)\.(?:pkl|json)$", p)
+                                         for p in glob.glob(os.path.join(artifact_dir, "model-v*")))
+               if m]
+    return max(numbers, default=0) + 1
+
+
+def fit_classifier(mode, previous, X_train, y_train, new_mask):
+    """
+    full    - LogisticRegression from scratch
+    warm    - LogisticRegression started from the previous coefficients
+    partial - SGDClassifier partial_fit on the new rows only
+    Falls back to a full fit when the previous model cannot be continued.
+    """
+    classes = np.unique(y_train)
+    compatible = (previous is not None and list(getattr(previous, "classes_", [])) == list(classes)
+                  and getattr(previous, "n_features_in_", None) == X_train.shape[1])
+
+    if mode == "partial":
+        if compatible and isinstance(previous, SGDClassifier):
+            if new_mask.any():
+                previous.partial_fit(X_train[new_mask], y_train[new_mask])
+            return previous, "partial"
+        clf = SGDClassifier(loss="log_loss", random_state=42)
+        for _ in range(5):
+            clf.partial_fit(X_train, y_train, classes=classes)
+        return clf, "partial (initial)"
+
+    if mode == "warm" and compatible and isinstance(previous, LogisticRegression):
+        clf = LogisticRegression(max_iter=1000, warm_start=True)
+        clf.coef_ = previous.coef_.copy()
+        clf.intercept_ = previous.intercept_.copy()
+        clf.classes_ = previous.classes_
+        clf.fit(X_train, y_train)
+        return clf, "warm"
+
+    clf = LogisticRegression(max_iter=1000)
+    clf.fit(X_train, y_train)
+    return clf, "full"
+
+
+def write_artifact(artifact_dir, version, package, metadata, promote_to=None):
+    """model-vNNNN.pkl + model-vNNNN.json, optionally copied over `promote_to` (model.pkl)."""
+    os.makedirs(artifact_dir, exist_ok=True)
+    path = os.path.join(artifact_dir, f"model-v{version:04d}.pkl")
+    # replace in one step so a loading (or watching) server never reads half a file;
+    # the tmp name does not match model-v*.pkl, so watchers ignore it until then
+    joblib.dump(package, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    # the sidecar goes last: a version with metadata always has its model
+    meta_path = os.path.join(artifact_dir, f"model-v{version:04d}.json")
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    if promote_to:
+        tmp = promote_to + ".tmp"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, promote_to)
+    return path
+
+
+def main(argv=None, embedder=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="notes_dataset.csv")
+    parser.add_argument("--embedder", default="all-MiniLM-L6-v2")
+    parser.add_argument("--mode", choices=("warm", "full", "partial"), default="warm")
+    parser.add_argument("--store", default="embedding_store/train")
+    parser.add_argument("--artifact-dir", default=ARTIFACT_DIR)
+    parser.add_argument("--output", default="model.pkl", help="promoted copy the service loads ('' to skip)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+
+    # Load data
+    df = pd.read_csv(args.data)
+    # Optional: clean text
+    df['text'] = df['text'].astype(str).str.lower()
+
+    version, previous_meta = latest_artifact(args.artifact_dir)
+    previous = None
+    if previous_meta is not None and args.mode != "full":
+        previous_package = joblib.load(os.path.join(args.artifact_dir, f"model-v{version:04d}.pkl"))
+        previous = previous_package["classifier"]
+        if embedder is None and previous_meta.get("embedder") == args.embedder:
+            embedder = previous_package["embedder"]  # skip rebuilding the same model
+    if embedder is None:
+        from sentence_transformers import SentenceTransformer
+        embedder = SentenceTransformer(args.embedder)
 
-# Optional: clean text
-df['text'] = df['text'].astype(str).str.lower()
+    # Encode text (cached per row hash; only new or changed notes are encoded)
+    store = PersistentEmbeddingStore(args.store)
+    embeddings, encoded = cached_embeddings(embedder, args.embedder, df['text'].tolist(), store,
+                                            batch_size=args.batch_size, workers=args.workers)
+    hashes = np.array([row_hash(t, u) for t, u in zip(df['text'], df['urgency'])])
+    known = set((previous_meta or {}).get("row_hashes", []))
+    new_mask = np.array([h not in known for h in hashes])
+    print(f"{len(df)} rows, {int(new_mask.sum())} new or changed, {encoded} encoded")
 
-# Encode text
-model = SentenceTransformer('all-MiniLM-L6-v2')
-embeddings = model.encode(df['text'].tolist())
+    # Train-test split
+    X_train, X_test, y_train, y_test, new_train, _ = train_test_split(
+        embeddings, df['urgency'].to_numpy(), new_mask, test_size=0.2, random_state=42
+    )
 
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(
-    embeddings, df['urgency'], test_size=0.2, random_state=42
-)
+    # Train classifier
+    clf, how = fit_classifier(args.mode, previous, X_train, y_train, new_train)
 
-# Train classifier
-clf = LogisticRegression(max_iter=1000)
-clf.fit(X_train, y_train)
+    # Evaluate
+    y_pred = clf.predict(X_test)
+    print(classification_report(y_test, y_pred))
+    accuracy = accuracy_score(y_test, y_pred)
+    print(accuracy)
 
-# Evaluate
-y_pred = clf.predict(X_test)
-print(classification_report(y_test, y_pred))
-print(accuracy_score(y_test, y_pred))
+    # Save classifier and embedding model as a new version
+    version = next_version(args.artifact_dir)
+    metadata = {
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "embedder": args.embedder,
+        "classifier": type(clf).__name__,
+        "fit": how,
+        "rows": len(df),
+        "new_rows": int(new_mask.sum()),
+        "encoded_rows": encoded,
+        "accuracy": round(float(accuracy), 4),
+        "train_seconds": round(time.perf_counter() - started, 2),
+        "row_hashes": sorted(set(hashes.tolist())),
+    }
+    path = write_artifact(args.artifact_dir, version,
+                          {'classifier': clf, 'embedder': embedder, 'version': version},
+                          metadata, promote_to=args.output or None)
+    print(f"Model v{version} ({how} fit) saved as {path}" + (f" and {args.output}" if args.output else ""))
+    return metadata
 
-# Save classifier and embedding model
-joblib.dump({'classifier': clf, 'embedder': model}, 'model.pkl')
 
-print("Model saved as model.pkl")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# tree_compiler.py
+import numpy as np
+
+from event_log import NULL_LOG
+
+
+class CompiledForest:
+    """
+    A trained sklearn RandomForestClassifier / RandomForestRegressor flattened
+    into contiguous NumPy arrays. All trees share one node table; every
+    row walks all trees at once with a vectorized traversal.
+
+    Leaves point to themselves, so the walk simply runs `max_depth` steps.
+    Inputs are compared as float32 against float64 thresholds and the
+    per-tree outputs are accumulated in tree order, exactly as sklearn does,
+    so predictions are identical.
+
+    The walk removes sklearn's per-call overhead, which dominates single-row
+    and small-batch requests; for batches of many thousands of rows
+    sklearn's compiled loop is faster, so when `fallback` (the source
+    model) is set, batches of `fallback_rows` or more are delegated to it.
+    """
+
+    # rows walked together; keeps the (rows, trees) node matrix cache-sized
+    CHUNK_ROWS = 256
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 n_features, classes=None, fallback=None, fallback_rows=1000):
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * node + went_left] -> next node
+        self.children = np.stack([right, left], axis=1).ravel()
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+        self.classes_ = classes
+        self.is_classifier = classes is not None
+        self.fallback = fallback
+        self.fallback_rows = fallback_rows
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children,
+                                      self.value, self.roots))
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index per (row, tree)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        out = np.empty((n_rows, self.n_trees), dtype=np.int32)
+        for start in range(0, n_rows, self.CHUNK_ROWS):
+            chunk = X[start:start + self.CHUNK_ROWS]
+            flat = chunk.ravel()
+            row_base = (np.arange(len(chunk), dtype=np.intp) * n_features)[:, None]
+            nodes = np.broadcast_to(self.roots, (len(chunk), self.n_trees))
+            for _ in range(self.max_depth):
+                go_left = flat[row_base + self.feature[nodes]] <= self.threshold[nodes]
+                nodes = self.children[2 * nodes + go_left]
+            out[start:start + len(chunk)] = nodes
+        return out
+
+    def _accumulate(self, X):
+        leaf_values = self.value[self.apply(X)]
+        out = np.zeros(leaf_values.shape[:1] + leaf_values.shape[2:])
+        for t in range(self.n_trees):
+            out += leaf_values[:, t]
+        out /= self.n_trees
+        return out
+
+    def _use_fallback(self, X) -> bool:
+        return self.fallback is not None and len(X) >= self.fallback_rows
+
+    def predict_proba(self, X) -> np.ndarray:
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+        if self._use_fallback(X):
+            return self.fallback.predict_proba(X)
+        return self._accumulate(X)
+
+    def predict(self, X) -> np.ndarray:
+        if self._use_fallback(X):
+            return self.fallback.predict(X)
+        if self.is_classifier:
+            return self.classes_.take(np.argmax(self._accumulate(X), axis=1), axis=0)
+        return self._accumulate(X)
+
+    def matches(self, model, n_samples: int = 512, seed: int = 0) -> bool:
+        """Check predictions against the source model on random rows spanning the split thresholds."""
+        rng = np.random.default_rng(seed)
+        X = np.empty((n_samples, self.n_features_in_))
+        for f in range(self.n_features_in_):
+            thr = self.threshold[self.feature == f]
+            lo, hi = (thr.min() - 1.0, thr.max() + 1.0) if thr.size else (0.0, 1.0)
+            X[:, f] = rng.uniform(lo, hi, n_samples)
+        expected = model.predict(X)
+        got = self.predict(X)
+        if self.is_classifier:
+            return bool(np.all(expected == got))
+        return bool(np.array_equal(expected, got))
+
+
+def compile_forest(model) -> CompiledForest:
+    """Flatten a fitted sklearn forest (or any ensemble of sklearn trees) into a CompiledForest."""
+    estimators = model.estimators_
+    classes = getattr(model, "classes_", None)
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in estimators:
+        tree = est.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        idx = np.arange(n, dtype=np.int32) + offset
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+        lefts.append(np.where(is_leaf, idx, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, idx, tree.children_right + offset).astype(np.int32))
+
+        if classes is not None:
+            v = tree.value[:, 0, :len(classes)].astype(np.float64)
+            norm = v.sum(axis=1, keepdims=True)
+            if not np.allclose(norm[norm > 0], 1.0):
+                # sklearn < 1.4 stores class counts and normalizes at predict time
+                norm[norm == 0.0] = 1.0
+                v = v / norm
+            values.append(v)
+        else:
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        value=np.ascontiguousarray(np.concatenate(values)),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        n_features=model.n_features_in_,
+        classes=None if classes is None else np.asarray(classes),
+    )
+
+
+def compile_or_keep(model, verify: bool = True, fallback_rows: int = 1000, log=None) -> object:
+    """
+    Return a CompiledForest for `model` that hands large batches back to
+    `model`, or the model itself if compilation or verification fails
+    (reported to `log`, an EventLog).
+    """
+    log = log or NULL_LOG
+    try:
+        compiled = compile_forest(model)
+    except Exception as e:
+        log.warning("forest_compile_failed", model=type(model).__name__, error=str(e))
+        return model
+    if verify and not compiled.matches(model):
+        log.warning("forest_compile_mismatch", model=type(model).__name__)
+        return model
+    compiled.fallback = model
+    compiled.fallback_rows = fallback_rows
+    return compiled
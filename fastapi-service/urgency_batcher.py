@@ -0,0 +1,109 @@
+# urgency_batcher.py
+import asyncio
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item requests into one call of `batch_fn`.
+
+    `batch_fn` takes a list of inputs and returns a list of results in the
+    same order. It runs in the default thread pool so the event loop stays
+    free to collect the next batch while the current one is being scored.
+    A batch is flushed when it reaches `max_batch_size` or when the oldest
+    queued item has waited `max_wait_ms`. Every submitted future is
+    resolved: with its result, the batch's exception, or an error when
+    `batch_fn` returns the wrong number of results.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.batches_run = 0
+        self.items_run = 0
+
+    def _ensure_worker(self):
+        # Created lazily so the queue and task belong to the serving loop
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            if self._queue is None or self._loop is not loop:
+                self._queue = asyncio.Queue()
+                self._loop = loop
+            # a replacement worker serves whatever the previous one left queued
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_worker()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, fut))
+        return await fut
+
+    async def submit_many(self, items: List[Any]) -> List[Any]:
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            fut = loop.create_future()
+            self._queue.put_nowait((item, fut))
+            futures.append(fut)
+        return list(await asyncio.gather(*futures))
+
+    async def _collect(self, batch):
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                await self._collect(batch)
+                inputs = [item for item, _ in batch]
+                results = list(await loop.run_in_executor(None, self.batch_fn, inputs))
+                if len(results) != len(batch):
+                    # results can no longer be matched to inputs
+                    raise RuntimeError(f"batch_fn returned {len(results)} results "
+                                       f"for {len(batch)} inputs")
+            except asyncio.CancelledError:
+                for _, fut in batch:
+                    fut.cancel()
+                raise
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.items_run += len(batch)
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    def stats(self):
+        avg = self.items_run / self.batches_run if self.batches_run else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches_run,
+            "items": self.items_run,
+            "avg_batch_size": round(avg, 2),
+        }